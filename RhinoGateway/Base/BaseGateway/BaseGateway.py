@@ -1,11 +1,28 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import NoReturn, Union, Any, List
+from typing import NoReturn, Union, Any, List, Callable, Tuple, Optional
 
 from RhinoLogger.RhinoLogger.RhinoLogger import RhinoLogger
 from RhinoObject.Rhino.RhinoEnum import MethodEnum
 from RhinoObject.Rhino.RhinoObject import SymbolInfo, RhinoDepth, RhinoTrade, RhinoConfig, SymbolInfos, RhinoOrder, \
     RhinoLeverage, CallableMethods, RhinoAccount, RhinoFundingRate, RhinoKline
 
+from RhinoGateway.Base.RestFul.RestClient import warm_up_connections, warm_up_interval
+
+batch_concurrency = 20  # batch_call 默认的并发数
+
+
+class GatewayCallError(Exception):
+    """
+    call 调用的请求失败、出错或者超时
+    """
+
+    def __init__(self, reason: str, code: int = 0, data: Any = None):
+        super().__init__(f"{reason} {code} {data}")
+        self.reason = reason
+        self.code = code
+        self.data = data
+
 
 class BaseGateway(ABC):
 
@@ -16,6 +33,7 @@ class BaseGateway(ABC):
         self.loop = loop
         self.methods = {}
 
+        self.rest = None
         self.websocket = None
 
     #     self.init(logger, rhino_config)
@@ -182,3 +200,164 @@ class BaseGateway(ABC):
 
     async def resubscribe(self):
         await self.websocket.reconnect()
+
+    async def add_streams(self, symbol_infos: SymbolInfos) -> bool:
+        """
+        不断开连接增量订阅，收到全部订阅回报时返回 True
+        """
+        return await self.websocket.add_streams(symbol_infos)
+
+    async def remove_streams(self, symbol_infos: SymbolInfos) -> bool:
+        """
+        不断开连接取消部分订阅
+        """
+        return await self.websocket.remove_streams(symbol_infos)
+
+    async def add_feeds(self, symbol_infos: SymbolInfos, endpoints: List[Tuple[str, Optional[str]]]) -> bool:
+        """
+        延迟敏感的币对通过其他 url / proxy 建立冗余行情连接，每条数据只处理最先到达的一份
+        """
+        return await self.websocket.add_feeds(symbol_infos, endpoints)
+
+    async def call(self, method: Callable, obj: Any, timeout: float = None) -> Any:
+        """
+        把回调风格的方法变成直接返回结果，比如 depth = await gateway.call(gateway.get_depths, symbol_info)
+        rest 回调是在请求协程里直接 await 的，方法返回时结果已经拿到
+        on_transfer 被调用多次时返回列表，请求失败/出错/超时抛出 GatewayCallError
+        """
+        results = []
+        errors = []
+
+        async def on_transfer(data: Any, extra_data: Any = None) -> NoReturn:
+            results.append(data)
+
+        async def on_failed(request, data: Any, code: int, extra: Any, extra_data: Any = None) -> NoReturn:
+            errors.append(GatewayCallError("failed", code, data))
+
+        async def on_error(request, data: Any, code: int, extra: Any, extra_data: Any = None) -> NoReturn:
+            errors.append(GatewayCallError("error", code, data))
+
+        async def on_timeout(request, data: Any, code: int, extra: Any, extra_data: Any = None) -> NoReturn:
+            errors.append(GatewayCallError("timeout", code, data))
+
+        callable_methods = CallableMethods()
+        callable_methods.on_transfer = on_transfer
+        callable_methods.on_failed = on_failed
+        callable_methods.on_error = on_error
+        callable_methods.on_timeout = on_timeout
+        callable_methods.extra_data = None
+
+        if timeout is None:
+            await method(obj, callable_methods)
+        else:
+            try:
+                await asyncio.wait_for(method(obj, callable_methods), timeout)
+            except asyncio.TimeoutError:
+                raise GatewayCallError("timeout")
+
+        if len(results) == 0:
+            if len(errors) > 0:
+                raise errors[0]
+            # 超时没有设置 on_timeout 的请求、签名失败等情况不会调用任何回调
+            raise GatewayCallError("empty")
+        return results[0] if len(results) == 1 else results
+
+    async def batch_call(self, method: Callable, objs: List[Any], concurrency: int = batch_concurrency,
+                         timeout: float = None, return_exceptions: bool = True) -> List[Any]:
+        """
+        并发调用 call，最多同时 concurrency 个请求，结果和 objs 顺序一致
+        return_exceptions 为 True 时失败的位置返回 GatewayCallError，否则抛出第一个异常
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(obj: Any) -> Any:
+            async with semaphore:
+                return await self.call(method, obj, timeout)
+
+        return await asyncio.gather(*[call(obj) for obj in objs], return_exceptions=return_exceptions)
+
+    async def warm_up(self, connections: int = warm_up_connections, interval: float = warm_up_interval,
+                      proxy: str = None):
+        """
+        可选的启动预热：解析 rest_api 域名并保持 connections 条长连接，避免第一笔下单承担建连耗时
+        """
+        if self.rest is not None:
+            await self.rest.warm_up(connections=connections, interval=interval, proxy=proxy)
+
+    def warm_connections(self):
+        if self.rest is None:
+            return {}
+        return self.rest.warm_connections()
+
+    def lane_status(self):
+        """
+        rest 每条优先级道的排队数、在途数和等待耗时
+        """
+        if self.rest is None:
+            return {}
+        return self.rest.lane_status()
+
+    def latency_status(self):
+        """
+        rest 每个接口排队、建连、首字节、读取、解析、回调各阶段的耗时统计
+        """
+        if self.rest is None:
+            return []
+        return self.rest.latency_status()
+
+    def websocket_status(self):
+        """
+        websocket 重连次数和累计断开时间
+        """
+        if self.websocket is None:
+            return {}
+        return self.websocket.connection_status()
+
+    def dispatch_status(self):
+        """
+        websocket 每个 stream 队列的长度、延迟和覆盖条数
+        """
+        if self.websocket is None:
+            return {}
+        return self.websocket.dispatch_status()
+
+    def watchdog_status(self):
+        """
+        websocket 每个 stream 的静默时间、重新订阅次数和是否在用 REST 轮询
+        """
+        if self.websocket is None:
+            return {}
+        return self.websocket.watchdog_status()
+
+    def feed_status(self):
+        """
+        冗余行情每个 stream 各 feed 先到的次数、比例和平均领先时间
+        """
+        if self.websocket is None:
+            return {}
+        return self.websocket.feed_status()
+
+    def websocket_latency_status(self):
+        """
+        websocket 时钟偏差和每个 stream 交易所到接收、解析、处理各阶段的延迟统计
+        """
+        if self.websocket is None:
+            return {}
+        return self.websocket.latency_status()
+
+    def order_book_status(self):
+        """
+        本地订单簿每个币对是否在同步、lastUpdateId、档位数、最优价和重新同步次数
+        """
+        if self.websocket is None:
+            return {}
+        return self.websocket.order_book_status()
+
+    async def close(self):
+        """
+        关闭 gateway 持有的 http 连接池和 websocket 连接
+        """
+        if self.rest is not None:
+            await self.rest.close()
+        if self.websocket is not None:
+            await self.websocket.close()
@@ -0,0 +1,135 @@
+"""
+耗时直方图
+
+所有 gateway 共用一个 registry，按 (指标名, 标签) 区分直方图，可以直接读取 snapshot，
+也可以用 start_metrics_server 开一个本地 http 端口输出 Prometheus 文本格式
+"""
+import asyncio
+import bisect
+from typing import NoReturn, Dict, List, Tuple
+
+# 直方图的桶上界，秒，从 50us 到 10s
+latency_buckets = [
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+]
+metrics_host = "127.0.0.1"
+metrics_port = 9464
+
+
+class Histogram(object):
+
+    def __init__(self, buckets: List[float] = None):
+        self.buckets = latency_buckets if buckets is None else buckets
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个是 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> NoReturn:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        """
+        按桶线性插值估算分位数
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count == 0:
+                continue
+            if seen + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg": self.sum / self.count if self.count > 0 else 0.0,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+
+class MetricsRegistry(object):
+
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        return histogram
+
+    def observe(self, name: str, value: float, **labels) -> NoReturn:
+        self.histogram(name, **labels).observe(value)
+
+    def snapshot(self, name: str = None) -> List[Dict]:
+        snapshot = []
+        for (metric, labels), histogram in self.histograms.items():
+            if name is not None and metric != name:
+                continue
+            snapshot.append({"name": metric, "labels": dict(labels), **histogram.snapshot()})
+        return snapshot
+
+    def reset(self) -> NoReturn:
+        self.histograms = {}
+
+    def to_prometheus(self) -> str:
+        lines = []
+        typed = set()
+        for (metric, labels), histogram in list(self.histograms.items()):
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            label = ",".join(f'{k}="{v}"' for k, v in labels)
+            prefix = label + "," if label else ""
+            seen = 0
+            for bound, count in zip(self.buckets_text(histogram), histogram.counts):
+                seen += count
+                lines.append(f'{metric}_bucket{{{prefix}le="{bound}"}} {seen}')
+            lines.append(f"{metric}_sum{{{label}}} {histogram.sum}")
+            lines.append(f"{metric}_count{{{label}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def buckets_text(histogram: Histogram) -> List[str]:
+        return [repr(float(bound)) for bound in histogram.buckets] + ["+Inf"]
+
+
+registry = MetricsRegistry()
+
+
+async def start_metrics_server(host: str = metrics_host, port: int = metrics_port,
+                               metrics: MetricsRegistry = None) -> asyncio.AbstractServer:
+    """
+    本地 Prometheus 文本格式的 http 接口，任何路径都返回全部指标
+    """
+    metrics = registry if metrics is None else metrics
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> NoReturn:
+        try:
+            # 只读到请求头结束，不解析路径
+            await reader.readuntil(b"\r\n\r\n")
+            body = metrics.to_prometheus().encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+            await writer.drain()
+        except Exception as e:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
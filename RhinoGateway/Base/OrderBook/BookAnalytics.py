@@ -0,0 +1,274 @@
+"""
+本地订单簿的向量化分析：按名义金额的成交均价、冲击成本曲线、中间价附近 X bps 内的深度、microprice 和买卖盘不平衡
+
+每个订单簿按 version 缓存一份 NumPy 数组，直接从订单簿的 array('d') 价格和数量按 buffer 复制，
+多个币对的查询把数组拼接后一次写入 币对 x 档位 的矩阵一起算完，
+查询结果按 (查询, 币对, 参数) 和这些币对当时的 version 缓存，同一个 tick 内重复查询直接返回，
+缓存超过 analytics_cache_size 条时删除 version 已经变化的和最早写入的条目
+返回的数组是只读的，多处共用同一份结果
+"""
+from typing import Dict, List, Tuple, Any, Callable, Sequence, Union, NoReturn
+
+import numpy as np
+
+from RhinoGateway.Base.OrderBook.OrderBook import OrderBook, OrderBookManager, BookSide
+
+analytics_depth = 200  # 每边参与计算的档位数
+analytics_cache_size = 1024  # 查询结果和矩阵缓存的最大条数
+
+BUY = "buy"  # 买入，吃卖盘
+SELL = "sell"  # 卖出，吃买盘
+
+
+class SideArrays(object):
+    __slots__ = ("prices", "amounts", "cumulative_sums")
+
+    def __init__(self, side: BookSide, depth: int):
+        # keys / amounts 是 array('d')，按 buffer 直接取最优的 depth 档，不经过 Python float 和字典查找
+        amounts = side.track_amounts()
+        count = min(depth, len(side.keys))
+        prices = np.frombuffer(side.keys, dtype=np.float64)[len(side.keys) - count:][::-1]
+        self.prices = -prices if side.reverse else prices.copy()
+        self.amounts = np.frombuffer(amounts, dtype=np.float64)[len(amounts) - count:][::-1].copy()
+        self.cumulative_sums = None
+
+    def cumulative(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (累计名义金额, 累计数量)，只有单个币对的查询用到，第一次读取时计算
+        """
+        if self.cumulative_sums is None:
+            self.cumulative_sums = (np.cumsum(self.prices * self.amounts), np.cumsum(self.amounts))
+        return self.cumulative_sums
+
+
+class BookArrays(object):
+    __slots__ = ("book", "version", "bids", "asks", "mid")
+
+    def __init__(self, book: OrderBook, depth: int):
+        self.book = book
+        self.version = book.version
+        self.bids = SideArrays(book.bids, depth)
+        self.asks = SideArrays(book.asks, depth)
+        if len(self.bids.prices) > 0 and len(self.asks.prices) > 0:
+            self.mid = (self.bids.prices[0] + self.asks.prices[0]) / 2
+        else:
+            self.mid = np.nan
+
+
+class SideMatrix(object):
+    """
+    多个币对同一边补齐成 币对 x 档位 的矩阵，价格补 NaN，数量补 0，累计值补 inf
+    所有币对的档位先拼接成一个数组，再按掩码一次写入矩阵，累计值在整个矩阵上按行计算
+    """
+    __slots__ = ("prices", "amounts", "quotes", "bases", "lengths")
+
+    def __init__(self, sides: List[SideArrays]):
+        count = len(sides)
+        self.lengths = np.fromiter(map(len, [side.prices for side in sides]), np.int64, count)
+        width = max(int(self.lengths.max()) if count > 0 else 0, 1)
+        # 按行优先的顺序，掩码为 True 的位置正好对应拼接后的档位
+        mask = np.arange(width) < self.lengths[:, None]
+        self.prices = np.full((count, width), np.nan)
+        self.amounts = np.zeros((count, width))
+        if count > 0:
+            self.prices[mask] = np.concatenate([side.prices for side in sides])
+            self.amounts[mask] = np.concatenate([side.amounts for side in sides])
+        self.bases = np.cumsum(self.amounts, axis=1)
+        self.quotes = np.cumsum(np.where(mask, self.prices, 0.0) * self.amounts, axis=1)
+        self.bases[~mask] = np.inf
+        self.quotes[~mask] = np.inf
+
+
+def read_only(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, tuple):
+        for item in value:
+            read_only(item)
+    return value
+
+
+class BookAnalytics(object):
+
+    def __init__(self, manager: OrderBookManager, depth: int = analytics_depth):
+        self.manager = manager
+        self.depth = depth
+        self.arrays: Dict[str, BookArrays] = {}  # 币对 -> 当前 version 的数组
+        self.matrices: Dict[tuple, Tuple[tuple, tuple, SideMatrix]] = {}  # (币对, 买卖) -> (币对, version, 矩阵)
+        self.results: Dict[tuple, Tuple[tuple, tuple, Any]] = {}  # (查询, 币对, 参数) -> (币对, version, 结果)
+
+    def book_arrays(self, symbol: str) -> BookArrays:
+        book = self.manager.books[symbol]
+        arrays = self.arrays.get(symbol)
+        # 移除后重新订阅的订单簿 version 从 0 开始，同时比较是不是同一个订单簿
+        if arrays is None or arrays.book is not book or arrays.version != book.version:
+            arrays = self.arrays[symbol] = BookArrays(book, self.depth)
+        return arrays
+
+    def versions(self, symbols: Tuple[str, ...]) -> tuple:
+        books = self.manager.books
+        return tuple((id(books[symbol]), books[symbol].version) for symbol in symbols)
+
+    def stale(self, symbols: Tuple[str, ...], versions: tuple) -> bool:
+        books = self.manager.books
+        for symbol, (book_id, version) in zip(symbols, versions):
+            book = books.get(symbol)
+            if book is None or id(book) != book_id or book.version != version:
+                return True
+        return False
+
+    def store(self, cache: Dict[tuple, tuple], key: tuple, symbols: Tuple[str, ...], versions: tuple,
+              value: Any) -> NoReturn:
+        """
+        缓存满了时先删除 version 已经变化的条目，仍然超过一半时按写入顺序删除最早的，
+        参数每个 tick 都不同的查询不会让缓存一直增长
+        """
+        cache.pop(key, None)
+        if len(cache) >= analytics_cache_size:
+            for old in [k for k, (s, v, _) in cache.items() if self.stale(s, v)]:
+                del cache[old]
+            for old in list(cache)[:len(cache) - analytics_cache_size // 2]:
+                del cache[old]
+        cache[key] = (symbols, versions, value)
+
+    def cached(self, key: tuple, symbols: Tuple[str, ...], compute: Callable[[], Any]) -> Any:
+        versions = self.versions(symbols)
+        result = self.results.get(key)
+        if result is not None and result[1] == versions:
+            return result[2]
+        value = read_only(compute())
+        self.store(self.results, key, symbols, versions, value)
+        return value
+
+    def matrix(self, symbols: Tuple[str, ...], side: str) -> SideMatrix:
+        """
+        side 是 bids / asks
+        """
+        key = (symbols, side)
+        versions = self.versions(symbols)
+        matrix = self.matrices.get(key)
+        if matrix is not None and matrix[1] == versions:
+            return matrix[2]
+        value = SideMatrix([getattr(self.book_arrays(symbol), side) for symbol in symbols])
+        self.store(self.matrices, key, symbols, versions, value)
+        return value
+
+    def mids(self, symbols: Sequence[str]) -> np.ndarray:
+        symbols = tuple(symbols)
+        return self.cached(("mid", symbols), symbols,
+                           lambda: np.array([self.book_arrays(symbol).mid for symbol in symbols]))
+
+    def vwap(self, symbols: Sequence[str], notional: Union[float, Sequence[float]], side: str = BUY) -> np.ndarray:
+        """
+        成交 notional 名义金额的成交均价，买入吃卖盘，卖出吃买盘，深度不够时是 NaN
+        notional 可以是一个数，也可以每个币对一个
+        """
+        symbols = tuple(symbols)
+        notionals = np.broadcast_to(np.asarray(notional, dtype=np.float64), (len(symbols),))
+        key = ("vwap", symbols, side, notionals.tobytes())
+        return self.cached(key, symbols, lambda: self.compute_vwap(symbols, notionals, side))
+
+    def compute_vwap(self, symbols: Tuple[str, ...], notionals: np.ndarray, side: str) -> np.ndarray:
+        matrix = self.matrix(symbols, "asks" if side == BUY else "bids")
+        rows = np.arange(len(symbols))
+        # 第一档累计金额不小于 notional 的位置
+        index = (matrix.quotes < notionals[:, None]).sum(axis=1)
+        valid = index < matrix.lengths
+        index = np.minimum(index, matrix.prices.shape[1] - 1)
+        previous = np.maximum(index - 1, 0)
+        prev_quote = np.where(index > 0, matrix.quotes[rows, previous], 0.0)
+        prev_base = np.where(index > 0, matrix.bases[rows, previous], 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            base = prev_base + (notionals - prev_quote) / matrix.prices[rows, index]
+            return np.where(valid, notionals / base, np.nan)
+
+    def impact_curve(self, symbol: str, notionals: Sequence[float], side: str = BUY) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        一个币对在一组名义金额下的成交均价和相对中间价的冲击成本，单位 bps，深度不够时是 NaN
+        """
+        notionals = np.asarray(notionals, dtype=np.float64)
+        key = ("impact", (symbol,), side, notionals.tobytes())
+        return self.cached(key, (symbol,), lambda: self.compute_impact(symbol, notionals, side))
+
+    def compute_impact(self, symbol: str, notionals: np.ndarray, side: str) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self.book_arrays(symbol)
+        levels = arrays.asks if side == BUY else arrays.bids
+        if len(levels.prices) == 0:
+            empty = np.full(len(notionals), np.nan)
+            return empty, empty.copy()
+        quotes, bases = levels.cumulative()
+        index = np.searchsorted(quotes, notionals, side="left")
+        valid = index < len(levels.prices)
+        index = np.minimum(index, len(levels.prices) - 1)
+        previous = np.maximum(index - 1, 0)
+        prev_quote = np.where(index > 0, quotes[previous], 0.0)
+        prev_base = np.where(index > 0, bases[previous], 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            base = prev_base + (notionals - prev_quote) / levels.prices[index]
+            vwap = np.where(valid, notionals / base, np.nan)
+            impact = (vwap / arrays.mid - 1) * 1e4
+        return vwap, impact if side == BUY else -impact
+
+    def depth_within(self, symbols: Sequence[str], bps: float, notional: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        中间价上下 bps 以内买盘和卖盘的累计深度，notional 为 True 时按名义金额，否则按数量
+        """
+        symbols = tuple(symbols)
+        key = ("depth", symbols, float(bps), notional)
+        return self.cached(key, symbols, lambda: self.compute_depth(symbols, bps, notional))
+
+    def compute_depth(self, symbols: Tuple[str, ...], bps: float, notional: bool) -> Tuple[np.ndarray, np.ndarray]:
+        mids = self.mids(symbols)
+        result = []
+        for side, bound in (("bids", mids * (1 - bps / 1e4)), ("asks", mids * (1 + bps / 1e4))):
+            matrix = self.matrix(symbols, side)
+            # 补齐的价格是 NaN，比较结果为 False，不会计入
+            with np.errstate(invalid="ignore"):
+                inside = matrix.prices >= bound[:, None] if side == "bids" else matrix.prices <= bound[:, None]
+            values = matrix.amounts * np.nan_to_num(matrix.prices) if notional else matrix.amounts
+            result.append(np.where(inside, values, 0.0).sum(axis=1))
+        return result[0], result[1]
+
+    def imbalance(self, symbols: Sequence[str], levels: int = 1) -> np.ndarray:
+        """
+        前 levels 档 (买量 - 卖量) / (买量 + 卖量)，-1 到 1
+        """
+        symbols = tuple(symbols)
+        key = ("imbalance", symbols, levels)
+        return self.cached(key, symbols, lambda: self.compute_imbalance(symbols, levels))
+
+    def compute_imbalance(self, symbols: Tuple[str, ...], levels: int) -> np.ndarray:
+        bid = self.matrix(symbols, "bids").amounts[:, :levels].sum(axis=1)
+        ask = self.matrix(symbols, "asks").amounts[:, :levels].sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (bid - ask) / (bid + ask)
+
+    def microprice(self, symbols: Sequence[str]) -> np.ndarray:
+        """
+        按第一档数量加权的价格 (买价 * 卖量 + 卖价 * 买量) / (买量 + 卖量)
+        """
+        symbols = tuple(symbols)
+        return self.cached(("microprice", symbols), symbols, lambda: self.compute_microprice(symbols))
+
+    def compute_microprice(self, symbols: Tuple[str, ...]) -> np.ndarray:
+        bids = self.matrix(symbols, "bids")
+        asks = self.matrix(symbols, "asks")
+        bid_price, bid_amount = bids.prices[:, 0], bids.amounts[:, 0]
+        ask_price, ask_amount = asks.prices[:, 0], asks.amounts[:, 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (bid_price * ask_amount + ask_price * bid_amount) / (bid_amount + ask_amount)
+
+    def clear(self, symbols: Sequence[str] = None) -> None:
+        """
+        删除已经移除的订单簿的缓存，symbols 为 None 时清空
+        """
+        if symbols is None:
+            self.arrays.clear()
+            self.matrices.clear()
+            self.results.clear()
+            return
+        removed = set(symbols)
+        for symbol in removed:
+            self.arrays.pop(symbol, None)
+        self.matrices = {key: value for key, value in self.matrices.items() if removed.isdisjoint(key[0])}
+        self.results = {key: value for key, value in self.results.items() if removed.isdisjoint(key[1])}
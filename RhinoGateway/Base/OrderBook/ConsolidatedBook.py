@@ -0,0 +1,368 @@
+"""
+跨交易所合并订单簿
+
+按统一后的币对名（去掉分隔符、大写，BTC_USDT / btcusdt / BTC-USDT 都是 BTCUSDT）把各交易所的深度合并成一个按价格排序的盘口，
+每一档记录 交易所 -> 数量，AMM 池子按储备量换算成合成的挂单档位
+每个交易所上一次的档位单独保存，新的深度只和上一次比较，只改动变化的档位；合并后的每一边是 BookSide，最优价读取 O(1)
+合并后的订单簿和本地订单簿一样有 bids / asks / version，可以直接交给 BookAnalytics 计算
+"""
+import math
+import re
+from typing import NoReturn, Dict, List, Tuple, Optional, Any, Iterable, Callable, Awaitable
+
+from RhinoObject.Base.BaseEnum import OrderDirection
+
+from RhinoGateway.Base.OrderBook.OrderBook import BookSide
+
+amm_fee = 0.0025  # AMM 池子默认手续费，PancakeSwap V2 是 0.25%
+amm_ladder_steps = 20  # AMM 每边合成的档位数
+amm_step_bps = 10  # AMM 合成档位之间的价格间隔，bps
+depth_field_levels = 1000  # 按 buy_price1 ... 字段读取 RhinoDepth 时最多读取的档位数
+
+symbol_separator = re.compile(r"[^A-Za-z0-9]")
+
+
+def normalize_symbol(symbol: str) -> str:
+    return symbol_separator.sub("", symbol).upper()
+
+
+def depth_symbol(rhino_depth: Any) -> str:
+    symbol = getattr(rhino_depth, "real_pair", None) or getattr(rhino_depth, "pair", None) or \
+             getattr(rhino_depth, "symbol", None)
+    return normalize_symbol(symbol)
+
+
+def depth_venue(rhino_depth: Any) -> str:
+    return getattr(rhino_depth, "cex_exchange_sub", None) or getattr(rhino_depth, "dex_exchange", None) or \
+           getattr(rhino_depth, "cex_exchange", None)
+
+
+def depth_levels(rhino_depth: Any) -> Tuple[List, List]:
+    """
+    RhinoArrayDepth 直接读数组，其他 RhinoDepth 按 buy_price1 / sell_price1 ... 读到没有的档位为止
+    """
+    if hasattr(rhino_depth, "bid_levels"):
+        return rhino_depth.bids(), rhino_depth.asks()
+    result = []
+    for prefix in ("buy", "sell"):
+        levels = []
+        for i in range(1, depth_field_levels + 1):
+            price = getattr(rhino_depth, f"{prefix}_price{i}", None)
+            if price is None:
+                break
+            levels.append((price, getattr(rhino_depth, f"{prefix}_amount{i}", 0)))
+        result.append(levels)
+    return result[0], result[1]
+
+
+def amm_levels(reserve_base: float, reserve_quote: float, fee: float = amm_fee, steps: int = amm_ladder_steps,
+               step_bps: float = amm_step_bps) -> Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]:
+    """
+    按恒定乘积 x * y = k 把储备量换算成买卖各 steps 档，第 i 档是价格从 p(i-1) 移动到 p(i) 能成交的数量，
+    数量是 sqrt(k / p(i-1)) - sqrt(k / p(i))，这一段的成交均价是 sqrt(p(i-1) * p(i))，再按手续费调整
+    逐档吃完的总成本和直接在池子里成交一致
+    """
+    if reserve_base <= 0 or reserve_quote <= 0:
+        return [], []
+    k = reserve_base * reserve_quote
+    mid = reserve_quote / reserve_base
+    step = step_bps / 1e4
+    bids = []
+    asks = []
+    previous_bid = previous_ask = mid
+    for i in range(1, steps + 1):
+        ask = mid * (1 + step * i)
+        asks.append((math.sqrt(previous_ask * ask) / (1 - fee),
+                     math.sqrt(k / previous_ask) - math.sqrt(k / ask)))
+        previous_ask = ask
+        if step * i < 1:
+            bid = mid * (1 - step * i)
+            bids.append((math.sqrt(previous_bid * bid) * (1 - fee),
+                         math.sqrt(k / bid) - math.sqrt(k / previous_bid)))
+            previous_bid = bid
+    return bids, asks
+
+
+class ConsolidatedSide(BookSide):
+    """
+    levels 是 价格 -> 所有交易所的总数量，venues 是 价格 -> {交易所: 数量}
+    """
+
+    def __init__(self, reverse: bool):
+        super().__init__(reverse)
+        self.venues: Dict[float, Dict[str, float]] = {}
+
+    def clear(self) -> NoReturn:
+        super().clear()
+        self.venues.clear()
+
+    def set(self, venue: str, price: float, amount: float) -> NoReturn:
+        venues = self.venues.get(price)
+        if amount <= 0:
+            if venues is None or venues.pop(venue, None) is None:
+                return
+            if len(venues) == 0:
+                del self.venues[price]
+                self.update(price, 0)
+                return
+        else:
+            if venues is None:
+                venues = self.venues[price] = {}
+            venues[venue] = amount
+        self.update(price, sum(venues.values()))
+
+    def best_venues(self) -> Optional[Tuple[float, float, Dict[str, float]]]:
+        best = self.best()
+        if best is None:
+            return None
+        return best[0], best[1], self.venues[best[0]]
+
+    def top_venues(self, limit: int) -> List[Tuple[float, float, Dict[str, float]]]:
+        venues = self.venues
+        return [(price, amount, venues[price]) for price, amount in self.top(limit)]
+
+
+class ConsolidatedOrderBook(object):
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = ConsolidatedSide(False)
+        self.asks = ConsolidatedSide(True)
+        self.venue_bids: Dict[str, Dict[float, float]] = {}  # 交易所 -> 上一次的买盘档位
+        self.venue_asks: Dict[str, Dict[float, float]] = {}
+        self.version = 0  # 每次变化加 1
+
+    def replace_side(self, side: ConsolidatedSide, venue_levels: Dict[str, Dict[float, float]], venue: str,
+                     levels: Iterable) -> int:
+        """
+        用交易所新的完整档位替换上一次的档位，只改动新增、删除和数量变化的价格，返回改动的档位数
+        """
+        previous = venue_levels.get(venue, {})
+        # 深度档位一般已经是 float，整组用 dict() 转换
+        current = dict(levels)
+        if len(current) > 0:
+            price, amount = next(iter(current.items()))
+            if type(price) is not float or type(amount) is not float:
+                current = {float(price): float(amount) for price, amount in current.items()}
+            if 0.0 in current.values():
+                current = {price: amount for price, amount in current.items() if amount > 0}
+        if current == previous:
+            return 0
+        get = previous.get
+        updated = [(price, amount) for price, amount in current.items() if get(price) != amount]
+        # 价格集合没变时只有数量变化，不用再找删除的档位
+        removed = [] if current.keys() == previous.keys() else [price for price in previous if price not in current]
+        for price in removed:
+            side.set(venue, price, 0)
+        for price, amount in updated:
+            side.set(venue, price, amount)
+        venue_levels[venue] = current
+        return len(removed) + len(updated)
+
+    def replace(self, venue: str, bids: Iterable, asks: Iterable) -> int:
+        changed = self.replace_side(self.bids, self.venue_bids, venue, bids) + \
+                  self.replace_side(self.asks, self.venue_asks, venue, asks)
+        if changed > 0:
+            self.version += 1
+        return changed
+
+    def apply_side(self, side: ConsolidatedSide, venue_levels: Dict[str, Dict[float, float]], venue: str,
+                   levels: Iterable) -> int:
+        current = venue_levels.setdefault(venue, {})
+        changed = 0
+        for price, amount in levels:
+            price = float(price)
+            amount = float(amount)
+            if amount > 0:
+                current[price] = amount
+            elif current.pop(price, None) is None:
+                continue
+            side.set(venue, price, amount)
+            changed += 1
+        return changed
+
+    def apply(self, venue: str, bids: Iterable, asks: Iterable) -> int:
+        """
+        增量更新，数量为 0 的档位删除
+        """
+        changed = self.apply_side(self.bids, self.venue_bids, venue, bids) + \
+                  self.apply_side(self.asks, self.venue_asks, venue, asks)
+        if changed > 0:
+            self.version += 1
+        return changed
+
+    def remove_venue(self, venue: str) -> int:
+        changed = self.replace(venue, (), ())
+        self.venue_bids.pop(venue, None)
+        self.venue_asks.pop(venue, None)
+        return changed
+
+    def venues(self) -> List[str]:
+        return sorted(self.venue_bids.keys() | self.venue_asks.keys())
+
+    def best_bid(self) -> Optional[Tuple[float, float, Dict[str, float]]]:
+        return self.bids.best_venues()
+
+    def best_ask(self) -> Optional[Tuple[float, float, Dict[str, float]]]:
+        return self.asks.best_venues()
+
+
+class AMMPool(object):
+
+    def __init__(self, venue: str, index: int, decimals0: int, decimals1: int, base_token0: bool, fee: float):
+        self.venue = venue
+        self.index = index  # RhinoDepth 中 pool{index}_reverse0 / pool{index}_reverse1 的序号
+        self.decimals0 = decimals0
+        self.decimals1 = decimals1
+        self.base_token0 = base_token0  # token0 是币对的基础币，否则 token1 是
+        self.fee = fee
+
+
+class ConsolidatedBookManager(object):
+    """
+    books 是 统一币对名 -> 合并订单簿
+    on_transfer 可以直接作为网关 get_depths / subscribe 的 on_transfer，
+    登记过池子的币对按 pool{i}_reverse0 / pool{i}_reverse1 换算 AMM 档位，其他按深度档位替换，
+    RhinoIncreaseDepth 列表按增量更新，需要用 venue_transfer 指定交易所名
+    """
+
+    def __init__(self, steps: int = amm_ladder_steps, step_bps: float = amm_step_bps):
+        self.steps = steps
+        self.step_bps = step_bps
+        self.books: Dict[str, ConsolidatedOrderBook] = {}
+        self.pools: Dict[str, List[AMMPool]] = {}  # 统一币对名 -> 池子
+
+    def book(self, symbol: str) -> ConsolidatedOrderBook:
+        symbol = normalize_symbol(symbol)
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = ConsolidatedOrderBook(symbol)
+        return book
+
+    def update_levels(self, venue: str, symbol: str, bids: Iterable, asks: Iterable) -> int:
+        return self.book(symbol).replace(venue, bids, asks)
+
+    def apply_levels(self, venue: str, symbol: str, bids: Iterable, asks: Iterable) -> int:
+        return self.book(symbol).apply(venue, bids, asks)
+
+    def update_depth(self, rhino_depth: Any, venue: str = None, symbol: str = None) -> int:
+        bids, asks = depth_levels(rhino_depth)
+        return self.update_levels(venue or depth_venue(rhino_depth), symbol or depth_symbol(rhino_depth), bids, asks)
+
+    def add_pool(self, symbol: str, venue: str, index: int = 1, decimals0: int = 18, decimals1: int = 18,
+                 base_token0: bool = True, fee: float = amm_fee) -> NoReturn:
+        self.pools.setdefault(normalize_symbol(symbol), []).append(
+            AMMPool(venue, index, decimals0, decimals1, base_token0, fee))
+
+    def update_pool(self, symbol: str, pool: AMMPool, reserve0: int, reserve1: int) -> int:
+        amount0 = reserve0 / 10 ** pool.decimals0
+        amount1 = reserve1 / 10 ** pool.decimals1
+        if pool.base_token0:
+            bids, asks = amm_levels(amount0, amount1, pool.fee, self.steps, self.step_bps)
+        else:
+            bids, asks = amm_levels(amount1, amount0, pool.fee, self.steps, self.step_bps)
+        return self.update_levels(pool.venue, symbol, bids, asks)
+
+    def update_pools(self, rhino_depth: Any, symbol: str = None) -> int:
+        symbol = normalize_symbol(symbol) if symbol is not None else depth_symbol(rhino_depth)
+        changed = 0
+        for pool in self.pools.get(symbol, ()):
+            reserve0 = getattr(rhino_depth, f"pool{pool.index}_reverse0", None)
+            reserve1 = getattr(rhino_depth, f"pool{pool.index}_reverse1", None)
+            if reserve0 is None or reserve1 is None:
+                continue
+            changed += self.update_pool(symbol, pool, reserve0, reserve1)
+        return changed
+
+    def apply_increase_depths(self, venue: str, increase_depths: List[Any]) -> int:
+        """
+        MEXC 增量推送输出的 RhinoIncreaseDepth 列表，数量为 0 的档位删除
+        """
+        changed = 0
+        levels: Dict[str, Tuple[List, List]] = {}
+        for increase_depth in increase_depths:
+            bids, asks = levels.setdefault(normalize_symbol(increase_depth.real_pair), ([], []))
+            side = bids if increase_depth.direction == OrderDirection.BUY.value else asks
+            side.append((increase_depth.price, increase_depth.amount))
+        for symbol, (bids, asks) in levels.items():
+            changed += self.apply_levels(venue, symbol, bids, asks)
+        return changed
+
+    async def on_transfer(self, data: Any, extra: Any = None, venue: str = None) -> NoReturn:
+        if isinstance(data, list):
+            self.apply_increase_depths(venue, data)
+            return
+        # 同一个币对可以同时有交易所深度和池子储备量，按有没有储备量字段区分
+        pools = self.pools.get(depth_symbol(data))
+        if pools and getattr(data, f"pool{pools[0].index}_reverse0", None) is not None:
+            self.update_pools(data)
+        else:
+            self.update_depth(data, venue)
+
+    def venue_transfer(self, venue: str) -> Callable[..., Awaitable]:
+        """
+        指定交易所名的 on_transfer，用于 RhinoIncreaseDepth 这类不带交易所字段的数据
+        """
+
+        async def transfer(data: Any, extra: Any = None) -> NoReturn:
+            await self.on_transfer(data, extra, venue)
+
+        return transfer
+
+    def remove_venue(self, venue: str, symbol: str = None) -> NoReturn:
+        if symbol is None:
+            books = self.books.values()
+        else:
+            # 只读取已有的订单簿，移除交易所时不新建空的合并订单簿
+            book = self.find(symbol)
+            books = [] if book is None else [book]
+        for book in books:
+            book.remove_venue(venue)
+
+    def find(self, symbol: str) -> Optional[ConsolidatedOrderBook]:
+        """
+        和写入一样按统一后的币对名查找，BTC_USDT / btc-usdt 都能找到 BTCUSDT，不存在时不新建
+        """
+        book = self.books.get(symbol)
+        # 已经统一过的币对名直接命中，不用每次都做正则替换
+        return book if book is not None else self.books.get(normalize_symbol(symbol))
+
+    def best_bid(self, symbol: str) -> Optional[Tuple[float, float, Dict[str, float]]]:
+        """
+        返回 (价格, 总数量, {交易所: 数量})
+        """
+        book = self.find(symbol)
+        return None if book is None else book.bids.best_venues()
+
+    def best_ask(self, symbol: str) -> Optional[Tuple[float, float, Dict[str, float]]]:
+        book = self.find(symbol)
+        return None if book is None else book.asks.best_venues()
+
+    def crossed(self, symbol: str) -> bool:
+        """
+        跨交易所的最优买价高于最优卖价
+        """
+        best_bid = self.best_bid(symbol)
+        best_ask = self.best_ask(symbol)
+        return best_bid is not None and best_ask is not None and best_bid[0] >= best_ask[0]
+
+    def top(self, symbol: str, limit: int) -> Tuple[List, List]:
+        book = self.find(symbol)
+        if book is None:
+            return [], []
+        return book.bids.top_venues(limit), book.asks.top_venues(limit)
+
+    def status(self) -> Dict[str, Dict]:
+        status = {}
+        for symbol, book in self.books.items():
+            best_bid = book.bids.best_venues()
+            best_ask = book.asks.best_venues()
+            status[symbol] = {
+                "venues": book.venues(),
+                "version": book.version,
+                "bids": len(book.bids),
+                "asks": len(book.asks),
+                "best_bid": None if best_bid is None else [best_bid[0], best_bid[1], sorted(best_bid[2])],
+                "best_ask": None if best_ask is None else [best_ask[0], best_ask[1], sorted(best_ask[2])],
+            }
+        return status
@@ -0,0 +1,370 @@
+"""
+本地 L2 订单簿
+
+由增量深度推送维护，用 REST 快照按 lastUpdateId / U / u / pu 规则对齐，推送不连续时自动重新同步
+每一边是 价格 -> 数量 的字典加上有序的价格数组 array('d')，最优价在数组末尾读取 O(1)
+已有档位的数量更新只改字典 O(1)；新增和删除档位先 bisect 查找 O(log n)，再在数组中插入或删除，
+这一步要移动插入位置之后的元素，是 O(n) 的内存移动，不是 O(log n)
+买盘按价格从低到高存，卖盘按负价格从低到高存，两边的最优价都在末尾，增量大多落在盘口附近，移动的元素很少，
+1000 档以内的深簿实际开销主要是 bisect 和字典操作
+"""
+import asyncio
+import time
+import traceback
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import NoReturn, Dict, List, Tuple, Optional, Callable, Awaitable, Any
+
+order_book_snapshot_limit = 1000  # 同步时请求的快照档位数
+order_book_buffer_size = 10000  # 同步期间最多缓存的增量条数
+order_book_retry_delay = 1  # 快照请求失败或者对不上时等待的时间，秒
+
+level_names: Dict[int, Tuple[List[str], List[str], List[str], List[str]]] = {}
+
+
+def get_level_names(limit: int) -> Tuple[List[str], List[str], List[str], List[str]]:
+    """
+    RhinoDepth 每一档的字段名，按档位数缓存，输出时不用每档拼接字符串
+    """
+    names = level_names.get(limit)
+    if names is None:
+        names = level_names[limit] = (
+            [f"buy_price{i}" for i in range(1, limit + 1)],
+            [f"buy_amount{i}" for i in range(1, limit + 1)],
+            [f"sell_price{i}" for i in range(1, limit + 1)],
+            [f"sell_amount{i}" for i in range(1, limit + 1)],
+        )
+    return names
+
+
+class BookSide(object):
+    """
+    keys 是 array('d')，分析时可以直接按 buffer 转成 NumPy 数组
+    调用 track_amounts() 之后同时按 keys 的顺序维护数量数组 amounts，没有调用时更新不需要额外的查找
+    """
+
+    def __init__(self, reverse: bool):
+        self.reverse = reverse  # 卖盘为 True，按负价格排序
+        self.levels: Dict[float, float] = {}  # 价格 -> 数量
+        self.keys = array("d")  # 排序用的价格，最优价在末尾
+        self.amounts: Optional[array] = None  # 和 keys 对应的数量，track_amounts() 之后才有
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def clear(self) -> NoReturn:
+        self.levels.clear()
+        del self.keys[:]
+        if self.amounts is not None:
+            del self.amounts[:]
+
+    def track_amounts(self) -> array:
+        if self.amounts is None:
+            levels = self.levels
+            if self.reverse:
+                self.amounts = array("d", [levels[-key] for key in self.keys])
+            else:
+                self.amounts = array("d", [levels[key] for key in self.keys])
+        return self.amounts
+
+    def update(self, price: float, amount: float) -> NoReturn:
+        key = -price if self.reverse else price
+        amounts = self.amounts
+        if amount == 0:
+            if self.levels.pop(price, None) is not None:
+                index = bisect_left(self.keys, key)
+                del self.keys[index]
+                if amounts is not None:
+                    del amounts[index]
+            return
+        if price not in self.levels:
+            index = bisect_left(self.keys, key)
+            self.keys.insert(index, key)
+            if amounts is not None:
+                amounts.insert(index, amount)
+        elif amounts is not None:
+            # 只有维护数量数组时已有档位的更新才需要查找位置
+            amounts[bisect_left(self.keys, key)] = amount
+        self.levels[price] = amount
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        if len(self.keys) == 0:
+            return None
+        price = -self.keys[-1] if self.reverse else self.keys[-1]
+        return price, self.levels[price]
+
+    def top(self, limit: int) -> List[Tuple[float, float]]:
+        """
+        从最优价开始的 limit 档
+        """
+        levels = self.levels
+        keys = self.keys[:-limit - 1:-1] if limit < len(self.keys) else self.keys[::-1]
+        if self.reverse:
+            return [(-key, levels[-key]) for key in keys]
+        return [(key, levels[key]) for key in keys]
+
+
+class OrderBook(object):
+
+    def __init__(self, symbol: str, stream: str, limit: int, interval: float, prev_id: bool):
+        self.symbol = symbol
+        self.stream = stream
+        self.limit = limit  # 输出的档位数
+        self.interval = interval  # 输出的最小间隔，秒，0 时每条增量都输出
+        self.prev_id = prev_id  # 合约推送带 pu，按 pu 检查连续性；现货按 U 检查
+        self.bids = BookSide(False)
+        self.asks = BookSide(True)
+        self.last_update_id = 0
+        self.synced = False  # 快照之后是否已经接上第一条增量
+        self.version = 0  # 每次变化加 1
+        self.event_time = 0
+        self.transaction_time = 0
+        self.emit_time = 0.0  # 最近一次输出的时间
+
+    def load(self, last_update_id: int, bids: List, asks: List) -> NoReturn:
+        self.bids.clear()
+        self.asks.clear()
+        for price, amount in bids:
+            self.bids.update(float(price), float(amount))
+        for price, amount in asks:
+            self.asks.update(float(price), float(amount))
+        self.last_update_id = last_update_id
+        self.synced = False
+        self.version += 1
+
+    def apply(self, first_id: int, last_id: int, prev_id: Optional[int], bids: List, asks: List,
+              event_time: int = 0, transaction_time: int = 0) -> Optional[bool]:
+        """
+        应用一条增量，返回 True 已应用，None 是快照之前或者重复的旧数据，False 不连续需要重新同步
+        现货：丢弃 u <= lastUpdateId，第一条要满足 U <= lastUpdateId + 1 <= u，之后每条 U 等于上一条 u + 1
+        合约：丢弃 u < lastUpdateId，第一条要满足 U <= lastUpdateId <= u，之后每条 pu 等于上一条 u
+        """
+        last_update_id = self.last_update_id
+        if not self.synced:
+            if self.prev_id:
+                if last_id < last_update_id:
+                    return None
+                if first_id > last_update_id:
+                    return False
+            else:
+                if last_id <= last_update_id:
+                    return None
+                if first_id > last_update_id + 1:
+                    return False
+            self.synced = True
+        elif last_id <= last_update_id:
+            return None
+        elif (prev_id != last_update_id) if self.prev_id else (first_id != last_update_id + 1):
+            return False
+
+        update = self.bids.update
+        for price, amount in bids:
+            update(float(price), float(amount))
+        update = self.asks.update
+        for price, amount in asks:
+            update(float(price), float(amount))
+        self.last_update_id = last_id
+        self.event_time = event_time
+        self.transaction_time = transaction_time
+        self.version += 1
+        return True
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        return self.asks.best()
+
+    def fill(self, rhino_depth: Any, limit: int = None) -> Any:
+        """
+        把前 limit 档写到 RhinoDepth 的 buy_price1 / sell_price1 ... 字段，RhinoArrayDepth 整组写入数组
+        """
+        limit = self.limit if limit is None else limit
+        set_levels = getattr(rhino_depth, "set_levels", None)
+        if set_levels is not None:
+            set_levels(self.bids.top(limit), self.asks.top(limit))
+            return rhino_depth
+        buy_prices, buy_amounts, sell_prices, sell_amounts = get_level_names(limit)
+        for i, (price, amount) in enumerate(self.bids.top(limit)):
+            setattr(rhino_depth, buy_prices[i], price)
+            setattr(rhino_depth, buy_amounts[i], amount)
+        for i, (price, amount) in enumerate(self.asks.top(limit)):
+            setattr(rhino_depth, sell_prices[i], price)
+            setattr(rhino_depth, sell_amounts[i], amount)
+        return rhino_depth
+
+
+class OrderBookManager(object):
+    """
+    管理多个币对的订单簿：同步期间缓存增量，请求快照后回放，不连续时重新同步，按 interval 限制输出频率
+    fetch(book) 返回 REST 快照 {"lastUpdateId": ..., "bids": [...], "asks": [...]}，emit(book) 输出订单簿
+    on_sync(book) 在每次同步完成后调用，同步期间缓存和回放的增量不会单独输出，
+    输出增量的调用方要在这里重新发送完整的订单簿
+    """
+
+    def __init__(self, gateway, fetch: Callable[[OrderBook], Awaitable[Dict]],
+                 emit: Callable[[OrderBook], Awaitable], prev_id: bool,
+                 on_sync: Callable[[OrderBook], Awaitable] = None):
+        self.gateway = gateway
+        self.fetch = fetch
+        self.emit = emit
+        self.on_sync = on_sync
+        self.prev_id = prev_id
+        self.books: Dict[str, OrderBook] = {}
+        self.buffers: Dict[str, deque] = {}  # 正在同步的币对缓存的增量
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.timers: Dict[str, asyncio.TimerHandle] = {}
+        self.resyncs: Dict[str, int] = {}
+
+    def add(self, symbol: str, stream: str, limit: int, interval: float) -> OrderBook:
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol, stream, limit, interval, self.prev_id)
+            self.resyncs[symbol] = 0
+        elif limit > 0:
+            # limit 为 0 的订单簿只校验连续性不输出，之后有输出需求时使用新的 interval
+            book.stream = stream
+            book.interval = interval if book.limit == 0 else min(book.interval, interval)
+            book.limit = max(book.limit, limit)
+        return book
+
+    def remove(self, symbol: str) -> NoReturn:
+        self.books.pop(symbol, None)
+        self.buffers.pop(symbol, None)
+        self.resyncs.pop(symbol, None)
+        task = self.tasks.pop(symbol, None)
+        if task is not None:
+            task.cancel()
+        timer = self.timers.pop(symbol, None)
+        if timer is not None:
+            timer.cancel()
+
+    def remove_streams(self, streams: List[str]) -> NoReturn:
+        for symbol, book in list(self.books.items()):
+            if book.stream in streams:
+                self.remove(symbol)
+
+    def close(self) -> NoReturn:
+        for symbol in list(self.books):
+            self.remove(symbol)
+
+    async def on_diff(self, symbol: str, first_id: int, last_id: int, prev_id: Optional[int], bids: List,
+                      asks: List, event_time: int = 0, transaction_time: int = 0) -> Optional[bool]:
+        """
+        返回值和 OrderBook.apply 相同，只有 True 表示这条增量已经直接应用到订单簿，
+        同步期间缓存的、重复的旧数据返回 None，不连续开始重新同步时返回 False
+        """
+        book = self.books.get(symbol)
+        if book is None:
+            return None
+        event = (first_id, last_id, prev_id, bids, asks, event_time, transaction_time)
+        buffer = self.buffers.get(symbol)
+        if buffer is not None:
+            buffer.append(event)
+            return None
+        if book.last_update_id == 0:
+            # 收到第一条增量时开始同步
+            self.begin_sync(symbol, event)
+            return None
+        result = book.apply(*event)
+        if result is False:
+            self.gateway.logger.warn(f"{self.gateway.exchange_sub} {symbol} 订单簿增量不连续 "
+                                     f"{book.last_update_id} -> {first_id}/{prev_id}，重新同步")
+            self.resyncs[symbol] += 1
+            self.begin_sync(symbol, event)
+        elif result:
+            await self.publish(book)
+        return result
+
+    def begin_sync(self, symbol: str, event: tuple) -> NoReturn:
+        """
+        之后的增量先缓存，请求快照后回放
+        """
+        buffer = self.buffers[symbol] = deque(maxlen=order_book_buffer_size)
+        buffer.append(event)
+        task = self.tasks.get(symbol)
+        if task is None or task.done():
+            self.tasks[symbol] = asyncio.get_event_loop().create_task(self.sync(symbol))
+
+    async def sync(self, symbol: str) -> NoReturn:
+        while symbol in self.buffers:
+            book = self.books[symbol]
+            buffer = self.buffers[symbol]
+            try:
+                snapshot = await self.fetch(book)
+            except Exception as e:
+                self.gateway.logger.error(f"{self.gateway.exchange_sub} {symbol} 订单簿快照请求失败 {e}")
+                await asyncio.sleep(order_book_retry_delay)
+                continue
+            last_update_id = snapshot.get("lastUpdateId")
+            # 快照比缓存的第一条增量还早时重新请求
+            if len(buffer) > 0 and buffer[0][0] > last_update_id + (0 if self.prev_id else 1):
+                self.gateway.logger.info(f"{self.gateway.exchange_sub} {symbol} 订单簿快照 {last_update_id} "
+                                         f"早于增量 {buffer[0][0]}，重新请求")
+                await asyncio.sleep(order_book_retry_delay)
+                continue
+            book.load(last_update_id, snapshot.get("bids"), snapshot.get("asks"))
+            # 回放期间不会切换协程，新到的增量在回放之后直接应用
+            while len(buffer) > 0:
+                if book.apply(*buffer[0]) is False:
+                    break
+                buffer.popleft()
+            if len(buffer) > 0:
+                self.gateway.logger.warn(f"{self.gateway.exchange_sub} {symbol} 订单簿缓存的增量不连续，重新同步")
+                continue
+            self.buffers.pop(symbol, None)
+            self.gateway.logger.info(f"{self.gateway.exchange_sub} {symbol} 订单簿同步完成 {book.last_update_id} "
+                                     f"买 {len(book.bids)} 档 卖 {len(book.asks)} 档")
+            if self.on_sync is not None:
+                await self.notify_sync(book)
+            if book.synced:
+                await self.publish(book)
+        self.tasks.pop(symbol, None)
+
+    async def notify_sync(self, book: OrderBook) -> NoReturn:
+        try:
+            await self.on_sync(book)
+        except Exception as e:
+            self.gateway.logger.error(f"{self.gateway.exchange_sub} {book.symbol} 订单簿同步回调错误")
+            self.gateway.logger.error(traceback.format_exc())
+
+    async def publish(self, book: OrderBook) -> NoReturn:
+        now = time.time()
+        wait = book.emit_time + book.interval - now
+        if wait <= 0:
+            book.emit_time = now
+            await self.emit(book)
+        elif book.symbol not in self.timers:
+            self.timers[book.symbol] = asyncio.get_event_loop().call_later(wait, self.publish_later, book.symbol)
+
+    def publish_later(self, symbol: str) -> NoReturn:
+        self.timers.pop(symbol, None)
+        book = self.books.get(symbol)
+        if book is None or symbol in self.buffers:
+            return
+        book.emit_time = time.time()
+        asyncio.get_event_loop().create_task(self.emit_safe(book))
+
+    async def emit_safe(self, book: OrderBook) -> NoReturn:
+        try:
+            await self.emit(book)
+        except Exception as e:
+            self.gateway.logger.error(f"{self.gateway.exchange_sub} {book.symbol} 订单簿输出错误")
+            self.gateway.logger.error(traceback.format_exc())
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        status = {}
+        for symbol, book in self.books.items():
+            best_bid = book.best_bid()
+            best_ask = book.best_ask()
+            status[symbol] = {
+                "syncing": symbol in self.buffers,
+                "last_update_id": book.last_update_id,
+                "bids": len(book.bids),
+                "asks": len(book.asks),
+                "best_bid": best_bid[0] if best_bid is not None else None,
+                "best_ask": best_ask[0] if best_ask is not None else None,
+                "resyncs": self.resyncs.get(symbol, 0),
+            }
+        return status
@@ -0,0 +1,199 @@
+"""
+按交易所权重限频
+
+每个 RateLimit 是交易所的一个固定时间窗口（Binance 的 1 分钟权重、10 秒下单数等），
+每个接口在 RateRule 中配置消耗哪些窗口多少权重，请求发出前先拿到权重，额度不够时排队等待到下一个窗口
+排队的请求按优先级、同一优先级按先后顺序拿到额度，排在前面的请求拿到额度之前后面的请求不会插队，
+大批量拉取不会一直抢在下单前面；权重超过窗口可用额度的请求等到窗口清空后单独发出，不会一直等待
+返回的 X-MBX-USED-WEIGHT-1M 等响应头会同步到对应窗口，同一个 IP 下其他进程用掉的额度也能算进来
+"""
+import asyncio
+import heapq
+import itertools
+import time
+import urllib.parse
+from typing import NoReturn, Dict, List, Callable, Union, Tuple
+
+from RhinoObject.RhinoRequest.RhinoRequest import RhinoRequest
+
+from RhinoGateway.Base.RestFul.RestLane import Priority
+
+order_reserve = 0.2  # 权重窗口给下单/撤单保留的比例，普通请求最多只能用到 1 - order_reserve
+ban_status = (418, 429)  # 被限频/封禁的 http 状态码
+ban_retry_after = 60  # 被限频但没有 Retry-After 响应头时的等待时间，秒
+priority_order = {  # 排队时拿到额度的先后，数字小的先拿
+    Priority.CRITICAL: 0,
+    Priority.NORMAL: 1,
+    Priority.BULK: 2,
+}
+
+
+class RateLimit(object):
+    """
+    一个固定窗口的限频额度
+    """
+
+    def __init__(self, name: str, limit: int, interval: float, header: str = None,
+                 reserve: float = order_reserve):
+        self.name = name
+        self.limit = limit
+        self.interval = interval
+        self.header = header.lower() if header is not None else None  # 同步已用额度的响应头
+        self.reserve = reserve
+        self.window = 0
+        self.used = 0
+
+    def refresh(self, now: float) -> NoReturn:
+        window = int(now // self.interval)
+        if window != self.window:
+            self.window = window
+            self.used = 0
+
+    def capacity(self, is_order: bool) -> float:
+        if is_order:
+            return self.limit
+        return self.limit * (1 - self.reserve)
+
+    def reset_after(self, now: float) -> float:
+        return (self.window + 1) * self.interval - now
+
+
+class RateRule(object):
+    """
+    一个接口的权重
+    costs: 窗口名 -> 权重，权重可以是函数，参数是请求的 params，比如 depth 按 limit 计算权重
+    is_order: 下单/撤单请求，可以使用 RateLimit 保留的额度
+    """
+
+    def __init__(self, costs: Dict[str, Union[int, Callable[[Dict], int]]], is_order: bool = False):
+        self.costs = costs
+        self.is_order = is_order
+
+    def get_costs(self, params: Dict) -> Dict[str, int]:
+        params = params if params is not None else {}
+        return {name: cost(params) if callable(cost) else cost for name, cost in self.costs.items()}
+
+
+class RateLimiter(object):
+
+    def __init__(self, gateway, limits: List[RateLimit], rules: Dict[Tuple[str, str], RateRule],
+                 default_rule: RateRule = None):
+        self.gateway = gateway
+        self.limits = {limit.name: limit for limit in limits}
+        self.rules = rules
+        # 没有配置的接口默认消耗第一个窗口 1 个权重
+        self.default_rule = RateRule({limits[0].name: 1}) if default_rule is None else default_rule
+        self.banned_until = 0
+        self.waiters: List[Tuple[int, int, RateRule, Dict[str, int], asyncio.Future]] = []  # 排队的请求，堆
+        self.sequence = itertools.count()
+        self.timer: asyncio.TimerHandle = None
+
+    def get_rule(self, request: RhinoRequest) -> RateRule:
+        # mexc 签名后会把参数拼到 url 上，这里只取 path
+        path = urllib.parse.urlparse(request.url).path
+        return self.rules.get((request.method, path), self.default_rule)
+
+    def try_acquire(self, rule: RateRule, costs: Dict[str, int]) -> float:
+        """
+        额度足够时扣掉权重并返回 0，否则返回需要等待的秒数
+        """
+        now = time.time()
+        if self.banned_until > now:
+            return self.banned_until - now
+        wait = 0
+        for name, cost in costs.items():
+            limit = self.limits.get(name)
+            if limit is None or cost <= 0:
+                continue
+            limit.refresh(now)
+            capacity = limit.capacity(rule.is_order)
+            # 权重超过可用额度时等到窗口里没有用掉的额度再发，不然永远拿不到
+            if limit.used + min(cost, capacity) > capacity:
+                wait = max(wait, limit.reset_after(now))
+        if wait > 0:
+            return wait
+        for name, cost in costs.items():
+            limit = self.limits.get(name)
+            if limit is not None:
+                limit.used += cost
+        return 0
+
+    async def acquire(self, request: RhinoRequest, priority: Priority = Priority.NORMAL) -> NoReturn:
+        rule = self.get_rule(request)
+        costs = rule.get_costs(request.params)
+        # 有请求在排队时直接排到后面，不和排在前面的请求抢额度
+        if len(self.waiters) == 0 and self.try_acquire(rule, costs) == 0:
+            return
+        for name, cost in costs.items():
+            limit = self.limits.get(name)
+            if limit is not None and cost > limit.capacity(rule.is_order):
+                self.gateway.logger.warn(f"{self.gateway.exchange_sub} {request.url} 权重 {name} {cost} "
+                                         f"超过可用额度 {limit.capacity(rule.is_order)}，等窗口清空后发送")
+        future = asyncio.get_event_loop().create_future()
+        heapq.heappush(self.waiters, (priority_order[priority], next(self.sequence), rule, costs, future))
+        self.gateway.logger.info(f"{self.gateway.exchange_sub} {request.url} 权重不足 {self.status()}，"
+                                 f"排队 {len(self.waiters)} 个请求")
+        self.schedule(0)
+        await future
+
+    def schedule(self, delay: float) -> NoReturn:
+        if self.timer is not None:
+            self.timer.cancel()
+        self.timer = asyncio.get_event_loop().call_later(delay, self.drain)
+
+    def drain(self) -> NoReturn:
+        """
+        按顺序给排队的请求分配额度，队首拿不到时等到它可以拿到的时间再检查，后面的请求不插队
+        """
+        self.timer = None
+        waiters = self.waiters
+        while len(waiters) > 0:
+            _, _, rule, costs, future = waiters[0]
+            if future.done():
+                # 请求已经取消
+                heapq.heappop(waiters)
+                continue
+            wait = self.try_acquire(rule, costs)
+            if wait > 0:
+                self.schedule(wait)
+                return
+            heapq.heappop(waiters)
+            future.set_result(None)
+
+    def update(self, code: int, headers) -> NoReturn:
+        """
+        根据响应头同步已用额度，418/429 时暂停所有请求直到 Retry-After
+        """
+        now = time.time()
+        for limit in self.limits.values():
+            if limit.header is None:
+                continue
+            used = headers.get(limit.header)
+            if used is None:
+                continue
+            try:
+                used = int(used)
+            except ValueError:
+                continue
+            limit.refresh(now)
+            # 本地已经扣掉但还没有返回的请求不在响应头里，取两者中较大的
+            limit.used = max(limit.used, used)
+
+        if code in ban_status:
+            retry_after = headers.get("Retry-After")
+            try:
+                retry_after = float(retry_after) if retry_after is not None else ban_retry_after
+            except ValueError:
+                retry_after = ban_retry_after
+            self.banned_until = max(self.banned_until, now + retry_after)
+            self.gateway.logger.error(
+                f"{self.gateway.exchange_sub} 触发限频 {code}，暂停请求 {retry_after} 秒 {self.status()}")
+
+    def status(self) -> Dict[str, str]:
+        now = time.time()
+        status = {}
+        for name, limit in self.limits.items():
+            limit.refresh(now)
+            status[name] = f"{limit.used}/{limit.limit}"
+        status["queued"] = str(len(self.waiters))
+        return status
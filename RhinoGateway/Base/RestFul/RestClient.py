@@ -1,19 +1,232 @@
 import asyncio
-import json
+import copy
+import itertools
 import time
 import traceback
+import urllib.parse
 from abc import abstractmethod
-from typing import NoReturn
+from enum import Enum
+from typing import NoReturn, Dict, Tuple, Any, List, Set
 
 import aiohttp
 from RhinoObject.RhinoRequest.RhinoRequest import RhinoRequest
 from RhinoObject.RhinoRequest.RhunoRequestEnum import Method
 
+from RhinoGateway.Base.Metrics.Metrics import MetricsRegistry, registry
+from RhinoGateway.Base.RateLimit.RateLimiter import RateLimiter
+from RhinoGateway.Base.RestFul.RestHedge import HedgePolicy
+from RhinoGateway.Base.RestFul.RestLane import Priority, RestLane, lane_concurrency
+from RhinoGateway.Util.JsonCodec import JsonCodec, get_json_codec
+
+connector_limit_per_host = 0  # 单个 host 最大连接数，0 表示不限制
+keepalive_timeout = 60  # 空闲连接保活时间，秒
+dns_cache_ttl = 300  # DNS 缓存时间，秒
+warm_up_connections = 4  # 预热时保持的长连接数量
+warm_up_interval = 30  # 预热连接保活间隔，秒，需要小于 keepalive_timeout
+coalesce_requests = True  # 合并相同的公共 GET 请求
+coalesce_cache_ttl = 0  # 合并请求结果的缓存时间，秒，0 表示不缓存
+hedge_requests = False  # 对 hedge_paths 中的公共 GET 请求开启对冲
+rest_metric = "rhino_rest_seconds"  # 各阶段耗时直方图的指标名
+
+
+async def on_request_start(session, context, params) -> NoReturn:
+    if isinstance(context.trace_request_ctx, dict):
+        context.trace_request_ctx["request_start"] = time.perf_counter()
+
+
+async def on_connection_create_start(session, context, params) -> NoReturn:
+    if isinstance(context.trace_request_ctx, dict):
+        context.trace_request_ctx["connect_start"] = time.perf_counter()
+
+
+async def on_connection_create_end(session, context, params) -> NoReturn:
+    timing = context.trace_request_ctx
+    if isinstance(timing, dict) and "connect_start" in timing:
+        timing["connect"] = time.perf_counter() - timing["connect_start"]
+
+
+async def on_request_end(session, context, params) -> NoReturn:
+    # 收到响应头的时间
+    if isinstance(context.trace_request_ctx, dict):
+        context.trace_request_ctx["headers"] = time.perf_counter()
+
+
+def get_trace_config() -> aiohttp.TraceConfig:
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
+
+
+class ResponseState(Enum):
+    SUCCESS = "SUCCESS"
+    TIMEOUT = "TIMEOUT"
+    ERROR = "ERROR"
+
+
+class RestResponse(object):
+    """
+    一次 http 请求的结果，合并请求时在多个回调之间共享
+    """
+
+    def __init__(self, state: ResponseState, code: int = 0, data: Any = None, body: bytes = b"", host: str = "",
+                 start_time: float = 0):
+        self.state = state
+        self.code = code
+        self.data = data
+        self.body = body
+        self.host = host
+        self.start_time = start_time
+
 
 class RestClient(object):
+    warm_up_url = None  # 用于预热连接的轻量接口，比如 /api/v3/time
 
-    def __init__(self, gateway):
+    def __init__(self, gateway, lanes: Dict[Priority, int] = None, limit_per_host: int = connector_limit_per_host,
+                 keepalive: float = keepalive_timeout, ttl_dns_cache: int = dns_cache_ttl,
+                 codec: JsonCodec = None, coalesce: bool = coalesce_requests,
+                 cache_ttl: float = coalesce_cache_ttl, hedge: bool = hedge_requests,
+                 metrics: MetricsRegistry = None):
         self.gateway = gateway
+        self.codec = get_json_codec() if codec is None else codec
+        self.coalesce = coalesce
+        self.cache_ttl = cache_ttl
+        self.inflight: Dict[Tuple, asyncio.Future] = {}
+        self.cache: Dict[Tuple, Tuple[float, RestResponse]] = {}
+        self.hedge = hedge
+        self.hedge_paths: Set[str] = set()  # 允许对冲的接口 path，由各个 gateway 配置
+        self.hedge_apis: List[str] = []  # 对冲请求轮流使用的备用域名，为空时在同一个域名的另一条连接上发
+        self.hedge_api_cycle = None
+        self.hedges: Dict[str, HedgePolicy] = {}
+        self.limit_per_host = limit_per_host
+        self.keepalive = keepalive
+        self.ttl_dns_cache = ttl_dns_cache
+        lanes = lane_concurrency if lanes is None else lanes
+        self.lanes = {priority: RestLane(priority, concurrency) for priority, concurrency in lanes.items()}
+        self.lane_rules: Dict[Tuple[str, str], Priority] = {}  # (method, path) -> 优先级，由各个 gateway 配置
+        self.warm_up_tasks = {}
+        self.limiter: RateLimiter = None  # 交易所权重限频，由各个 gateway 配置
+        self.metrics = registry if metrics is None else metrics  # 设置为 None 时不统计耗时
+
+    async def get_session(self, priority: Priority = Priority.NORMAL) -> aiohttp.ClientSession:
+        """
+        懒加载长连接 session，同一个 gateway 同一条道的请求复用连接池，避免每次请求都重新 DNS/TCP/TLS 握手
+        proxy 是按请求传入的，aiohttp 的连接池本身会按 host/proxy 区分连接
+        """
+        lane = self.lanes[priority]
+        if lane.session is None or lane.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=lane.concurrency,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive,
+                ttl_dns_cache=self.ttl_dns_cache,
+                use_dns_cache=True,
+            )
+            lane.session = aiohttp.ClientSession(connector=connector, json_serialize=self.codec.dumps,
+                                                 trace_configs=[get_trace_config()])
+        return lane.session
+
+    def get_priority(self, request: RhinoRequest) -> Priority:
+        """
+        请求上设置了 priority 时优先使用，否则按 gateway 配置的 lane_rules，都没有时非 GET 请求走 CRITICAL
+        """
+        priority = getattr(request, "priority", None)
+        if priority is not None:
+            return Priority(priority)
+        path = urllib.parse.urlparse(request.url).path
+        priority = self.lane_rules.get((request.method, path), None)
+        if priority is not None:
+            return priority
+        return Priority.NORMAL if request.method == Method.GET.value else Priority.CRITICAL
+
+    def lane_status(self) -> Dict[str, Dict[str, float]]:
+        """
+        每条道的排队数、在途数、请求数和等待并发额度的耗时
+        """
+        return {priority.value: lane.status() for priority, lane in self.lanes.items()}
+
+    async def warm_up(self, url: str = None, connections: int = warm_up_connections,
+                      interval: float = warm_up_interval, proxy: str = None,
+                      priority: Priority = Priority.CRITICAL) -> NoReturn:
+        """
+        启动时预先解析 DNS 并建立 connections 条长连接，之后每 interval 秒请求一次轻量接口，
+        保持连接不被交易所回收，被回收的连接会在下一轮请求时重新补齐
+        interval <= 0 时只预热一次，不在后台保活，默认预热下单使用的 CRITICAL 连接池
+        """
+        url = self.warm_up_url if url is None else url
+        if url is None:
+            self.gateway.logger.info(f"{self.gateway.exchange_sub} 没有配置预热接口")
+            return
+        parse = urllib.parse.urlparse(url)
+        host = parse.hostname
+        port = parse.port or (443 if parse.scheme == "https" else 80)
+        try:
+            await asyncio.get_event_loop().getaddrinfo(host, port)
+        except Exception as e:
+            self.gateway.logger.error(f"{self.gateway.exchange_sub} {host} DNS 解析失败")
+            self.gateway.logger.error(traceback.format_exc())
+            return
+        await self.fill_connections(url, connections, proxy, priority)
+        self.gateway.logger.info(
+            f"{self.gateway.exchange_sub} {host} {priority.value} 预热完成 连接数 "
+            f"{self.warm_connections(priority).get(host, 0)}")
+
+        task = self.warm_up_tasks.get((host, priority))
+        if interval > 0 and (task is None or task.done()):
+            self.warm_up_tasks[(host, priority)] = asyncio.get_event_loop().create_task(
+                self.keep_warm(url, host, connections, interval, proxy, priority))
+
+    async def fill_connections(self, url: str, connections: int, proxy: str = None,
+                               priority: Priority = Priority.CRITICAL) -> NoReturn:
+        # 并发请求会占用不同的连接，空闲连接被复用，缺少的连接会新建
+        await asyncio.gather(*[self.ping(url, proxy, priority) for _ in range(connections)])
+
+    async def keep_warm(self, url: str, host: str, connections: int, interval: float,
+                        proxy: str = None, priority: Priority = Priority.CRITICAL) -> NoReturn:
+        while True:
+            await asyncio.sleep(interval)
+            warm = self.warm_connections(priority).get(host, 0)
+            if warm < connections:
+                self.gateway.logger.info(
+                    f"{self.gateway.exchange_sub} {host} {priority.value} 预热连接 {warm}/{connections}，开始补齐")
+            await self.fill_connections(url, connections, proxy, priority)
+
+    async def ping(self, url: str, proxy: str = None, priority: Priority = Priority.CRITICAL) -> bool:
+        try:
+            client = await self.get_session(priority)
+            async with client.get(url, proxy=proxy, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+                await resp.read()
+                return resp.status == 200
+        except Exception as e:
+            self.gateway.logger.error(f"{self.gateway.exchange_sub} {url} 预热请求失败 {e}")
+            return False
+
+    def warm_connections(self, priority: Priority = None) -> Dict[str, int]:
+        """
+        每个 host 当前连接池中空闲可复用的连接数，priority 为空时统计所有道
+        """
+        warm = {}
+        for lane in self.lanes.values():
+            if priority is not None and lane.priority != priority:
+                continue
+            if lane.session is None or lane.session.closed:
+                continue
+            # aiohttp 没有公开连接池的统计接口，只能读取 connector 内部的空闲连接表
+            conns = getattr(lane.session.connector, "_conns", {})
+            for key, protocols in conns.items():
+                warm[key.host] = warm.get(key.host, 0) + len(protocols)
+        return warm
+
+    async def close(self) -> NoReturn:
+        for task in self.warm_up_tasks.values():
+            task.cancel()
+        self.warm_up_tasks = {}
+        for lane in self.lanes.values():
+            if lane.session is not None and not lane.session.closed:
+                await lane.session.close()
+            lane.session = None
 
     @abstractmethod
     async def sign(self, request: RhinoRequest) -> NoReturn:
@@ -24,107 +237,290 @@ class RestClient(object):
         if request.is_sign:
             request = await self.sign(request)
 
+        if not request.is_sign and request.method == Method.GET.value:
+            if self.coalesce:
+                rest_response = await self.fetch_shared(request)
+            else:
+                rest_response = await self.request_public(request)
+        else:
+            rest_response = await self.request(request)
+        await self.dispatch(request, rest_response)
+
+    def get_coalesce_key(self, request: RhinoRequest) -> Tuple:
+        params = request.params
+        # 空的 params 字典不能做 key，和没有 params 一样处理
+        params = tuple(sorted((str(key), str(value)) for key, value in params.items())) if params else None
+        return request.method, request.url, params, request.proxy
+
+    async def fetch_shared(self, request: RhinoRequest) -> "RestResponse":
+        """
+        相同 url / params / proxy 的公共 GET 请求合并成一次 http 请求，解析后的结果分发给每一个请求各自的回调
+        回调拿到的是同一个 data 对象，回调中不要修改 data
+        """
+        key = self.get_coalesce_key(request)
+        if self.cache_ttl > 0:
+            cache = self.cache.get(key, None)
+            if cache is not None and cache[0] > time.time():
+                return cache[1]
+
+        future = self.inflight.get(key, None)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # 发起请求的协程被取消了，自己重新请求
+                return await self.request_public(request)
+
+        future = asyncio.get_event_loop().create_future()
+        self.inflight[key] = future
+        try:
+            rest_response = await self.request_public(request)
+            future.set_result(rest_response)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            # 等待中的请求拿到同一个异常，不会一直阻塞
+            future.set_exception(e)
+            # 没有等待者时不打印 Future exception was never retrieved
+            future.exception()
+            raise
+        finally:
+            self.inflight.pop(key, None)
+
+        if self.cache_ttl > 0 and rest_response.state == ResponseState.SUCCESS and rest_response.code == 200:
+            if len(self.cache) > 1024:
+                now = time.time()
+                self.cache = {k: v for k, v in self.cache.items() if v[0] > now}
+            self.cache[key] = (time.time() + self.cache_ttl, rest_response)
+        return rest_response
+
+    async def request_public(self, request: RhinoRequest) -> "RestResponse":
+        """
+        公共 GET 请求，开启对冲并且 path 在 hedge_paths 中时走对冲
+        """
+        if self.hedge:
+            path = urllib.parse.urlparse(request.url).path
+            if path in self.hedge_paths:
+                return await self.request_hedged(request, path)
+        return await self.request(request)
+
+    def get_hedge_request(self, request: RhinoRequest) -> RhinoRequest:
+        hedge_request = copy.copy(request)
+        if self.hedge_apis:
+            if self.hedge_api_cycle is None:
+                self.hedge_api_cycle = itertools.cycle(self.hedge_apis)
+            parse = urllib.parse.urlparse(request.url)
+            hedge_request.url = next(self.hedge_api_cycle) + request.url[len(f"{parse.scheme}://{parse.netloc}"):]
+        return hedge_request
+
+    async def request_hedged(self, request: RhinoRequest, path: str) -> "RestResponse":
+        """
+        超过最近耗时的分位数还没有返回时再发一个相同的请求，取先成功返回的结果，取消其他请求
+        """
+        hedge = self.hedges.get(path)
+        if hedge is None:
+            hedge = self.hedges[path] = HedgePolicy()
+        start_time = time.time()
+        delay = hedge.delay()
+        primary = asyncio.ensure_future(self.request(request))
+        tasks = {primary}
+        rest_response = None
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and hedge.try_hedge():
+                    tasks.add(asyncio.ensure_future(self.request(self.get_hedge_request(request))))
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    rest_response = task.result()
+                    if rest_response.state == ResponseState.SUCCESS:
+                        if task is not primary:
+                            hedge.hedge_wins += 1
+                        hedge.record(time.time() - start_time)
+                        return rest_response
+            return rest_response
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def hedge_status(self) -> Dict[str, Dict[str, float]]:
+        return {path: hedge.status() for path, hedge in self.hedges.items()}
+
+    async def request(self, request: RhinoRequest) -> "RestResponse":
+        """
+        按优先级进入对应的道，发送 http 请求并解析返回数据，不调用回调
+        """
+        enter_time = time.perf_counter()
+        priority = self.get_priority(request)
+        lane = self.lanes[priority]
+        await lane.acquire()
+        try:
+            return await self.send(request, priority, enter_time)
+        finally:
+            lane.release()
+
+    def observe(self, phase: str, value: float, url: str) -> NoReturn:
+        if self.metrics is not None:
+            self.metrics.observe(rest_metric, value, gateway=self.gateway.exchange_sub,
+                                 endpoint=urllib.parse.urlparse(url).path, phase=phase)
+
+    def latency_status(self) -> List[Dict]:
+        """
+        当前 gateway 每个接口各阶段的耗时统计，单位秒
+        queue: 等待优先级道和限频额度，connect: 新建连接，ttfb: 发出请求到收到响应头（不含新建连接），
+        read: 读取 body，decode: json 解析，callback: 回调
+        """
+        if self.metrics is None:
+            return []
+        return [s for s in self.metrics.snapshot(rest_metric) if s["labels"].get("gateway") == str(
+            self.gateway.exchange_sub)]
+
+    async def send(self, request: RhinoRequest, priority: Priority, enter_time: float) -> "RestResponse":
         url = request.url
         params = request.params
         data = request.data
         method = request.method
         headers = request.headers
-        success_call = request.callback
-        fail_call = request.on_failed
-        error_call = request.on_error
-        transfer_call = request.on_transfer
-        timeout_call = request.on_timeout
-        extra = request.extra
-        transfer_call_extra_data = request.on_transfer_extra_data
         proxy = request.proxy
         special_sign = request.special_sign
         # timeout = request.timeout
         timeout = aiohttp.ClientTimeout(total=request.timeout)
 
+        if self.limiter is not None:
+            await self.limiter.acquire(request, priority)
+
         response = None
-        text = ""
+        body = b""
+        code = 0
         start_time = time.time()
+        self.observe("queue", time.perf_counter() - enter_time, url)
+        timing = {}  # TraceConfig 回调记录的时间点
 
         try:
 
             # self.gateway.logger.info(f"URL 是 {url} {params} {data}")
 
-            async with aiohttp.ClientSession() as client:
-                if method == Method.GET.value:
-                    # async with client.get(url, params=params, headers=headers, timeout=timeout,
-                    #                       proxy=proxy) as resp:
-                    """
-                    mexc get 如果带 params 参数，就会导致失败
-                    """
-                    async with client.get(url, headers=headers, timeout=timeout,
-                                          proxy=proxy) as resp:
+            client = await self.get_session(priority)
+            if method == Method.GET.value:
+                # async with client.get(url, params=params, headers=headers, timeout=timeout,
+                #                       proxy=proxy) as resp:
+                """
+                mexc get 如果带 params 参数，就会导致失败
+                """
+                async with client.get(url, headers=headers, timeout=timeout,
+                                      proxy=proxy, trace_request_ctx=timing) as resp:
+                    response = resp
+                    code = resp.status
+                    body = await resp.read()
+
+            elif method == Method.POST.value:
+                if special_sign == "data":
+                    async with client.post(url, data=data, headers=headers, timeout=timeout,
+                                           proxy=proxy, trace_request_ctx=timing) as resp:
                         response = resp
                         code = resp.status
-                        text = await resp.text()
-
-                elif method == Method.POST.value:
-                    if special_sign == "data":
-                        async with client.post(url, data=data, headers=headers, timeout=timeout,
-                                               proxy=proxy) as resp:
-                            response = resp
-                            code = resp.status
-                            text = await resp.text()
-
-                    elif special_sign == "json":
-                        async with client.post(url, json=data, headers=headers, timeout=timeout,
-                                               proxy=proxy) as resp:
-                            response = resp
-                            code = resp.status
-                            text = await resp.text()
-
-                elif method == Method.DELETE.value:
-
-                    async with client.delete(url, params=params, headers=headers, timeout=timeout,
-                                             proxy=proxy) as resp:
+                        body = await resp.read()
+
+                elif special_sign == "json":
+                    async with client.post(url, json=data, headers=headers, timeout=timeout,
+                                           proxy=proxy, trace_request_ctx=timing) as resp:
                         response = resp
                         code = resp.status
-                        text = await resp.text()
+                        body = await resp.read()
 
-                else:
-                    await error_call(request, None, 0, extra, transfer_call_extra_data)
+            elif method == Method.DELETE.value:
+
+                async with client.delete(url, params=params, headers=headers, timeout=timeout,
+                                         proxy=proxy, trace_request_ctx=timing) as resp:
+                    response = resp
+                    code = resp.status
+                    body = await resp.read()
         except asyncio.TimeoutError as time_error:
             # self.gateway.logger.error(f"{self.gateway.exchange_sub} {url} {params} {data} 获取数据超时")
             # self.gateway.logger.error(f"{traceback.format_exc()}")
-            if timeout_call is not None:
-                await timeout_call(request, None, 0, extra, transfer_call_extra_data)
-            return
+            return RestResponse(ResponseState.TIMEOUT, start_time=start_time)
         except Exception as e:
             self.gateway.logger.error(f"{self.gateway.exchange_sub} {url} {params} {data} 获取数据错误")
             self.gateway.logger.error(f"{traceback.format_exc()}")
-            await error_call(request, None, 0, extra, transfer_call_extra_data)
-            return
+            return RestResponse(ResponseState.ERROR, start_time=start_time)
 
         if response is None:
             self.gateway.logger.error(f"{self.gateway.exchange_sub} {url} {params} {data} 获取数据错误 数据为空")
-            await error_call(request, None, 0, extra, transfer_call_extra_data)
-            return
+            return RestResponse(ResponseState.ERROR, start_time=start_time)
+
+        read_end = time.perf_counter()
+        if "connect" in timing:
+            self.observe("connect", timing["connect"], url)
+        if "headers" in timing and "request_start" in timing:
+            self.observe("ttfb", timing["headers"] - timing["request_start"] - timing.get("connect", 0), url)
+            self.observe("read", read_end - timing["headers"], url)
+
+        if self.limiter is not None:
+            self.limiter.update(code, response.headers)
 
         text_time = 0
         get_time = time.time()
 
         try:
             text_time = time.time()
-            response_data = json.loads(text)
+            # 直接从 bytes 解析，不再经过 resp.text() 转成 str
+            response_data = self.codec.loads(body)
+            self.observe("decode", time.perf_counter() - read_end, url)
+        except Exception as e:
+            self.gateway.logger.error(
+                f"{self.gateway.exchange_sub} {url} {params} {data} 获取数据错误 start_time: {start_time} get_time:{get_time} text_time:{text_time}")
+            self.gateway.logger.error(f"{traceback.format_exc()}")
+            return RestResponse(ResponseState.ERROR, code=code, body=body, start_time=start_time)
+
+        return RestResponse(ResponseState.SUCCESS, code=code, data=response_data, body=body,
+                            host=response.real_url.host, start_time=start_time)
+
+    async def dispatch(self, request: RhinoRequest, rest_response: "RestResponse") -> NoReturn:
+        url = request.url
+        params = request.params
+        data = request.data
+        success_call = request.callback
+        fail_call = request.on_failed
+        error_call = request.on_error
+        transfer_call = request.on_transfer
+        timeout_call = request.on_timeout
+        extra = request.extra
+        transfer_call_extra_data = request.on_transfer_extra_data
+
+        if rest_response.state == ResponseState.TIMEOUT:
+            if timeout_call is not None:
+                await timeout_call(request, None, 0, extra, transfer_call_extra_data)
+            return
+        if rest_response.state == ResponseState.ERROR:
+            await error_call(request, None, 0, extra, transfer_call_extra_data)
+            return
+
+        code = rest_response.code
+        response_data = rest_response.data
+        try:
             if code == 200:
                 # self.gateway.logger.debug(f"{self.gateway.exchange_sub} {url} {params} {data} 获取数据成功")
+                callback_time = time.perf_counter()
                 await success_call(request, response_data, code, extra, transfer_call, transfer_call_extra_data)
+                self.observe("callback", time.perf_counter() - callback_time, url)
             else:
-                if "binance" in response.real_url.host and response_data.get("code") == -2011:
+                if "binance" in rest_response.host and isinstance(response_data, dict) and \
+                        response_data.get("code") == -2011:
                     """
                     binance spot: cancel_orders 某一个交易对取消全部订单的时候，如果没有订单会返回 2011 代码
                     """
                     self.gateway.logger.debug(f"{self.gateway.exchange_sub} {url} {params} {data} -2011 code")
                 else:
                     self.gateway.logger.error(f"{self.gateway.exchange_sub} {url} {params} {data} 获取数据失败")
-                    self.gateway.logger.error(f"{code} {text}")
+                    self.gateway.logger.error(f"{code} {rest_response.body.decode(errors='replace')}")
                 await fail_call(request, response_data, code, extra, transfer_call_extra_data)
         except Exception as e:
             self.gateway.logger.error(
-                f"{self.gateway.exchange_sub} {url} {params} {data} 获取数据错误 start_time: {start_time} get_time:{get_time} text_time:{text_time}")
+                f"{self.gateway.exchange_sub} {url} {params} {data} 获取数据错误 start_time: {rest_response.start_time}")
             self.gateway.logger.error(f"{traceback.format_exc()}")
             await error_call(request, None, 0, extra, transfer_call_extra_data)
+
@@ -0,0 +1,58 @@
+"""
+对冲请求
+
+同一个接口最近的耗时超过分位数还没有返回时，再发一个相同的请求，取先返回的结果
+每个主请求积累 budget 个令牌，每次对冲消耗 1 个，对冲请求最多占 budget 比例，不会把权重翻倍
+"""
+from collections import deque
+from typing import Dict, Optional
+
+hedge_percentile = 0.95  # 超过最近耗时的这个分位数还没返回时发对冲请求
+hedge_budget = 0.1  # 对冲请求占主请求的最大比例
+hedge_min_samples = 20  # 耗时样本少于这个数量时不对冲
+hedge_samples = 200  # 保留最近多少个耗时样本
+hedge_min_delay = 0.005  # 对冲等待的最小时间，秒
+
+
+class HedgePolicy(object):
+
+    def __init__(self, percentile: float = hedge_percentile, budget: float = hedge_budget,
+                 min_samples: int = hedge_min_samples, samples: int = hedge_samples):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.latencies = deque(maxlen=samples)
+        self.tokens = 0.0
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def delay(self) -> Optional[float]:
+        """
+        发对冲请求前等待的秒数，样本不够时返回 None 表示不对冲
+        """
+        self.requests += 1
+        self.tokens = min(self.tokens + self.budget, 1 + self.budget * self.min_samples)
+        if len(self.latencies) < self.min_samples:
+            return None
+        latencies = sorted(self.latencies)
+        index = min(int(len(latencies) * self.percentile), len(latencies) - 1)
+        return max(latencies[index], hedge_min_delay)
+
+    def try_hedge(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        self.hedged += 1
+        return True
+
+    def record(self, latency: float) -> None:
+        self.latencies.append(latency)
+
+    def status(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "samples": len(self.latencies),
+        }
@@ -0,0 +1,65 @@
+"""
+REST 请求按优先级分道
+
+CRITICAL: 下单/撤单，NORMAL: 账户/持仓/深度，BULK: k 线/历史成交这类大批量拉取
+每条道有自己的并发上限和独立的连接池，大批量拉取占满连接时不会阻塞下单
+"""
+import asyncio
+import time
+from enum import Enum
+from typing import NoReturn, Dict
+
+import aiohttp
+
+
+class Priority(Enum):
+    CRITICAL = "CRITICAL"
+    NORMAL = "NORMAL"
+    BULK = "BULK"
+
+
+lane_concurrency = {  # 每条道同时在途的请求数
+    Priority.CRITICAL: 20,
+    Priority.NORMAL: 50,
+    Priority.BULK: 10,
+}
+
+
+class RestLane(object):
+
+    def __init__(self, priority: Priority, concurrency: int):
+        self.priority = priority
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.session: aiohttp.ClientSession = None
+        self.queued = 0  # 等待并发额度的请求数
+        self.running = 0
+        self.count = 0
+        self.wait_total = 0
+        self.wait_max = 0
+
+    async def acquire(self) -> NoReturn:
+        start_time = time.time()
+        self.queued += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.queued -= 1
+        wait = time.time() - start_time
+        self.running += 1
+        self.count += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+
+    def release(self) -> NoReturn:
+        self.running -= 1
+        self.semaphore.release()
+
+    def status(self) -> Dict[str, float]:
+        return {
+            "queued": self.queued,
+            "running": self.running,
+            "count": self.count,
+            "wait_avg_ms": self.wait_total / self.count * 1000 if self.count > 0 else 0,
+            "wait_max_ms": self.wait_max * 1000,
+        }
@@ -1,20 +1,43 @@
 import asyncio
-import json
+import random
 import time
 import traceback
-from typing import NoReturn, Dict, List, Union
+from typing import NoReturn, Dict, List, Union, Any, Optional, Tuple, Callable
 
 import aiohttp
 from RhinoObject.Rhino.RhinoEnum import RhinoDataType
-from RhinoObject.Rhino.RhinoObject import SymbolInfos, WebsocketData, CallableMethods
+from RhinoObject.Rhino.RhinoObject import SymbolInfos, SymbolInfo, WebsocketData, CallableMethods
 
-from RhinoGateway.Base.BaseGateway.BaseGateway import BaseGateway
+from RhinoGateway.Base.BaseGateway.BaseGateway import BaseGateway, GatewayCallError
+from RhinoGateway.Base.Metrics.Metrics import MetricsRegistry, registry
+from RhinoGateway.Base.WebSocket.WebsocketDispatch import WebsocketDispatcher, DispatchPolicy
+from RhinoGateway.Base.WebSocket.WebsocketHeart import HeartTable
+from RhinoGateway.Base.WebSocket.WebsocketLatency import WebsocketLatency
+from RhinoGateway.Base.WebSocket.WebsocketMerge import FeedMerger
+from RhinoGateway.Base.WebSocket.WebsocketRouter import StreamRouter
+from RhinoGateway.Base.WebSocket.WebsocketWatchdog import WebsocketWatchdog
+from RhinoGateway.Util.JsonCodec import JsonCodec, get_json_codec
+
+reconnect_base_delay = 0.5  # 重连退避的初始时间，秒
+reconnect_max_delay = 30  # 重连退避的最大时间，秒
+dispatch_queues = True  # 接收和处理解耦，按 stream 放进队列由单独的协程处理
+subscribe_chunk = 100  # 每个订阅消息包含的 stream 数量
+subscribe_frame_rate = 5  # 每条连接每秒最多发送的订阅消息数
+subscribe_ack_timeout = 5  # 等待订阅回报的时间，秒
+keepalive_interval = 60  # 定时发送保活消息的间隔，秒
+poll_timeout = 5  # 静默 stream 改用 REST 轮询时单次请求的超时时间，秒
 
 
 class WebsocketClient:
+    subscribe_method = "SUBSCRIBE"
+    unsubscribe_method = "UNSUBSCRIBE"
+    keepalive_message = None  # 交易所需要文本 ping 时设置，None 时发送 websocket pong 帧
 
-    def __init__(self, gateway: BaseGateway) -> NoReturn:
+    def __init__(self, gateway: BaseGateway, codec: JsonCodec = None, dispatch: bool = dispatch_queues,
+                 metrics: MetricsRegistry = None) -> NoReturn:
         self._ws = None
+        self._session = None
+        self.codec = get_json_codec() if codec is None else codec
         self.rhino_websocket = None
         self.subscribe_data = None  # 订阅信息
         self.unsubscribe_data = None  # 取消订阅
@@ -23,26 +46,217 @@ class WebsocketClient:
         self.on_heart = None
         self.websocket_time = time.time()  # websocket pong 时间
         self.gateway = gateway
+        self.shards = None  # 使用 WebsocketShardManager 多连接订阅时，连接都在 shards 中
+        self.running = False  # connect 中的重连循环是否在运行
+        self.reconnect_count = 0
+        self.downtime = 0  # 累计断开时间，秒
+        self.disconnect_time = None  # 本次断开的时间
+        self.connected_time = None  # 最近一次连接成功的时间
+        self.dispatch = dispatch
+        self.dispatcher: WebsocketDispatcher = None
+        self.router = StreamRouter(gateway)  # 订阅时生成的 stream -> 处理函数路由表
+        self.streams: Dict[str, None] = {}  # 当前订阅的 stream，按订阅顺序
+        self.chunk = subscribe_chunk
+        self.frame_rate = subscribe_frame_rate
+        self.frame_id = 0
+        self.acks: Dict[int, asyncio.Future] = {}  # 订阅消息 id -> 等待回报的 future
+        self.keepalive_interval = keepalive_interval
+        self.last_times: Dict[str, float] = {}  # stream -> 最后收到数据的时间
+        self.stream_infos: Dict[str, SymbolInfo] = {}  # stream -> 订阅它的 SymbolInfo，REST 轮询时使用
+        self.watchdog: WebsocketWatchdog = None
+        self.heart = HeartTable(self)  # 处理函数用 heart.beat(key) 记录心跳，定时批量推给 on_heart
+        self.feed = 0  # 连接所属的 feed，0 是主连接
+        self.feeds = None  # 使用 WebsocketFeedManager 冗余行情时，冗余连接都在 feeds 中
+        self.merger = FeedMerger(self)  # 冗余行情按序号去重
+        self.books = None  # 使用 OrderBookManager 由增量深度维护本地订单簿时，订单簿都在 books 中
+        # 每个 stream 的延迟直方图，订阅前设置为 None 时不统计
+        self.latency = WebsocketLatency(self, registry if metrics is None else metrics)
 
     def subscribe(self, symbol_infos: SymbolInfos, callable_methods: CallableMethods = None):
         self.on_transfers = callable_methods.on_transfers
         self.on_transfer = self.gateway.set_data if callable_methods.on_transfer is None else callable_methods.on_transfer
 
+    def add_route(self, stream: str, handler, symbol: str, data_type: RhinoDataType, heart_key: str,
+                  policy: DispatchPolicy, depth_limit: int = None):
+        """
+        订阅时注册 stream 的路由，on_transfers 中的回调在这里取好
+        """
+        transfer = self.on_transfers.get(self.gateway.exchange_sub + data_type.value)
+        return self.router.add(stream, handler, symbol, transfer, heart_key, policy, depth_limit)
+
+    def get_streams(self, symbol_infos: List[SymbolInfo]) -> List[str]:
+        """
+        生成 symbol_infos 对应的 stream 名字并注册路由，子类实现
+        """
+        return []
+
+    async def add_streams(self, symbol_infos: SymbolInfos) -> bool:
+        """
+        不断开连接增量订阅，只发送新增 stream 的订阅消息并等待回报
+        """
+        symbol_infos: List[SymbolInfo] = symbol_infos.symbols.get(self.gateway.exchange_sub, [])
+        streams = [stream for stream in dict.fromkeys(self.get_streams(symbol_infos)) if stream not in self.streams]
+        if len(streams) == 0:
+            return True
+        self.streams.update(dict.fromkeys(streams))
+        self.gateway.logger.info(f"{self.gateway.exchange_sub} 新增订阅 {streams}")
+        if self.shards is not None:
+            return await self.shards.add_streams(streams)
+        if self._ws is None or self._ws.closed:
+            # 连接成功后 on_connected 会订阅全部 stream
+            return True
+        return await self.send_streams(self.subscribe_method, streams, wait_ack=True)
+
+    async def remove_streams(self, symbol_infos: SymbolInfos) -> bool:
+        """
+        不断开连接取消部分订阅，收到回报后再删除路由，已经在路上的数据仍然能正常处理
+        """
+        symbol_infos: List[SymbolInfo] = symbol_infos.symbols.get(self.gateway.exchange_sub, [])
+        streams = [stream for stream in dict.fromkeys(self.get_streams(symbol_infos)) if stream in self.streams]
+        if len(streams) == 0:
+            return True
+        for stream in streams:
+            self.streams.pop(stream)
+        self.gateway.logger.info(f"{self.gateway.exchange_sub} 取消订阅 {streams}")
+        if self.feeds is not None:
+            await self.feeds.remove(streams)
+        if self.shards is not None:
+            success = await self.shards.remove_streams(streams)
+        elif self._ws is None or self._ws.closed:
+            success = True
+        else:
+            success = await self.send_streams(self.unsubscribe_method, streams, wait_ack=True)
+        for stream in streams:
+            self.router.remove(stream)
+        if self.books is not None:
+            self.books.remove_streams(streams)
+        return success
+
+    async def add_feeds(self, symbol_infos: SymbolInfos, endpoints: List[Tuple[str, Optional[str]]]) -> bool:
+        """
+        已订阅的 stream 通过 endpoints (url, proxy) 再建立冗余连接，每条数据只处理最先到达的一份
+        """
+        if self.feeds is None:
+            self.gateway.logger.error(f"{self.gateway.exchange_sub} websocket 不支持冗余行情")
+            return False
+        symbol_infos: List[SymbolInfo] = symbol_infos.symbols.get(self.gateway.exchange_sub, [])
+        streams = []
+        for stream in dict.fromkeys(self.get_streams(symbol_infos)):
+            if stream in self.streams:
+                streams.append(stream)
+            else:
+                self.gateway.logger.error(f"{self.gateway.exchange_sub} {stream} 没有订阅，不能加入冗余行情")
+        if len(streams) == 0:
+            return False
+        return await self.feeds.add(streams, endpoints)
+
+    def event_seq(self, data: Any) -> Optional[Union[int, tuple]]:
+        """
+        冗余行情去重用的交易所序号，同一个 stream 中递增，返回 None 时不去重，子类实现
+        没有递增序号的推送返回 (推送时间, 内容) 元组，只去掉完全相同的推送
+        """
+        return None
+
+    def event_time(self, data: Any) -> Optional[int]:
+        """
+        交易所的事件时间，毫秒，用于统计交易所到收到消息的延迟，返回 None 时不统计，子类实现
+        """
+        return None
+
+    def latency_status(self) -> Dict[str, Any]:
+        """
+        时钟偏差和每个 stream 各阶段的延迟统计，单位秒
+        """
+        if self.latency is None:
+            return {}
+        return self.latency.status()
+
+    def order_book_status(self) -> Dict[str, Any]:
+        """
+        本地订单簿的同步状态、档位数、最优价和重新同步次数
+        """
+        if self.books is None:
+            return {}
+        return self.books.status()
+
+    def feed_status(self) -> Dict[str, Any]:
+        """
+        冗余连接的状态和每个 stream 各 feed 先到的次数
+        """
+        if self.feeds is None:
+            return {}
+        return self.feeds.status()
+
+    def stream_frames(self, method: str, streams: List[str]) -> List[Tuple[int, str]]:
+        """
+        按 chunk 分批生成订阅消息，返回 (id, 消息)
+        """
+        frames = []
+        for i in range(0, len(streams), self.chunk):
+            self.frame_id += 1
+            frames.append((self.frame_id, self.codec.dumps(
+                {"method": method, "params": streams[i:i + self.chunk], "id": self.frame_id})))
+        return frames
+
+    async def send_streams(self, method: str, streams: List[str], wait_ack: bool = False) -> bool:
+        """
+        分批发送订阅/取消订阅，两条消息之间按 frame_rate 间隔
+        wait_ack 时等待每条消息的回报，on_connected 中 receive 还没开始，不能等待
+        """
+        futures = []
+        for i, (frame_id, frame) in enumerate(self.stream_frames(method, streams)):
+            if i > 0:
+                await asyncio.sleep(1 / self.frame_rate)
+            if wait_ack:
+                self.acks[frame_id] = asyncio.get_event_loop().create_future()
+                futures.append(self.acks[frame_id])
+            if not await self.send(frame):
+                self.acks.pop(frame_id, None)
+                return False
+        if len(futures) == 0:
+            return True
+        done, pending = await asyncio.wait(futures, timeout=subscribe_ack_timeout)
+        if len(pending) > 0:
+            for frame_id, future in list(self.acks.items()):
+                if future in pending:
+                    self.acks.pop(frame_id)
+            self.gateway.logger.error(f"{self.gateway.exchange_sub} {method} {len(pending)} 条消息没有收到回报")
+            return False
+        return all(future.result() for future in done)
+
+    def ack_id(self, data: Any) -> Optional[Tuple[int, bool]]:
+        """
+        订阅回报返回 (id, 是否成功)，不是订阅回报时返回 None
+        默认是 binance 格式 {"result": null, "id": 1} / {"error": {...}, "id": 1}
+        """
+        if isinstance(data, dict) and "id" in data and ("result" in data or "error" in data):
+            return data.get("id"), "error" not in data
+        return None
+
+    def on_ack(self, frame_id: int, success: bool, data: Any) -> NoReturn:
+        future = self.acks.pop(frame_id, None)
+        if not success:
+            self.gateway.logger.error(f"{self.gateway.exchange_sub} websocket 订阅失败 {data}")
+        elif future is None:
+            # on_connected 中的订阅和 mexc 的 PING 回报
+            self.gateway.logger.debug(f"{self.gateway.exchange_sub} websocket 回报 {data}")
+        else:
+            self.gateway.logger.info(f"{self.gateway.exchange_sub} websocket 回报 {data}")
+        if future is not None and not future.done():
+            future.set_result(success)
+
     async def unsubscribe(self):
-        if self._ws is None:
-            session = aiohttp.ClientSession()
-            try:
-                self._ws = await session.ws_connect(self.rhino_websocket.url, proxy=self.rhino_websocket.proxy)
-            except aiohttp.ClientConnectorError:
-                self.gateway.logger.error(
-                    f"connect to Websocket server aiohttp.ClientConnectorError! url: {self.rhino_websocket.url}")
-                return
-            except Exception as e:
-                self.gateway.logger.error(f"connect to Websocket server error! url: {self.rhino_websocket.url}")
-                self.gateway.logger.error(traceback.format_exc())
-                return
+        if self.shards is not None:
+            await self.shards.unsubscribe()
+            return
+        if self._ws is None or self._ws.closed:
+            self.gateway.logger.info(f"{self.gateway.exchange_sub} websocket 没有连接，不需要取消订阅")
+            return
 
-        if self.unsubscribe_data is not None:
+        if len(self.streams) > 0:
+            self.gateway.logger.info(f"{self.gateway.exchange_sub} unsubscribe")
+            await self.send_streams(self.unsubscribe_method, list(self.streams))
+        elif self.unsubscribe_data is not None:
             self.gateway.logger.info(f"{self.gateway.exchange_sub} unsubscribe")
             await self.send(self.unsubscribe_data)
 
@@ -50,97 +264,330 @@ class WebsocketClient:
     def ws(self):
         return self._ws
 
+    async def get_session(self) -> aiohttp.ClientSession:
+        # 重连时复用同一个 session
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
     async def close(self):
+        """
+        停止重连并关闭连接
+        """
+        if self.watchdog is not None:
+            self.watchdog.stop()
+        self.heart.stop()
+        if self.latency is not None:
+            self.latency.stop()
+        if self.shards is not None:
+            await self.shards.close()
+        if self.feeds is not None:
+            await self.feeds.close()
+        if self.books is not None:
+            self.books.close()
+        self.running = False
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
         try:
-            if self._ws is None:
-                return
-            await self._ws.close()
+            if self._ws is not None:
+                await self._ws.close()
             self._ws = None
         except Exception as e:
             self.gateway.logger.error(traceback.format_exc())
-        await asyncio.sleep(5)
-        await self.unsubscribe()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     async def ping(self, message: Union[str, bytes] = b"") -> NoReturn:
         await self._ws.ping(message)
 
     async def pong(self, message: Union[str, bytes] = b"") -> NoReturn:
+        if self.shards is not None:
+            await self.shards.pong(message)
+            return
         self.gateway.logger.info(f"{self.gateway.exchange_sub} pong")
         await self._ws.pong(message)
 
-    async def connect(self) -> NoReturn:
+    async def keepalive(self) -> NoReturn:
+        """
+        定时发送的保活消息，交易所需要文本 ping 时设置 keepalive_message
+        """
+        if self.keepalive_message is not None:
+            await self.send(self.keepalive_message)
+            return
+        await self.pong(b"pong")
+
+    async def keepalive_loop(self) -> NoReturn:
+        """
+        每条连接一个定时任务，和有没有收到数据无关，安静的连接也会按时保活
+        """
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                await self.keepalive()
+                self.websocket_time = time.time()
+            except Exception as e:
+                self.gateway.logger.error(f"{self.gateway.exchange_sub} websocket 保活错误 {e}")
+
+    def start_monitors(self) -> NoReturn:
+        """
+        启动静默 stream 检查和心跳批量上报，多连接时只在 client 上启动一次
+        """
+        if self.watchdog is None:
+            self.watchdog = WebsocketWatchdog(self)
+        self.watchdog.start()
+        self.heart.start()
+        if self.latency is not None:
+            self.latency.start()
+
+    def stream_timeout(self, stream: str) -> Optional[float]:
+        """
+        stream 超过多少秒没有数据算静默，返回 None 时不检查，比如没有成交时不会推送的成交 stream
+        """
+        return None
+
+    def stream_connection(self, stream: str) -> Optional["WebsocketClient"]:
+        if self.shards is not None:
+            return self.shards.stream_shard.get(stream)
+        return self
+
+    def poll_method(self, stream: str) -> Optional[Tuple[Callable, RhinoDataType]]:
+        """
+        静默 stream 改用 REST 轮询时调用的 gateway 方法和数据类型，返回 None 时只重新订阅
+        """
+        return None
+
+    async def poll_stream(self, stream: str) -> bool:
+        poll_method = self.poll_method(stream)
+        symbol_info = self.stream_infos.get(stream)
+        if poll_method is None or symbol_info is None:
+            return False
+        method, data_type = poll_method
+        try:
+            data = await self.gateway.call(method, symbol_info, timeout=poll_timeout)
+        except GatewayCallError as e:
+            self.gateway.logger.error(f"{self.gateway.exchange_sub} {stream} REST 轮询失败 {e}")
+            return False
+        await self.on_transfers.get(self.gateway.exchange_sub + data_type.value)(data)
+        return True
+
+    def watchdog_status(self) -> Dict[str, Any]:
+        if self.watchdog is None:
+            return {}
+        return self.watchdog.status()
+
+    async def open(self) -> bool:
         self.gateway.logger.info(f"{self.rhino_websocket.url} 开始连接")
-        proxy = self.rhino_websocket.proxy
-        session = aiohttp.ClientSession()
         try:
-            if self._ws is None:
-                self._ws = await session.ws_connect(self.rhino_websocket.url, proxy=proxy)
+            session = await self.get_session()
+            self._ws = await session.ws_connect(self.rhino_websocket.url, proxy=self.rhino_websocket.proxy)
+            return True
         except aiohttp.ClientConnectorError:
             self.gateway.logger.error(
                 f"connect to Websocket server aiohttp.ClientConnectorError! url: {self.rhino_websocket.url}")
-            return
         except Exception as e:
             self.gateway.logger.error(f"connect to Websocket server error! url: {self.rhino_websocket.url}")
             self.gateway.logger.error(traceback.format_exc())
+        self._ws = None
+        return False
+
+    def get_backoff(self, attempt: int) -> float:
+        # full jitter: 在 0 到指数退避上限之间随机，避免多个连接同时重连
+        return random.uniform(0, min(reconnect_max_delay, reconnect_base_delay * 2 ** attempt))
+
+    async def connect(self) -> NoReturn:
+        """
+        管理连接的生命周期：连接、on_connected 重新订阅、接收，断开后按退避时间重连，直到 close
+        """
+        if self.running:
+            self.gateway.logger.info(f"{self.gateway.exchange_sub} websocket 已经在运行")
             return
-        if self.rhino_websocket.on_connected:
-            await self.rhino_websocket.on_connected()
-        loop = asyncio.get_event_loop()
-        coro_receive = loop.create_task(self.receive())
-        await coro_receive
+        self.running = True
+        self.start_monitors()
+        if self.dispatch and self.dispatcher is None:
+            self.dispatcher = WebsocketDispatcher(self.gateway, self.rhino_websocket.on_receive, latency=self.latency)
+        if self.dispatcher is not None:
+            self.dispatcher.start()
+        attempt = 0
+        while self.running:
+            if await self.open():
+                try:
+                    if self.rhino_websocket.on_connected:
+                        await self.rhino_websocket.on_connected()
+                except Exception as e:
+                    self.gateway.logger.error(f"{self.gateway.exchange_sub} websocket on_connected 错误")
+                    self.gateway.logger.error(traceback.format_exc())
+                    await self._ws.close()
+                else:
+                    attempt = 0
+                    self.connected_time = time.time()
+                    if self.disconnect_time is not None:
+                        self.downtime += self.connected_time - self.disconnect_time
+                        self.gateway.logger.info(
+                            f"{self.gateway.exchange_sub} websocket 重连成功，断开 "
+                            f"{self.connected_time - self.disconnect_time:.3f} 秒")
+                        self.disconnect_time = None
+                    keepalive_task = asyncio.get_event_loop().create_task(self.keepalive_loop())
+                    try:
+                        await self.receive()
+                    except Exception as e:
+                        self.gateway.logger.error(f"{self.gateway.exchange_sub} websocket 接收消息错误")
+                        self.gateway.logger.error(traceback.format_exc())
+                    finally:
+                        keepalive_task.cancel()
+                if self.disconnect_time is None:
+                    self.disconnect_time = time.time()
+            elif self.disconnect_time is None:
+                self.disconnect_time = time.time()
+
+            if not self.running:
+                break
+            attempt += 1
+            self.reconnect_count += 1
+            delay = self.get_backoff(attempt)
+            self.gateway.logger.info(f"{self.gateway.exchange_sub} websocket 第 {attempt} 次重连，等待 {delay:.3f} 秒")
+            await asyncio.sleep(delay)
+        self._ws = None
 
     async def on_connected(self):
         self.gateway.logger.info(f"{self.gateway.exchange_sub} 进入 on_connected")
-        self.gateway.logger.info(f"{self.gateway.exchange_sub} {self.subscribe_data}")
+        self.gateway.logger.info(f"{self.gateway.exchange_sub} {list(self.streams) or self.subscribe_data}")
         websocket_data = WebsocketData(
             key=RhinoDataType.WEBSOCKETSTART.value,
             data_type=RhinoDataType.WEBSOCKETSTART.value,
             exchange_sub=self.gateway.exchange_sub,
         )
         await self.on_transfer(websocket_data)
-        await self.send(self.subscribe_data)
+        if len(self.streams) > 0:
+            await self.send_streams(self.subscribe_method, list(self.streams))
+        else:
+            await self.send(self.subscribe_data)
 
     async def reconnect(self) -> NoReturn:
-        """Re-connect to Websocket server."""
+        """
+        断开当前连接，由 connect 中的循环重新连接并订阅
+        """
+        if self.shards is not None:
+            await self.shards.reconnect()
+            return
         self.gateway.logger.info("reconnecting to Websocket server right now!")
-        # 取消订阅
-        await self.close()
-        await self.connect()
+        if not self.running:
+            await self.connect()
+            return
+        if self._ws is not None:
+            await self._ws.close()
+
+    def connection_status(self) -> Dict[str, Any]:
+        """
+        重连次数和累计断开时间，用于统计行情缺口
+        """
+        if self.shards is not None:
+            return {"shards": self.shards.status()}
+        now = time.time()
+        return {
+            "connected": self._ws is not None and not self._ws.closed,
+            "reconnect_count": self.reconnect_count,
+            "downtime": self.downtime + (now - self.disconnect_time if self.disconnect_time is not None else 0),
+            "connected_time": self.connected_time,
+        }
+
+    def dispatch_status(self) -> Dict[str, Any]:
+        """
+        每个 stream 队列的长度、延迟、接收/处理/覆盖条数
+        """
+        status = {}
+        if self.shards is not None:
+            for shard in self.shards.shards:
+                status.update(shard.dispatch_status())
+        elif self.dispatcher is not None:
+            status.update(self.dispatcher.status())
+        if self.merger.dispatcher is not None:
+            status.update(self.merger.dispatcher.status())
+        return status
+
+    def stream_key(self, data: Any) -> Optional[Tuple[str, DispatchPolicy]]:
+        """
+        返回数据所属的 stream 和队列策略，返回 None 时不进队列直接处理，比如订阅回报
+        """
+        return None
+
+    def decode(self, data: Union[str, bytes]) -> Any:
+        """
+        解析推送数据，子类可以替换成带类型的解析器，解析失败时返回原始数据
+        """
+        try:
+            return self.codec.loads(data)
+        except Exception:
+            return data
+
+    def decode_binary(self, data: bytes) -> Any:
+        """
+        解析二进制推送，比如 mexc 的 protobuf，返回 None 时忽略这条消息
+        """
+        return None
 
     async def receive(self):
         self.gateway.logger.info("websocket 开始接收消息")
         async for msg in self.ws:
-            if msg.type == aiohttp.WSMsgType.TEXT:
+            if msg.type == aiohttp.WSMsgType.TEXT or msg.type == aiohttp.WSMsgType.BINARY:
                 if self.rhino_websocket.on_receive:
-                    try:
-                        if len(msg.data) == 0:
+                    if len(msg.data) == 0:
+                        continue
+                    receive_time = time.time()
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        data = self.decode(msg.data)
+                    else:
+                        data = self.decode_binary(msg.data)
+                        if data is None:
                             continue
-                        data = json.loads(msg.data)
-                    except:
-                        data = msg.data
-                    await self.rhino_websocket.on_receive(data)
+                    decode_time = time.time()
+                    ack = self.ack_id(data)
+                    if ack is not None:
+                        self.on_ack(ack[0], ack[1], data)
+                        continue
+                    stream = self.stream_key(data)
+                    if stream is None:
+                        await self.rhino_websocket.on_receive(data)
+                        continue
+                    self.last_times[stream[0]] = decode_time
+                    dispatcher = self.dispatcher
+                    if self.merger.races:
+                        race = self.merger.races.get(stream[0])
+                        if race is not None:
+                            # 冗余行情只处理最先到达的一份，放进 merger 的队列保证多条连接的数据按顺序处理
+                            if not self.merger.first(race, data, self.feed):
+                                continue
+                            dispatcher = self.merger.dispatcher
+                    if self.latency is not None:
+                        self.latency.received(stream[0], data, receive_time, decode_time)
+                    if dispatcher is not None:
+                        await dispatcher.put(stream[0], stream[1], data)
+                    else:
+                        await self.rhino_websocket.on_receive(data)
+                        if self.latency is not None:
+                            self.latency.handled(stream[0], decode_time)
             elif msg.type == aiohttp.WSMsgType.PING:
                 self.gateway.logger.warn("receive event PING")
             elif msg.type == aiohttp.WSMsgType.PONG:
                 self.gateway.logger.warn("receive event PONG")
-            elif msg.type == aiohttp.WSMsgType.BINARY:
-                pass
             elif msg.type == aiohttp.WSMsgType.CLOSED:
                 self.gateway.logger.warn("receive event CLOSED")
-                await self.reconnect()
+                break
             elif msg.type == aiohttp.WSMsgType.ERROR:
                 self.gateway.logger.error("receive event ERROR")
+                break
             else:
                 self.gateway.logger.error("receive is unknow")
 
             # await asyncio.sleep(0)
+        self.gateway.logger.warn(f"{self.gateway.exchange_sub} websocket 连接断开")
 
     async def send(self, data: Union[Dict, List, str]) -> bool:
         if not self.ws:
             self.gateway.logger.info("Websocket connection not connected yet!")
             return False
         if isinstance(data, dict):
-            await self.ws.send_json(data)
+            await self.ws.send_json(data, dumps=self.codec.dumps)
         elif isinstance(data, str):
             await self.ws.send_str(data)
         elif isinstance(data, list):
@@ -148,7 +595,7 @@ class WebsocketClient:
                 if isinstance(d, str):
                     await self.ws.send_str(d)
                 elif isinstance(d, dict):
-                    await self.ws.send_json(d)
+                    await self.ws.send_json(d, dumps=self.codec.dumps)
                 else:
                     self.gateway.logger.error("send message failed")
                     return False
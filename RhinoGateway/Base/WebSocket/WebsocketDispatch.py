@@ -0,0 +1,106 @@
+"""
+websocket 接收和处理解耦
+
+receive 只负责解析后按 stream 放进队列，单独的 worker 协程按顺序调用 on_received，
+下游处理慢时不会卡住 socket 读取导致交易所断开连接
+CONFLATE: 深度快照、bookTicker、ticker 这类快照数据，处理不过来时只保留每个 stream 最新的一条
+LOSSLESS: 成交、增量深度、k 线，不丢数据，队列满时 receive 等待（反压）
+"""
+import asyncio
+import time
+from collections import deque
+from enum import Enum
+from typing import NoReturn, Dict, Any, Callable, Awaitable
+
+dispatch_queue_size = 1000  # LOSSLESS 队列的最大长度
+
+
+class DispatchPolicy(Enum):
+    CONFLATE = "CONFLATE"
+    LOSSLESS = "LOSSLESS"
+
+
+class StreamQueue(object):
+
+    def __init__(self, key: str, policy: DispatchPolicy, maxsize: int):
+        self.key = key
+        self.policy = policy
+        self.maxsize = maxsize
+        self.items = deque()  # (入队时间, 数据)
+        self.space = asyncio.Event()
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0  # 被新数据覆盖掉的条数
+        self.lag_max = 0  # 入队到开始处理的最大延迟，秒
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy.value,
+            "size": len(self.items),
+            "lag": time.time() - self.items[0][0] if len(self.items) > 0 else 0,
+            "lag_max": self.lag_max,
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+        }
+
+
+class WebsocketDispatcher(object):
+
+    def __init__(self, gateway, handler: Callable[[Any], Awaitable], maxsize: int = dispatch_queue_size,
+                 latency=None):
+        self.gateway = gateway
+        self.handler = handler
+        self.latency = latency  # WebsocketLatency，记录放进队列到处理完成的耗时
+        self.maxsize = maxsize
+        self.queues: Dict[str, StreamQueue] = {}
+        self.ready = asyncio.Queue()  # 有待处理数据的 stream，每条待处理数据对应一个
+        self.task = None
+
+    def start(self) -> NoReturn:
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_event_loop().create_task(self.run())
+
+    def stop(self) -> NoReturn:
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def put(self, key: str, policy: DispatchPolicy, data: Any) -> NoReturn:
+        queue = self.queues.get(key)
+        if queue is None:
+            queue = self.queues[key] = StreamQueue(key, policy, self.maxsize)
+        queue.received += 1
+        if queue.policy == DispatchPolicy.CONFLATE:
+            if len(queue.items) > 0:
+                # 上一条还没处理，直接替换成最新的
+                queue.items[0] = (queue.items[0][0], data)
+                queue.dropped += 1
+                return
+            queue.items.append((time.time(), data))
+        else:
+            while len(queue.items) >= queue.maxsize:
+                queue.space.clear()
+                await queue.space.wait()
+            queue.items.append((time.time(), data))
+        self.ready.put_nowait(key)
+
+    async def run(self) -> NoReturn:
+        while True:
+            key = await self.ready.get()
+            queue = self.queues[key]
+            put_time, data = queue.items.popleft()
+            queue.space.set()
+            lag = time.time() - put_time
+            if lag > queue.lag_max:
+                queue.lag_max = lag
+            try:
+                await self.handler(data)
+            except Exception as e:
+                self.gateway.logger.error(f"{self.gateway.exchange_sub} websocket {key} 处理数据错误 {e}")
+            queue.processed += 1
+            if self.latency is not None:
+                self.latency.handled(key, put_time)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {key: queue.status() for key, queue in self.queues.items()}
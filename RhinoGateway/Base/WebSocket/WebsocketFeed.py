@@ -0,0 +1,64 @@
+"""
+多路冗余行情连接
+
+延迟敏感的 stream 在主连接之外再通过其他 url / proxy 建立相同的订阅，按 endpoints 的顺序是 feed 1、2 ...
+每个 endpoint 用一个 WebsocketShardManager，连接数和分片规则与主连接相同，去重由 client.merger 处理
+"""
+from typing import NoReturn, Dict, List, Any, Optional, Tuple
+
+from RhinoGateway.Base.WebSocket.WebsocketMerge import FeedMerger
+from RhinoGateway.Base.WebSocket.WebsocketShard import WebsocketShardManager
+
+
+class WebsocketFeedManager(object):
+
+    def __init__(self, client, **kwargs):
+        self.client = client
+        self.gateway = client.gateway
+        self.merger: FeedMerger = client.merger
+        self.options = kwargs  # 冗余连接的 WebsocketShardManager 参数，和主连接一致
+        self.managers: List[WebsocketShardManager] = []
+        self.endpoints: List[Tuple[str, Optional[str]]] = []
+
+    async def add(self, streams: List[str], endpoints: List[Tuple[str, Optional[str]]]) -> bool:
+        """
+        streams 参与竞速，每个 endpoint (url, proxy) 新建一组冗余连接，已有的 endpoint 只新增订阅
+        """
+        self.merger.add(streams)
+        self.merger.start()
+        success = True
+        for endpoint in endpoints:
+            if endpoint in self.endpoints:
+                manager = self.managers[self.endpoints.index(endpoint)]
+                success = await manager.add_streams(streams) and success
+                continue
+            url, proxy = endpoint
+            manager = WebsocketShardManager(self.client, url=url, proxy=proxy, feed=self.merger.add_feed(),
+                                            **self.options)
+            self.managers.append(manager)
+            self.endpoints.append(endpoint)
+            self.gateway.logger.info(f"{self.gateway.exchange_sub} 冗余行情 feed {manager.feed} {url} "
+                                     f"{len(streams)} 个 stream")
+            manager.assign(streams)
+            for shard in manager.shards:
+                shard.start()
+        return success
+
+    async def remove(self, streams: List[str]) -> bool:
+        success = True
+        for manager in self.managers:
+            success = await manager.remove_streams(streams) and success
+        self.merger.remove(streams)
+        return success
+
+    async def close(self) -> NoReturn:
+        for manager in self.managers:
+            await manager.close()
+        self.merger.stop()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "feeds": [{"feed": manager.feed, "url": url, "proxy": proxy, "shards": manager.status()}
+                      for manager, (url, proxy) in zip(self.managers, self.endpoints)],
+            "races": self.merger.status(),
+        }
@@ -0,0 +1,81 @@
+"""
+合并心跳上报
+
+处理函数每条消息只在表里更新 key 对应的最后收到数据的时间，不再每条消息创建 WebsocketListen 并 await on_heart，
+按 interval 定时把有更新的 key 批量推给 on_heart，全市场 stream 每秒几万条消息时上报次数只和 key 的数量有关
+"""
+import asyncio
+import time
+import traceback
+from array import array
+from typing import NoReturn, Dict, List
+
+from RhinoObject.Rhino.RhinoObject import WebsocketListen
+
+heart_interval = 1  # 心跳批量上报的间隔，秒
+
+
+class HeartTable(object):
+
+    def __init__(self, client, interval: float = heart_interval):
+        self.client = client
+        self.gateway = client.gateway
+        self.interval = interval
+        self.index: Dict[str, int] = {}  # key -> 在 times 中的位置
+        self.keys: List[str] = []
+        self.times = array("d")  # 最后收到数据的时间，秒
+        self.flushed = array("d")  # 最后一次上报的时间
+        self.flushes = 0  # 上报给 on_heart 的次数
+        self.task = None
+
+    def beat(self, key: str) -> NoReturn:
+        index = self.index.get(key)
+        if index is None:
+            index = self.index[key] = len(self.keys)
+            self.keys.append(key)
+            self.times.append(0)
+            self.flushed.append(0)
+        self.times[index] = time.time()
+
+    def start(self) -> NoReturn:
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_event_loop().create_task(self.run())
+
+    def stop(self) -> NoReturn:
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self) -> NoReturn:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                self.gateway.logger.error(f"{self.gateway.exchange_sub} websocket 心跳上报错误")
+                self.gateway.logger.error(traceback.format_exc())
+
+    async def flush(self) -> NoReturn:
+        """
+        只上报上次之后有新数据的 key
+        """
+        on_heart = self.client.on_heart
+        if on_heart is None:
+            return
+        times = self.times
+        flushed = self.flushed
+        for index in range(len(self.keys)):
+            last_time = times[index]
+            if last_time <= flushed[index]:
+                continue
+            flushed[index] = last_time
+            self.flushes += 1
+            await on_heart(WebsocketListen(
+                time=int(1000 * last_time),
+                gateway=self.gateway.exchange_sub,
+                key=self.keys[index]
+            ))
+
+    def status(self) -> Dict[str, float]:
+        now = time.time()
+        return {key: now - self.times[index] for key, index in self.index.items()}
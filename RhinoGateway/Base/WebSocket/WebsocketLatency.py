@@ -0,0 +1,128 @@
+"""
+websocket 每个 stream 的延迟直方图
+
+exchange: 交易所事件时间到收到消息，按 get_time 估算的时钟偏差修正，用于比较不同机房和线路
+decode: 收到消息到解析完成
+handler: 解析完成到处理函数返回，包括在队列中等待的时间，CONFLATE 时从第一条未处理的数据算起，
+持续变大说明事件循环处理不过来
+直方图放在 Metrics 的 registry 中，和 REST 耗时一起通过 snapshot / Prometheus 接口输出
+"""
+import asyncio
+import time
+import traceback
+from typing import NoReturn, Dict, Any, Optional
+
+from RhinoGateway.Base.BaseGateway.BaseGateway import GatewayCallError
+from RhinoGateway.Base.Metrics.Metrics import MetricsRegistry, Histogram
+
+websocket_metric = "websocket_latency_seconds"
+clock_sync_interval = 300  # 重新估算时钟偏差的间隔，秒
+clock_sync_samples = 3  # 每次估算请求几次 get_time，取往返时间最短的一次
+clock_sync_timeout = 5  # 单次 get_time 的超时时间，秒
+
+
+class StreamLatency(object):
+    __slots__ = ("exchange", "decode", "handler")
+
+    def __init__(self, exchange: Histogram, decode: Histogram, handler: Histogram):
+        self.exchange = exchange
+        self.decode = decode
+        self.handler = handler
+
+
+class WebsocketLatency(object):
+
+    def __init__(self, client, metrics: MetricsRegistry, interval: float = clock_sync_interval):
+        self.client = client
+        self.gateway = client.gateway
+        self.metrics = metrics
+        self.interval = interval
+        self.streams: Dict[str, StreamLatency] = {}  # 每个 stream 的直方图第一次用到时取好，之后不再拼接标签
+        self.offset = 0.0  # 交易所时间减本地时间，秒
+        self.rtt: Optional[float] = None  # 估算时钟偏差时 get_time 的往返时间，秒
+        self.synced_time: Optional[float] = None
+        self.task = None
+
+    def stream(self, stream: str) -> StreamLatency:
+        latency = self.streams.get(stream)
+        if latency is None:
+            labels = {"gateway": self.gateway.exchange_sub, "stream": stream}
+            latency = self.streams[stream] = StreamLatency(
+                self.metrics.histogram(websocket_metric, phase="exchange", **labels),
+                self.metrics.histogram(websocket_metric, phase="decode", **labels),
+                self.metrics.histogram(websocket_metric, phase="handler", **labels),
+            )
+        return latency
+
+    def received(self, stream: str, data: Any, receive_time: float, decode_time: float) -> NoReturn:
+        latency = self.stream(stream)
+        latency.decode.observe(decode_time - receive_time)
+        event_time = self.client.event_time(data)
+        if event_time is not None:
+            # 偏差估算有误差，修正后小于 0 的按 0 记录
+            latency.exchange.observe(max(receive_time + self.offset - event_time / 1000, 0.0))
+
+    def handled(self, stream: str, decode_time: float) -> NoReturn:
+        self.stream(stream).handler.observe(time.time() - decode_time)
+
+    def start(self) -> NoReturn:
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_event_loop().create_task(self.run())
+
+    def stop(self) -> NoReturn:
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self) -> NoReturn:
+        while True:
+            try:
+                await self.sync_clock()
+            except Exception as e:
+                self.gateway.logger.error(f"{self.gateway.exchange_sub} 估算时钟偏差错误")
+                self.gateway.logger.error(traceback.format_exc())
+            await asyncio.sleep(self.interval)
+
+    async def sync_clock(self, samples: int = clock_sync_samples) -> bool:
+        """
+        按 get_time 的往返时间中点估算时钟偏差，取往返时间最短的一次，误差不超过它的一半
+        """
+        symbol_info = next(iter(self.client.stream_infos.values()), None)
+        if symbol_info is None:
+            return False
+        best = None
+        for _ in range(samples):
+            start = time.time()
+            try:
+                server_time = await self.gateway.call(self.gateway.get_time, symbol_info, timeout=clock_sync_timeout)
+            except GatewayCallError as e:
+                self.gateway.logger.error(f"{self.gateway.exchange_sub} get_time 失败 {e}")
+                continue
+            end = time.time()
+            if not isinstance(server_time, int):
+                # gateway 没有实现 get_time
+                return False
+            if best is None or end - start < best[0]:
+                best = (end - start, server_time / 1000 - (start + end) / 2)
+        if best is None:
+            return False
+        self.rtt, self.offset = best
+        self.synced_time = time.time()
+        self.gateway.logger.info(f"{self.gateway.exchange_sub} 时钟偏差 {self.offset * 1000:.1f}ms "
+                                 f"往返 {self.rtt * 1000:.1f}ms")
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        streams: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for stream, latency in self.streams.items():
+            streams[stream] = {
+                "exchange": latency.exchange.snapshot(),
+                "decode": latency.decode.snapshot(),
+                "handler": latency.handler.snapshot(),
+            }
+        return {
+            "offset": self.offset,
+            "rtt": self.rtt,
+            "synced_time": self.synced_time,
+            "streams": streams,
+        }
@@ -0,0 +1,125 @@
+"""
+多路冗余行情的合并，按交易所序号去重
+
+同一个 stream 从多条连接（feed）收到时只处理最先到达的那一份，序号由 client.event_seq 给出
+（binance 深度 u、aggTrade a，mexc 深度 r），不大于已处理序号的数据直接丢弃
+没有递增序号的推送（mexc 成交、bookTicker）event_seq 返回 (推送时间, 内容) 元组，同一毫秒可能有多条不同的推送，
+只丢弃最近见过的完全相同的 key
+主连接是 feed 0，统计每个 feed 先到的次数和领先的时间
+参与竞速的 stream 的数据都放进 merger 自己的队列，不同连接收到的数据仍然按序号顺序处理
+"""
+import time
+from collections import deque
+from typing import NoReturn, Dict, List, Any, Tuple
+
+from RhinoGateway.Base.WebSocket.WebsocketDispatch import WebsocketDispatcher
+
+feed_seen_size = 1024  # 每个 stream 记录最近见过的元组 key 数量
+
+
+class FeedRace(object):
+    __slots__ = ("stream", "last", "last_time", "last_feed", "wins", "leads", "duplicates", "seen", "seen_keys")
+
+    def __init__(self, stream: str, feeds: int):
+        self.stream = stream
+        self.last = -1  # 已处理的最大序号
+        self.last_time = 0  # 最大序号第一次到达的时间
+        self.last_feed = 0  # 最大序号最先到达的 feed
+        self.wins = [0] * feeds  # 每个 feed 最先到达的次数
+        self.leads = [0.0] * feeds  # 每个 feed 最先到达时领先其他 feed 的累计时间，秒
+        self.duplicates = 0  # 丢弃的重复和过期数据
+        self.seen: Dict[tuple, Tuple[float, int]] = {}  # 最近见过的元组 key -> (第一次到达的时间, feed)
+        self.seen_keys = deque()  # 按到达顺序淘汰 seen
+
+    def grow(self, feeds: int) -> NoReturn:
+        while len(self.wins) < feeds:
+            self.wins.append(0)
+            self.leads.append(0.0)
+
+
+class FeedMerger(object):
+
+    def __init__(self, client):
+        self.client = client
+        self.gateway = client.gateway
+        self.feeds = 1  # feed 数量，包括主连接
+        self.races: Dict[str, FeedRace] = {}
+        self.dispatcher: WebsocketDispatcher = None
+
+    def add(self, streams: List[str]) -> NoReturn:
+        for stream in streams:
+            if stream not in self.races:
+                self.races[stream] = FeedRace(stream, self.feeds)
+
+    def remove(self, streams: List[str]) -> NoReturn:
+        for stream in streams:
+            self.races.pop(stream, None)
+
+    def add_feed(self) -> int:
+        feed = self.feeds
+        self.feeds += 1
+        for race in self.races.values():
+            race.grow(self.feeds)
+        return feed
+
+    def start(self) -> NoReturn:
+        if self.client.dispatch and self.dispatcher is None:
+            self.dispatcher = WebsocketDispatcher(self.gateway, self.client.on_received, latency=self.client.latency)
+        if self.dispatcher is not None:
+            self.dispatcher.start()
+
+    def stop(self) -> NoReturn:
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
+
+    def first(self, race: FeedRace, data: Any, feed: int) -> bool:
+        """
+        是否是这个序号最先到达的一份，没有序号的数据不去重
+        """
+        seq = self.client.event_seq(data)
+        if seq is None:
+            return True
+        if isinstance(seq, tuple):
+            return self.first_key(race, seq, feed)
+        if seq <= race.last:
+            if seq == race.last and feed != race.last_feed:
+                race.leads[race.last_feed] += time.time() - race.last_time
+            race.duplicates += 1
+            return False
+        race.last = seq
+        race.last_time = time.time()
+        race.last_feed = feed
+        race.wins[feed] += 1
+        return True
+
+    def first_key(self, race: FeedRace, key: tuple, feed: int) -> bool:
+        """
+        推送时间不是唯一的，不能按大小比较，只丢弃完全相同的 key
+        """
+        seen = race.seen.get(key)
+        if seen is not None:
+            if feed != seen[1]:
+                race.leads[seen[1]] += time.time() - seen[0]
+            race.duplicates += 1
+            return False
+        race.seen[key] = (time.time(), feed)
+        race.seen_keys.append(key)
+        if len(race.seen_keys) > feed_seen_size:
+            race.seen.pop(race.seen_keys.popleft(), None)
+        race.wins[feed] += 1
+        return True
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        每个 stream 各 feed 先到的次数、比例和平均领先毫秒数
+        """
+        status = {}
+        for stream, race in self.races.items():
+            total = sum(race.wins)
+            status[stream] = {
+                "wins": list(race.wins),
+                "win_rate": [wins / total if total > 0 else 0 for wins in race.wins],
+                "lead_ms": [1000 * lead / wins if wins > 0 else 0 for lead, wins in zip(race.leads, race.wins)],
+                "duplicates": race.duplicates,
+            }
+        return status
@@ -0,0 +1,68 @@
+"""
+按 stream 名字路由推送数据
+
+订阅时为每个 stream 生成一条 StreamRoute，提前绑定好处理函数、币对、深度档位、on_transfers 中的回调和心跳 key，
+收到数据时只需要按 stream 名字查一次字典，不再逐个做子串判断，也不用每条消息 split stream 名字、拼接 on_transfers 的 key
+"""
+from typing import NoReturn, Dict, Any, Callable, Awaitable, Optional
+
+from RhinoGateway.Base.WebSocket.WebsocketDispatch import DispatchPolicy
+
+
+class StreamRoute(object):
+    __slots__ = ("stream", "handler", "symbol", "transfer", "heart_key", "policy", "depth_limit", "count")
+
+    def __init__(self, stream: str, handler: Callable[[Any, "StreamRoute"], Awaitable], symbol: str,
+                 transfer: Callable[[Any], Awaitable], heart_key: str, policy: DispatchPolicy,
+                 depth_limit: int = None):
+        self.stream = stream
+        self.handler = handler  # handler(data, route)
+        self.symbol = symbol
+        self.transfer = transfer  # on_transfers 中对应数据类型的回调
+        self.heart_key = heart_key  # WebsocketListen 的 key
+        self.policy = policy
+        self.depth_limit = depth_limit
+        self.count = 0
+
+
+class StreamRouter(object):
+
+    def __init__(self, gateway):
+        self.gateway = gateway
+        self.routes: Dict[str, StreamRoute] = {}
+        self.missed = 0  # 没有路由的消息数
+
+    def __len__(self) -> int:
+        return len(self.routes)
+
+    def __contains__(self, stream: str) -> bool:
+        return stream in self.routes
+
+    def add(self, stream: str, handler: Callable[[Any, StreamRoute], Awaitable], symbol: str,
+            transfer: Callable[[Any], Awaitable], heart_key: str, policy: DispatchPolicy,
+            depth_limit: int = None) -> StreamRoute:
+        route = StreamRoute(stream, handler, symbol, transfer, heart_key, policy, depth_limit)
+        self.routes[stream] = route
+        return route
+
+    def remove(self, stream: str) -> Optional[StreamRoute]:
+        return self.routes.pop(stream, None)
+
+    def get(self, stream: str) -> Optional[StreamRoute]:
+        return self.routes.get(stream)
+
+    async def route(self, stream: str, data: Any) -> bool:
+        route = self.routes.get(stream)
+        if route is None:
+            self.missed += 1
+            return False
+        route.count += 1
+        await route.handler(data, route)
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "routes": len(self.routes),
+            "missed": self.missed,
+            "streams": {stream: route.count for stream, route in self.routes.items()},
+        }
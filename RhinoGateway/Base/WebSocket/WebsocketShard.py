@@ -0,0 +1,282 @@
+"""
+把大量 stream 分到多条 websocket 连接上
+
+按每个 stream 预估的推送频率做负载均衡，单条连接不超过交易所的 stream 数量限制，
+SUBSCRIBE 按 chunk 分批并按 frame_rate 限速发送，新增 stream 后负载不均衡时在连接之间迁移
+推送数据仍然交给原来 gateway websocket 的 decode / on_received 处理
+"""
+import asyncio
+import math
+import re
+from typing import NoReturn, Dict, List, Callable, Union, Any, Optional, Tuple
+
+from RhinoObject.Rhino.RhinoEnum import RhinoDataType
+from RhinoObject.Rhino.RhinoObject import WebsocketData
+from RhinoObject.RhinoRequest.RhinoWebsocket import RhinoWebsocket
+
+from RhinoGateway.Base.WebSocket.WebsocketClient import WebsocketClient, subscribe_chunk, subscribe_frame_rate
+from RhinoGateway.Base.WebSocket.WebsocketDispatch import DispatchPolicy
+
+shard_max_streams = 200  # 单条连接最多订阅的 stream 数量
+shard_max_rate = 1000  # 单条连接预估的最大推送频率，条/秒
+rebalance_ratio = 1.5  # 最重的连接负载超过平均值的倍数时迁移 stream
+
+
+def stream_rate(stream: str) -> float:
+    """
+    按 binance stream 名字预估每秒推送条数
+    """
+    if stream == "!bookTicker":
+        return 300
+    if stream.startswith("!"):
+        return 1
+    if "@depth" in stream:
+        interval = re.search(r"@(\d+)ms", stream)
+        return 1000 / int(interval.group(1)) if interval is not None else 1
+    if "@bookTicker" in stream:
+        return 10
+    if "@aggTrade" in stream or "@trade" in stream:
+        return 5
+    if "@kline" in stream:
+        return 2
+    return 1
+
+
+class WebsocketShard(WebsocketClient):
+    """
+    一条分片连接，数据解析和处理都交给 client
+    """
+
+    def __init__(self, client: WebsocketClient, manager: "WebsocketShardManager", index: int, url: str,
+                 proxy: str = None):
+        super().__init__(client.gateway, client.codec)
+        self.client = client
+        self.manager = manager
+        self.index = index
+        self.feed = manager.feed
+        self.merger = client.merger
+        self.streams: Dict[str, float] = {}  # stream -> 预估推送频率
+        self.chunk = manager.chunk
+        self.frame_rate = manager.frame_rate
+        self.keepalive_interval = client.keepalive_interval
+        self.keepalive_message = client.keepalive_message
+        self.last_times = client.last_times  # 和 client 共用，静默检查由 client 统一做
+        self.heart = client.heart
+        self.latency = client.latency
+        self.on_transfer = client.on_transfer
+        self.on_transfers = client.on_transfers
+        self.on_heart = client.on_heart
+        self.rhino_websocket = RhinoWebsocket(
+            url=url,
+            on_connected=self.on_connected,
+            on_receive=client.on_received,
+            proxy=proxy
+        )
+        self.task = None
+
+    @property
+    def load(self) -> float:
+        return sum(self.streams.values())
+
+    def decode(self, data: Union[str, bytes]):
+        return self.client.decode(data)
+
+    def decode_binary(self, data: bytes) -> Any:
+        return self.client.decode_binary(data)
+
+    def stream_key(self, data: Any) -> Optional[Tuple[str, DispatchPolicy]]:
+        return self.client.stream_key(data)
+
+    def ack_id(self, data: Any) -> Optional[Tuple[int, bool]]:
+        return self.client.ack_id(data)
+
+    def stream_frames(self, method: str, streams: List[str]) -> List[Tuple[int, str]]:
+        # 消息 id 由 client 统一分配，各分片之间不重复
+        return self.client.stream_frames(method, streams)
+
+    def start_monitors(self) -> NoReturn:
+        pass
+
+    def start(self) -> asyncio.Task:
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_event_loop().create_task(self.connect())
+        return self.task
+
+    async def on_connected(self):
+        self.gateway.logger.info(f"{self.gateway.exchange_sub} feed {self.feed} 分片 {self.index} 连接成功 "
+                                 f"stream 数量 {len(self.streams)}")
+        if self.feed > 0:
+            # 冗余连接只订阅，连接状态以主连接为准
+            await self.send_streams(self.client.subscribe_method, list(self.streams.keys()))
+            return
+        websocket_data = WebsocketData(
+            key=RhinoDataType.WEBSOCKETSTART.value,
+            data_type=RhinoDataType.WEBSOCKETSTART.value,
+            exchange_sub=self.gateway.exchange_sub,
+        )
+        await self.on_transfer(websocket_data)
+        await self.send_streams(self.client.subscribe_method, list(self.streams.keys()))
+
+
+class WebsocketShardManager(object):
+
+    def __init__(self, client: WebsocketClient, url: str, proxy: str = None, max_streams: int = shard_max_streams,
+                 max_rate: float = shard_max_rate, chunk: int = subscribe_chunk,
+                 frame_rate: float = subscribe_frame_rate, rate: Callable[[str], float] = stream_rate, feed: int = 0):
+        self.client = client
+        self.feed = feed  # 0 是主连接，大于 0 是冗余行情连接
+        self.gateway = client.gateway
+        self.url = url
+        self.proxy = proxy
+        self.max_streams = max_streams
+        self.max_rate = max_rate
+        self.chunk = chunk
+        self.frame_rate = frame_rate
+        self.rate = rate
+        self.shards: List[WebsocketShard] = []
+        self.stream_shard: Dict[str, WebsocketShard] = {}
+
+    def new_shard(self) -> WebsocketShard:
+        shard = WebsocketShard(self.client, self, len(self.shards), self.url, self.proxy)
+        self.shards.append(shard)
+        return shard
+
+    def place(self, stream: str, rate: float) -> WebsocketShard:
+        """
+        放到还有容量并且负载最小的连接上，都满了时新建连接
+        """
+        candidates = [shard for shard in self.shards
+                      if len(shard.streams) < self.max_streams and shard.load + rate <= self.max_rate]
+        if len(candidates) == 0:
+            # 单个 stream 超过 max_rate 时也只能放到空连接上
+            candidates = [shard for shard in self.shards if len(shard.streams) == 0] or [self.new_shard()]
+        shard = min(candidates, key=lambda s: s.load)
+        shard.streams[stream] = rate
+        self.stream_shard[stream] = shard
+        return shard
+
+    def assign(self, streams: List[str]) -> Dict[WebsocketShard, List[str]]:
+        """
+        先按频率从高到低分配，频率高的 stream 会尽量分散到不同连接
+        """
+        added: Dict[WebsocketShard, List[str]] = {}
+        rates = {stream: self.rate(stream) for stream in streams if stream not in self.stream_shard}
+        for stream in sorted(rates, key=rates.get, reverse=True):
+            shard = self.place(stream, rates[stream])
+            added.setdefault(shard, []).append(stream)
+        return added
+
+    async def subscribe(self, streams: List[str]) -> NoReturn:
+        """
+        首次订阅，连接数取 stream 数量和推送频率需要的较大值，和原来单连接一样会一直阻塞接收数据
+        """
+        streams = list(dict.fromkeys(streams))
+        total_rate = sum(self.rate(stream) for stream in streams)
+        count = max(1, math.ceil(len(streams) / self.max_streams), math.ceil(total_rate / self.max_rate))
+        while len(self.shards) < count:
+            self.new_shard()
+        self.assign(streams)
+        self.gateway.logger.info(f"{self.gateway.exchange_sub} {len(streams)} 个 stream 分到 {len(self.shards)} 条连接 "
+                                 f"{[len(shard.streams) for shard in self.shards]}")
+        self.client.start_monitors()
+        await asyncio.gather(*[shard.start() for shard in self.shards])
+
+    async def add_streams(self, streams: List[str]) -> bool:
+        """
+        新增 stream，已连接的分片直接发送 SUBSCRIBE 并等待回报，新建的分片连接后订阅，然后检查是否需要迁移
+        """
+        success = True
+        added = self.assign(streams)
+        for shard, shard_streams in added.items():
+            if shard.ws is not None:
+                success = await shard.send_streams(self.client.subscribe_method, shard_streams,
+                                                   wait_ack=True) and success
+            else:
+                shard.start()
+        await self.rebalance()
+        return success
+
+    async def remove_streams(self, streams: List[str]) -> bool:
+        """
+        在各自的分片上发送 UNSUBSCRIBE 并等待回报，分片连接保留给之后新增的 stream
+        """
+        removed: Dict[WebsocketShard, List[str]] = {}
+        for stream in streams:
+            shard = self.stream_shard.pop(stream, None)
+            if shard is None:
+                continue
+            shard.streams.pop(stream, None)
+            removed.setdefault(shard, []).append(stream)
+        success = True
+        for shard, shard_streams in removed.items():
+            if shard.ws is not None:
+                success = await shard.send_streams(self.client.unsubscribe_method, shard_streams,
+                                                   wait_ack=True) and success
+        return success
+
+    async def rebalance(self) -> NoReturn:
+        """
+        最重的连接负载超过平均值 rebalance_ratio 倍时，把 stream 迁移到最轻的连接
+        只在已连接的分片之间迁移，新连接收到 SUBSCRIBE 回报后才在旧连接上取消订阅，迁移期间不会断数据，
+        订阅失败或者超时时 stream 留在旧连接上
+        """
+        shards = [shard for shard in self.shards if shard.ws is not None]
+        if len(shards) < 2:
+            return
+        moves: Dict[tuple, List[str]] = {}
+        while True:
+            average = sum(shard.load for shard in shards) / len(shards)
+            heavy = max(shards, key=lambda s: s.load)
+            light = min(shards, key=lambda s: s.load)
+            if heavy.load <= average * rebalance_ratio or len(light.streams) >= self.max_streams:
+                break
+            gap = heavy.load - light.load
+            # 迁移后两条连接的差距要变小
+            movable = [stream for stream, rate in heavy.streams.items() if rate < gap]
+            if len(movable) == 0:
+                break
+            stream = max(movable, key=lambda s: min(heavy.streams[s], gap - heavy.streams[s]))
+            light.streams[stream] = heavy.streams.pop(stream)
+            self.stream_shard[stream] = light
+            moves.setdefault((heavy, light), []).append(stream)
+
+        for (heavy, light), streams in moves.items():
+            self.gateway.logger.info(
+                f"{self.gateway.exchange_sub} 迁移 {len(streams)} 个 stream 分片 {heavy.index} -> {light.index}")
+            if light.ws is not None and await light.send_streams(self.client.subscribe_method, streams,
+                                                                 wait_ack=True):
+                if heavy.ws is not None:
+                    await heavy.send_streams(self.client.unsubscribe_method, streams)
+                continue
+            self.gateway.logger.warn(
+                f"{self.gateway.exchange_sub} 分片 {light.index} 订阅失败 {len(streams)} 个 stream 留在分片 {heavy.index}")
+            for stream in streams:
+                # 等待回报期间被 remove_streams 移除的 stream 不再放回
+                rate = light.streams.pop(stream, None)
+                if rate is not None and self.stream_shard.get(stream) is light:
+                    heavy.streams[stream] = rate
+                    self.stream_shard[stream] = heavy
+
+    async def unsubscribe(self) -> NoReturn:
+        for shard in self.shards:
+            if shard.ws is not None:
+                await shard.send_streams(self.client.unsubscribe_method, list(shard.streams.keys()))
+
+    async def pong(self, message: Union[str, bytes] = b"") -> NoReturn:
+        for shard in self.shards:
+            if shard.ws is not None:
+                await shard.pong(message)
+
+    async def reconnect(self) -> NoReturn:
+        await asyncio.gather(*[shard.reconnect() for shard in self.shards])
+
+    async def close(self) -> NoReturn:
+        await asyncio.gather(*[shard.close() for shard in self.shards])
+
+    def status(self) -> List[Dict]:
+        return [{
+            "index": shard.index,
+            "streams": len(shard.streams),
+            "load": shard.load,
+            **shard.connection_status(),
+        } for shard in self.shards]
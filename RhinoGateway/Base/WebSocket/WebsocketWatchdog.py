@@ -0,0 +1,120 @@
+"""
+静默 stream 检查
+
+receive 记录每个 stream 最后收到数据的时间，按固定间隔检查，连接正常但 stream 超过 stream_timeout 没有数据时
+先在所在的连接上重新订阅，重新订阅 resubscribes 次后仍然没有数据就改用 REST 轮询，直到重新收到推送
+断线由 connect 中的重连处理，这里不检查没有连接的 stream
+"""
+import asyncio
+import time
+import traceback
+from typing import NoReturn, Dict, Any
+
+watchdog_interval = 1  # 检查间隔，也是 REST 轮询的间隔，秒
+watchdog_resubscribes = 2  # 静默后重新订阅的次数，超过后改用 REST 轮询
+
+
+class StreamWatch(object):
+
+    def __init__(self, stream: str, mark_time: float):
+        self.stream = stream
+        self.mark_time = mark_time  # 开始检查或最近一次重新订阅的时间
+        self.resubscribes = 0
+        self.polling = False
+        self.polls = 0
+        self.poll_task: asyncio.Task = None
+
+    def reset(self, now: float) -> NoReturn:
+        self.mark_time = now
+        self.resubscribes = 0
+        self.polling = False
+        if self.poll_task is not None:
+            self.poll_task.cancel()
+            self.poll_task = None
+
+
+class WebsocketWatchdog(object):
+
+    def __init__(self, client, interval: float = watchdog_interval, resubscribes: int = watchdog_resubscribes):
+        self.client = client
+        self.gateway = client.gateway
+        self.interval = interval
+        self.resubscribes = resubscribes
+        self.watches: Dict[str, StreamWatch] = {}
+        self.task = None
+
+    def start(self) -> NoReturn:
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_event_loop().create_task(self.run())
+
+    def stop(self) -> NoReturn:
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        for watch in self.watches.values():
+            watch.reset(0)
+
+    async def run(self) -> NoReturn:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                self.gateway.logger.error(f"{self.gateway.exchange_sub} websocket 检查 stream 错误")
+                self.gateway.logger.error(traceback.format_exc())
+
+    async def check(self) -> NoReturn:
+        now = time.time()
+        for stream in list(self.watches):
+            if stream not in self.client.streams:
+                self.watches.pop(stream).reset(now)
+
+        for stream in list(self.client.streams):
+            timeout = self.client.stream_timeout(stream)
+            if timeout is None:
+                continue
+            watch = self.watches.get(stream)
+            if watch is None:
+                watch = self.watches[stream] = StreamWatch(stream, now)
+            connection = self.client.stream_connection(stream)
+            if connection is None or connection.ws is None or connection.ws.closed:
+                continue
+            last_time = self.client.last_times.get(stream, 0)
+            if (watch.resubscribes > 0 or watch.polling) and last_time > watch.mark_time:
+                self.gateway.logger.info(f"{self.gateway.exchange_sub} websocket {stream} 恢复推送")
+                watch.reset(now)
+                continue
+            if watch.polling:
+                self.poll(watch)
+                continue
+            silent = now - max(last_time, connection.connected_time or 0, watch.mark_time)
+            if silent <= timeout:
+                continue
+            if watch.resubscribes < self.resubscribes:
+                watch.resubscribes += 1
+                watch.mark_time = now
+                self.gateway.logger.warn(f"{self.gateway.exchange_sub} websocket {stream} {silent:.1f} 秒没有数据，"
+                                         f"第 {watch.resubscribes} 次重新订阅")
+                await connection.send_streams(self.client.unsubscribe_method, [stream])
+                await connection.send_streams(self.client.subscribe_method, [stream])
+            else:
+                watch.polling = True
+                self.gateway.logger.error(f"{self.gateway.exchange_sub} websocket {stream} 重新订阅后仍然没有数据，"
+                                          f"改用 REST 轮询")
+                self.poll(watch)
+
+    def poll(self, watch: StreamWatch) -> NoReturn:
+        # 上一次轮询还没有返回时跳过
+        if watch.poll_task is not None and not watch.poll_task.done():
+            return
+        watch.polls += 1
+        watch.poll_task = asyncio.get_event_loop().create_task(self.client.poll_stream(watch.stream))
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        now = time.time()
+        return {stream: {
+            "silent": now - self.client.last_times.get(stream, watch.mark_time),
+            "resubscribes": watch.resubscribes,
+            "polling": watch.polling,
+            "polls": watch.polls,
+        } for stream, watch in self.watches.items()}
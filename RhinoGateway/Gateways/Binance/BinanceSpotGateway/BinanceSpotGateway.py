@@ -3,7 +3,7 @@ import hmac
 import time
 import traceback
 import urllib.parse
-from typing import NoReturn, Union, Dict, List, Callable, Any
+from typing import NoReturn, Union, Dict, List, Callable, Any, Optional, Tuple
 
 from RhinoLogger.RhinoLogger.RhinoLogger import RhinoLogger
 from RhinoObject.Base.BaseEnum import CexOrderType
@@ -14,17 +14,69 @@ from RhinoObject.Rhino.RhinoObject import MixInfo, SymbolInfo, RhinoDepth, Rhino
     WebsocketListen, RhinoLeverage, RhinoOrder, CallableMethods, RhinoAccount, RhinoPosition, RhinoFundingRate, \
     RhinoBalance, RhinoKline, RhinoTickers, RhinoTicker
 from RhinoObject.RhinoRequest.RhinoRequest import RhinoRequest
-from RhinoObject.RhinoRequest.RhinoWebsocket import RhinoWebsocket
 from RhinoObject.RhinoRequest.RhunoRequestEnum import Method
 
 from RhinoGateway.Base.BaseGateway.BaseGateway import BaseGateway
+from RhinoGateway.Base.OrderBook.OrderBook import OrderBook, OrderBookManager, order_book_snapshot_limit
+from RhinoGateway.Base.RateLimit.RateLimiter import RateLimiter, RateLimit, RateRule
 from RhinoGateway.Base.RestFul.RestClient import RestClient
+from RhinoGateway.Base.RestFul.RestLane import Priority
 from RhinoGateway.Base.WebSocket.WebsocketClient import WebsocketClient
+from RhinoGateway.Base.WebSocket.WebsocketDispatch import DispatchPolicy
+from RhinoGateway.Base.WebSocket.WebsocketRouter import StreamRoute
+from RhinoGateway.Base.WebSocket.WebsocketFeed import WebsocketFeedManager
+from RhinoGateway.Base.WebSocket.WebsocketShard import WebsocketShardManager
+from RhinoGateway.Util.ArrayDepth import RhinoArrayDepth
 from RhinoGateway.Util.Util import get_RhinoDepth_from_MixInfo
 
 rest_api = "https://api.binance.com"
 websocket_url = "wss://stream.binance.com:9443/stream?streams="
 websocket_pong = 700  # 多少秒发一次 pong 进行 websocket 保活
+websocket_max_streams = 1024  # 单条连接最多订阅的 stream 数量
+websocket_frame_rate = 5  # 每条连接每秒最多发送的订阅消息数
+websocket_stale_timeout = 10  # 深度快照、k 线、ticker 超过多少秒没有数据时重新订阅，秒
+websocket_partial_depths = (5, 10, 20)  # 部分深度推送支持的档位数，其他档位由增量深度维护本地订单簿
+websocket_diff_interval = 100  # 增量深度的推送间隔，毫秒
+hedge_apis = ["https://api1.binance.com", "https://api2.binance.com", "https://api3.binance.com"]  # 对冲请求使用的备用域名
+
+
+def depth_weight(params: Dict) -> int:
+    limit = int(params.get("limit", 100))
+    if limit <= 100:
+        return 5
+    elif limit <= 500:
+        return 25
+    elif limit <= 1000:
+        return 50
+    return 250
+
+
+def rate_limits() -> List[RateLimit]:
+    return [
+        RateLimit("weight", 6000, 60, header="X-MBX-USED-WEIGHT-1M"),
+        RateLimit("orders_10s", 100, 10, header="X-MBX-ORDER-COUNT-10S", reserve=0),
+        RateLimit("orders_1d", 200000, 86400, header="X-MBX-ORDER-COUNT-1D", reserve=0),
+    ]
+
+
+rate_rules = {
+    ("GET", "/api/v3/time"): RateRule({"weight": 1}),
+    ("GET", "/api/v3/exchangeInfo"): RateRule({"weight": 20}),
+    ("GET", "/api/v3/depth"): RateRule({"weight": depth_weight}),
+    ("GET", "/api/v3/historicalTrades"): RateRule({"weight": 25}),
+    ("GET", "/api/v3/order"): RateRule({"weight": 4}),
+    ("GET", "/api/v3/allOrders"): RateRule({"weight": 20}),
+    ("GET", "/api/v3/account"): RateRule({"weight": 20}),
+    ("POST", "/api/v3/order"): RateRule({"weight": 1, "orders_10s": 1, "orders_1d": 1}, is_order=True),
+    ("DELETE", "/api/v3/order"): RateRule({"weight": 1}, is_order=True),
+    ("DELETE", "/api/v3/openOrders"): RateRule({"weight": 1}, is_order=True),
+}
+
+lane_rules = {
+    ("GET", "/api/v3/exchangeInfo"): Priority.BULK,
+    ("GET", "/api/v3/historicalTrades"): Priority.BULK,
+    ("GET", "/api/v3/allOrders"): Priority.BULK,
+}
 
 
 class BinanceSpotGateway(BaseGateway):
@@ -140,9 +192,14 @@ class BinanceSpotGateway(BaseGateway):
 
 
 class BinanceSpotRestGateway(RestClient):
+    warm_up_url = rest_api + "/api/v3/time"
 
     def __init__(self, gateway: BinanceSpotGateway):
         super().__init__(gateway)
+        self.limiter = RateLimiter(gateway, rate_limits(), rate_rules)
+        self.lane_rules = lane_rules
+        self.hedge_paths = {"/api/v3/depth", "/api/v3/time"}
+        self.hedge_apis = hedge_apis
 
     async def sign(self, request: RhinoRequest) -> NoReturn:
         try:
@@ -274,19 +331,7 @@ class BinanceSpotRestGateway(RestClient):
         rhino_depth.gateway_send_time = data.get("lastUpdateId") * 1000
         rhino_depth.rhino_get_time = int(time.time() * 1000)
 
-        bids = data.get("bids")
-        bids_len = len(bids)
-        asks = data.get("asks")
-        asks_len = len(asks)
-        for i in range(1, depth_limit + 1):
-            if i <= asks_len:
-                bid = bids[i - 1]
-                setattr(rhino_depth, f"buy_price{i}", float(bid[0]))
-                setattr(rhino_depth, f"buy_amount{i}", float(bid[1]))
-            if i <= bids_len:
-                ask = asks[i - 1]
-                setattr(rhino_depth, f"sell_price{i}", float(ask[0]))
-                setattr(rhino_depth, f"sell_amount{i}", float(ask[1]))
+        rhino_depth.set_levels(data.get("bids"), data.get("asks"), depth_limit)
         # self.gateway.logger.debug(
         #     f"{self.gateway.exchange_sub} depth {extra.__str__()} 获取数据消耗时间 {int(time.time() * 1000) - extra.start_time}")
         await on_transfer(rhino_depth, on_transfer_extra_data)
@@ -719,103 +764,189 @@ class BinanceSpotRestGateway(RestClient):
     async def on_fail(self, request: RhinoRequest, data: Union[Dict], code: int, extra: MixInfo) -> NoReturn:
         pass
 
+    async def get_depth_snapshot(self, symbol_info: SymbolInfo, callable_methods: CallableMethods = None) -> NoReturn:
+        """
+        本地订单簿同步用的深度快照，返回原始的 lastUpdateId / bids / asks
+        """
+        params = {
+            "symbol": symbol_info.real_pair,
+            "limit": order_book_snapshot_limit,
+        }
+
+        rhino_request = RhinoRequest(
+            method=Method.GET.value,
+            url=rest_api + "/api/v3/depth",
+            params=params,
+            data=None,
+            headers=None,
+            callback=self.on_get_depth_snapshot,
+            on_failed=self.on_fail if callable_methods.on_failed is None else callable_methods.on_failed,
+            on_error=self.on_error if callable_methods.on_error is None else callable_methods.on_error,
+            on_transfer=self.gateway.set_data if callable_methods.on_transfer is None else callable_methods.on_transfer,
+            timeout=symbol_info.time_out,
+            extra=symbol_info,
+            on_transfer_extra_data=callable_methods.extra_data,
+            is_sign=False,
+            proxy=symbol_info.proxy
+        )
+        await self.fetch(rhino_request)
+
+    async def on_get_depth_snapshot(self, request: RhinoRequest, data, code: int, extra: MixInfo,
+                                    on_transfer: Callable = None, on_transfer_extra_data: Any = None) -> NoReturn:
+        await on_transfer(data, on_transfer_extra_data)
+
 
 class BinanceSpotWebsocketGateway(WebsocketClient):
 
     def __init__(self, gateway: BinanceSpotGateway):
         super().__init__(gateway)
+        self.keepalive_interval = websocket_pong
+        self.feeds = WebsocketFeedManager(self, max_streams=websocket_max_streams, frame_rate=websocket_frame_rate)
+        self.order_book = False  # 为 True 时 5/10/20 档也用增量深度维护本地订单簿
+        self.books = OrderBookManager(gateway, self.fetch_book, self.on_book, prev_id=False)
 
-    async def subscribe(self, symbol_infos: SymbolInfos, callable_methods: CallableMethods = None):
-        super().subscribe(symbol_infos, callable_methods)
-        symbol_infos: List[SymbolInfo] = symbol_infos.symbols.get(self.gateway.exchange_sub)
+    def get_streams(self, symbol_infos: List[SymbolInfo]) -> List[str]:
         subscribe_list = []
         all_ticker = False
         for symbol_info in symbol_infos:
             symbol_methods: List[Union[MethodEnum]] = symbol_info.symbol_methods
+            symbol = symbol_info.real_pair.upper()
             for symbol_method in symbol_methods:
                 if symbol_method == MethodEnum.GETDEPTHS.value:
-                    depth_limit = symbol_info.rhino_depth.depth_limit
+                    depth_limit = int(symbol_info.rhino_depth.depth_limit)
                     interval = symbol_info.rhino_depth.interval
-                    subscribe_list.append(f"{symbol_info.real_pair}@depth{depth_limit}@{interval}ms")
+                    if self.order_book or depth_limit not in websocket_partial_depths:
+                        # 增量深度不能丢，按 interval 输出前 depth_limit 档
+                        stream = f"{symbol_info.real_pair}@depth@{websocket_diff_interval}ms"
+                        self.add_route(stream, self.on_diff_depths, symbol, RhinoDataType.RHINODEPTH,
+                                       symbol + MethodEnum.GETDEPTHS.value, DispatchPolicy.LOSSLESS, depth_limit)
+                        self.books.add(symbol, stream, depth_limit, int(interval) / 1000)
+                    else:
+                        stream = f"{symbol_info.real_pair}@depth{depth_limit}@{interval}ms"
+                        self.add_route(stream, self.on_depths, symbol, RhinoDataType.RHINODEPTH,
+                                       symbol + MethodEnum.GETDEPTHS.value, DispatchPolicy.CONFLATE, depth_limit)
                 elif symbol_method == MethodEnum.GETTRADES.value:
-                    subscribe_list.append(f"{symbol_info.real_pair}@aggTrade")
+                    stream = f"{symbol_info.real_pair}@aggTrade"
+                    self.add_route(stream, self.on_trades, symbol, RhinoDataType.RHINOTRADE,
+                                   symbol + MethodEnum.GETTRADES.value, DispatchPolicy.LOSSLESS)
                 elif symbol_method == MethodEnum.GETKLINE.value:
                     k_line_type = self.gateway.get_kline_type(symbol_info.rhino_kline.k_line_type)
-                    subscribe_list.append(f"{symbol_info.real_pair}@kline_{k_line_type}")
+                    stream = f"{symbol_info.real_pair}@kline_{k_line_type}"
+                    self.add_route(stream, self.on_kline, symbol, RhinoDataType.RHINOKLINE,
+                                   symbol + MethodEnum.GETKLINE.value, DispatchPolicy.LOSSLESS)
                 elif symbol_method == MethodEnum.GETTICKER.value:
                     rhino_ticker_type = symbol_info.rhino_ticker.ticker_type
                     if rhino_ticker_type == TickerType.ALL.value:
-                        if not all_ticker:
-                            subscribe_list.append(f"!ticker@arr")
-                            all_ticker = True
+                        if all_ticker:
+                            continue
+                        stream = f"!ticker@arr"
+                        self.add_route(stream, self.on_tickers, "ALL", RhinoDataType.RHINOTICKER,
+                                       "ALL" + MethodEnum.GETKLINE.value, DispatchPolicy.CONFLATE)
+                        all_ticker = True
                     else:
-                        subscribe_list.append(f"{symbol_info.real_pair}@ticker")
+                        stream = f"{symbol_info.real_pair}@ticker"
+                        self.add_route(stream, self.on_tickers, symbol, RhinoDataType.RHINOTICKER,
+                                       symbol + MethodEnum.GETKLINE.value, DispatchPolicy.CONFLATE)
+                else:
+                    continue
+                subscribe_list.append(stream)
+                self.stream_infos[stream] = symbol_info
+        return subscribe_list
+
+    async def subscribe(self, symbol_infos: SymbolInfos, callable_methods: CallableMethods = None):
+        super().subscribe(symbol_infos, callable_methods)
+        symbol_infos: List[SymbolInfo] = symbol_infos.symbols.get(self.gateway.exchange_sub)
+        subscribe_list = self.get_streams(symbol_infos)
+        self.streams = dict.fromkeys(subscribe_list)
 
-        self.subscribe_data = ('{"method": "SUBSCRIBE","params":' + str(subscribe_list) + ',"id": 1}').replace('\'',
-                                                                                                               '"')
-        self.unsubscribe_data = ('{"method": "UNSUBSCRIBE","params":' + str(subscribe_list) + ',"id": 1}').replace('\'',
-                                                                                                                   '"')
-        rhino_websocket = RhinoWebsocket(
+        # 按 stream 数量和推送频率分到多条连接，SUBSCRIBE 分批限速发送
+        self.shards = WebsocketShardManager(
+            self,
             url=websocket_url,
-            on_connected=self.on_connected,
-            on_receive=self.on_received,
-            proxy=symbol_info.proxy
+            proxy=symbol_infos[-1].proxy,
+            max_streams=websocket_max_streams,
+            frame_rate=websocket_frame_rate,
         )
-        self.rhino_websocket = rhino_websocket
-        await self.connect(rhino_websocket)
+        await self.shards.subscribe(subscribe_list)
+
+    def stream_timeout(self, stream: str) -> Optional[float]:
+        # 成交和 bookTicker 没有成交/变化时不推送，不检查
+        if "@depth" in stream or "@kline" in stream or "@ticker" in stream or stream == "!ticker@arr":
+            return websocket_stale_timeout
+        return None
+
+    def poll_method(self, stream: str) -> Optional[Tuple[Callable, RhinoDataType]]:
+        if "@depth" in stream:
+            return self.gateway.get_depths, RhinoDataType.RHINODEPTH
+        return None
+
+    def event_time(self, data: Any) -> Optional[int]:
+        data = data.get("data")
+        if isinstance(data, list):
+            return data[0].get("E") if len(data) > 0 else None
+        # depth20 快照没有事件时间
+        return data.get("E") if isinstance(data, dict) else None
+
+    def event_seq(self, data: Any) -> Optional[int]:
+        data = data.get("data")
+        if isinstance(data, list):
+            return data[0].get("E") if len(data) > 0 else None
+        if not isinstance(data, dict):
+            return None
+        # 成交按归集成交 id a，深度按 update id，kline 和 ticker 没有序号按事件时间 E
+        event = data.get("e")
+        if event == "aggTrade":
+            return data.get("a")
+        if event == "depthUpdate":
+            return data.get("u")
+        if "lastUpdateId" in data:
+            return data.get("lastUpdateId")
+        return data.get("E")
+
+    def stream_key(self, data: Any) -> Optional[Tuple[str, DispatchPolicy]]:
+        if not isinstance(data, dict):
+            return None
+        route = self.router.get(data.get("stream", None))
+        if route is None:
+            return None
+        return route.stream, route.policy
 
     async def on_received(self, data):
         try:
             channel = data.get("stream", None)
             if channel is None:
-                self.gateway.logger.error(f"{self.gateway.exchange_sub} websocket channel 为 None {data}")
+                if "result" in data:
+                    self.gateway.logger.info(f"{self.gateway.exchange_sub} websocket 回报 {data}")
+                else:
+                    self.gateway.logger.error(f"{self.gateway.exchange_sub} websocket channel 为 None {data}")
+                return
+            if not await self.router.route(channel, data):
+                self.gateway.logger.error(f"{self.gateway.exchange_sub} websocket 没有订阅的 stream {channel}")
                 return
-            if "depth" in channel:
-                await self.on_depths(data)
-            elif "aggTrade" in channel:
-                await self.on_trades(data)
-            elif "kline" in channel:
-                await self.on_kline(data)
-            elif "ticker" in channel:
-                await self.on_tickers(data)
-
-            # 进行 ping/pong 保活
-            if time.time() - self.websocket_time > websocket_pong:
-                await self.pong(b"pong")
-                self.websocket_time = time.time()
 
         except Exception as e:
             self.gateway.logger.error(f"解析 websocket receive 有错误")
             self.gateway.logger.error(traceback.format_exc())
 
-    async def on_tickers(self, data):
+    async def on_tickers(self, data, route: StreamRoute):
         try:
             data = data.get("data")
-            symbol = None
             rhino_ticker_object = None
             if isinstance(data, list):
-                symbol = "ALL"
                 rhino_ticker_object = RhinoTickers()
-                rhino_ticker_object.key = symbol + RhinoDataType.RHINOTICKER.value
+                rhino_ticker_object.key = route.symbol + RhinoDataType.RHINOTICKER.value
                 rhino_ticker_object.ticker_list = []
                 rhino_ticker_object.ticker_type = TickerType.ALL.value
                 for d in data:
                     rhino_ticker_object.ticker_list.append(self.on_ticker(d))
             else:
                 rhino_ticker_object = self.on_ticker(data)
-                symbol = data.get("s").upper()
 
             self.gateway.logger.debug(
                 f"websocket 推送数据成功 {self.gateway.exchange_sub} ticker")
             # await self.on_transfer(rhino_ticker_object)
-            await self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINOTICKER.value)(
-                rhino_ticker_object)
-            websocket_listen = WebsocketListen(
-                time=int(1000 * time.time()),
-                gateway=self.gateway.exchange_sub,
-                key=symbol + MethodEnum.GETKLINE.value
-            )
-            await self.on_heart(websocket_listen)
+            await route.transfer(rhino_ticker_object)
+            self.heart.beat(route.heart_key)
         except Exception as e:
             self.gateway.logger.error(f"{self.gateway.exchange_sub} 解析 websocket ticker 数据错误")
             self.gateway.logger.error(traceback.format_exc())
@@ -837,10 +968,10 @@ class BinanceSpotWebsocketGateway(WebsocketClient):
         rhino_ticker.low_price = float(data.get("l"))
         return rhino_ticker
 
-    async def on_kline(self, data):
+    async def on_kline(self, data, route: StreamRoute):
         try:
             data = data.get("data")
-            symbol = data.get("s").upper()
+            symbol = route.symbol
             kline_info = data.get("k")
             rhino_kline = RhinoKline(
                 real_pair=symbol,
@@ -856,20 +987,15 @@ class BinanceSpotWebsocketGateway(WebsocketClient):
             rhino_kline.low_price = float(kline_info.get("l"))
             rhino_kline.is_end = kline_info.get("x")
             # await self.on_transfer(rhino_kline)
-            await self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINOKLINE.value)(rhino_kline)
-            websocket_listen = WebsocketListen(
-                time=int(1000 * time.time()),
-                gateway=self.gateway.exchange_sub,
-                key=symbol + MethodEnum.GETKLINE.value
-            )
-            await self.on_heart(websocket_listen)
+            await route.transfer(rhino_kline)
+            self.heart.beat(route.heart_key)
         except Exception as e:
             self.gateway.logger.error(f"{self.gateway.exchange_sub} 解析 websocket kline 数据错误")
             self.gateway.logger.error(traceback.format_exc())
 
-    async def on_trades(self, data):
+    async def on_trades(self, data, route: StreamRoute):
         try:
-            symbol = data.get("stream").split("@")[0].upper()
+            symbol = route.symbol
             rhino_trade = RhinoTrade(
                 real_pair=symbol,
                 cex_exchange_sub=self.gateway.exchange_sub,
@@ -883,56 +1009,65 @@ class BinanceSpotWebsocketGateway(WebsocketClient):
             rhino_trade.price = float(data.get("data").get("p"))
             rhino_trade.direction = OrderDirection.SELL.value if data.get("data").get(
                 "m") is True else OrderDirection.BUY.value
+            # 推送延迟由 websocket_latency_status 按 stream 统计
             self.gateway.logger.debug(
-                f"websocket 推送数据成功 {self.gateway.exchange_sub} trade {symbol} amount {rhino_trade.amount} price {rhino_trade.price} "
-                f" 推送和计算 time diff {rhino_trade.gateway_send_time - rhino_trade.data_calcu_time} 接收和推送 time diff {rhino_trade.rhino_get_time - rhino_trade.gateway_send_time}")
+                f"websocket 推送数据成功 {self.gateway.exchange_sub} trade {symbol} amount {rhino_trade.amount} price {rhino_trade.price}")
             # await self.on_transfer(rhino_trade)
-            await self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINOTRADE.value)(rhino_trade)
+            await route.transfer(rhino_trade)
             self.gateway.logger.debug(f"传送完毕")
-            websocket_listen = WebsocketListen(
-                time=int(1000 * time.time()),
-                gateway=self.gateway.exchange_sub,
-                key=symbol + MethodEnum.GETTRADES.value
-            )
-            await self.on_heart(websocket_listen)
+            self.heart.beat(route.heart_key)
         except Exception as e:
             self.gateway.logger.error(f"{self.gateway.exchange_sub} 解析 websocket trade 数据错误")
             self.gateway.logger.error(traceback.format_exc())
 
-    async def on_depths(self, data):
+    async def on_depths(self, data, route: StreamRoute):
         try:
-            symbol = data.get("stream").split("@")[0].upper()
-            token = symbol.upper().replace("USDT", "").replace("BUSD", "")
-            depth_limit = int(data.get("stream").split("@")[1].split("depth")[1])
-            rhino_depth = RhinoDepth(
+            symbol = route.symbol
+            token = symbol.replace("USDT", "").replace("BUSD", "")
+            rhino_depth = RhinoArrayDepth(
                 symbol=token,
                 real_pair=symbol,
                 cex_exchange_sub=self.gateway.exchange_sub,
                 data_get_type=DataGetType.WEBSOCKET.value,
             )
-            bids = data.get("data", {}).get("bids")
-            bids_len = len(bids)
-            asks = data.get("data", {}).get("asks")
-            asks_len = len(asks)
-            for i in range(1, depth_limit + 1):
-                if i <= asks_len:
-                    bid = bids[i - 1]
-                    setattr(rhino_depth, f"buy_price{i}", float(bid[0]))
-                    setattr(rhino_depth, f"buy_amount{i}", float(bid[1]))
-                if i <= bids_len:
-                    ask = asks[i - 1]
-                    setattr(rhino_depth, f"sell_price{i}", float(ask[0]))
-                    setattr(rhino_depth, f"sell_amount{i}", float(ask[1]))
+            data = data.get("data", {})
+            rhino_depth.set_levels(data.get("bids"), data.get("asks"), route.depth_limit)
             self.gateway.logger.debug(
                 f"websocket 推送数据成功 {self.gateway.exchange_sub} depth {symbol}")
             # await self.on_transfer(rhino_depth)
-            await self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINODEPTH.value)(rhino_depth)
-            websocket_listen = WebsocketListen(
-                time=int(1000 * time.time()),
-                gateway=self.gateway.exchange_sub,
-                key=symbol + MethodEnum.GETDEPTHS.value
-            )
-            await self.on_heart(websocket_listen)
+            await route.transfer(rhino_depth)
+            self.heart.beat(route.heart_key)
         except Exception as e:
             self.gateway.logger.error(f"{self.gateway.exchange_sub} 解析 websocket depth 数据错误")
             self.gateway.logger.error(traceback.format_exc())
+
+    async def on_diff_depths(self, data, route: StreamRoute):
+        try:
+            data = data.get("data")
+            await self.books.on_diff(route.symbol, data.get("U"), data.get("u"), None, data.get("b"), data.get("a"),
+                                     data.get("E"))
+            self.heart.beat(route.heart_key)
+        except Exception as e:
+            self.gateway.logger.error(f"{self.gateway.exchange_sub} 解析 websocket 增量深度数据错误")
+            self.gateway.logger.error(traceback.format_exc())
+
+    async def fetch_book(self, book: OrderBook) -> Dict:
+        return await self.gateway.call(self.gateway.rest.get_depth_snapshot, self.stream_infos[book.stream])
+
+    async def on_book(self, book: OrderBook):
+        route = self.router.get(book.stream)
+        if route is None:
+            return
+        symbol = book.symbol
+        rhino_depth = RhinoArrayDepth(
+            symbol=symbol.replace("USDT", "").replace("BUSD", ""),
+            real_pair=symbol,
+            cex_exchange_sub=self.gateway.exchange_sub,
+            data_get_type=DataGetType.WEBSOCKET.value,
+            gateway_send_time=book.event_time,
+            rhino_get_time=int(time.time() * 1000),
+        )
+        book.fill(rhino_depth)
+        self.gateway.logger.debug(
+            f"websocket 推送数据成功 {self.gateway.exchange_sub} order book {symbol} {book.last_update_id}")
+        await route.transfer(rhino_depth)
@@ -0,0 +1,179 @@
+"""
+Binance websocket 推送的 msgspec 结构定义
+
+按事件类型 "e" 直接从 bytes/str 解析成紧凑对象，价格和数量在解析时一次性由字符串转成 float，
+handler 中不需要再 data.get(...) / float(...)
+没有安装 msgspec 时结构继承 PlainStruct，先按普通 json 解析再按同样的字段和 rename 转换，handler 不需要区分
+"""
+from typing import List, Tuple, Union, Dict, Any, Callable
+
+from RhinoGateway.Util.JsonCodec import get_json_codec
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+Level = Tuple[float, float]  # [价格, 数量]
+
+
+plain_missing = object()  # 没有默认值的字段
+
+
+class PlainDecodeError(ValueError):
+    pass
+
+
+class PlainStruct(object):
+    """
+    没有 msgspec 时代替 msgspec.Struct，类定义的写法相同，字段按类型注解转换
+    """
+    struct_tag: str = None
+    struct_fields: List[Tuple[str, str, Callable[[Any], Any], Any]] = []  # (属性名, json 字段, 转换函数, 默认值)
+
+    def __init_subclass__(cls, tag: str = None, tag_field: str = None, gc: bool = True,
+                          rename: Dict[str, str] = None, **kwargs):
+        super().__init_subclass__(**kwargs)
+        rename = rename if rename is not None else {}
+        cls.struct_tag = tag
+        cls.struct_fields = [(name, rename.get(name, name), plain_converter(kind), cls.__dict__.get(name, plain_missing))
+                             for name, kind in cls.__annotations__.items()]
+
+    def __init__(self, **kwargs):
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PlainStruct":
+        struct = cls.__new__(cls)
+        for name, key, convert, default in cls.struct_fields:
+            value = data.get(key, plain_missing)
+            if value is plain_missing:
+                if default is plain_missing:
+                    raise PlainDecodeError(f"{cls.__name__} 缺少字段 {key}")
+                value = default
+            else:
+                value = convert(value)
+            setattr(struct, name, value)
+        return struct
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name, _, _, _ in self.struct_fields)
+        return f"{type(self).__name__}({fields})"
+
+
+def plain_converter(kind: Any) -> Callable[[Any], Any]:
+    if kind == Level:
+        return lambda value: (float(value[0]), float(value[1]))
+    if isinstance(kind, type) and issubclass(kind, PlainStruct):
+        return kind.from_dict
+    item = getattr(kind, "__args__", None)
+    if getattr(kind, "__origin__", None) is list and item is not None:
+        convert = plain_converter(item[0])
+        return lambda value: [convert(v) for v in value]
+    return kind
+
+
+class PlainDecoder(object):
+    """
+    按事件类型 "e" 找到对应的结构，数组按数组中每一项解析，不是这些结构时抛出 PlainDecodeError
+    """
+
+    def __init__(self, structs: List[type]):
+        self.codec = get_json_codec()
+        self.structs = {struct.struct_tag: struct for struct in structs}
+
+    def decode(self, data: Union[str, bytes]) -> Any:
+        value = self.codec.loads(data)
+        if isinstance(value, list):
+            return [self.decode_event(item) for item in value]
+        return self.decode_event(value)
+
+    def decode_event(self, value: Any) -> PlainStruct:
+        struct = self.structs.get(value.get("e")) if isinstance(value, dict) else None
+        if struct is None:
+            raise PlainDecodeError("不是行情推送")
+        return struct.from_dict(value)
+
+
+Struct = msgspec.Struct if msgspec is not None else PlainStruct
+
+
+class DepthUpdate(Struct, tag="depthUpdate", tag_field="e", gc=False,
+                  rename={"event_time": "E", "transaction_time": "T", "symbol": "s", "first_update_id": "U",
+                          "last_update_id": "u", "prev_update_id": "pu", "bids": "b", "asks": "a"}):
+    event_time: int
+    symbol: str
+    bids: List[Level]
+    asks: List[Level]
+    transaction_time: int = 0
+    first_update_id: int = 0
+    last_update_id: int = 0
+    prev_update_id: int = 0
+
+
+class AggTrade(Struct, tag="aggTrade", tag_field="e", gc=False,
+               rename={"event_time": "E", "trade_time": "T", "symbol": "s", "agg_id": "a", "price": "p",
+                       "amount": "q", "is_maker": "m"}):
+    event_time: int
+    trade_time: int
+    symbol: str
+    price: float
+    amount: float
+    is_maker: bool
+    agg_id: int = 0
+
+
+class BookTicker(Struct, tag="bookTicker", tag_field="e", gc=False,
+                 rename={"event_time": "E", "transaction_time": "T", "symbol": "s", "update_id": "u",
+                         "buy_price": "b", "buy_amount": "B", "sell_price": "a", "sell_amount": "A"}):
+    event_time: int
+    symbol: str
+    buy_price: float
+    buy_amount: float
+    sell_price: float
+    sell_amount: float
+    transaction_time: int = 0
+    update_id: int = 0
+
+
+class KlineInfo(Struct, gc=False,
+                rename={"open_time": "t", "close_time": "T", "interval": "i", "open_price": "o",
+                        "close_price": "c", "high_price": "h", "low_price": "l", "is_end": "x"}):
+    open_time: int
+    close_time: int
+    interval: str
+    open_price: float
+    close_price: float
+    high_price: float
+    low_price: float
+    is_end: bool
+
+
+class Kline(Struct, tag="kline", tag_field="e", gc=False,
+            rename={"event_time": "E", "symbol": "s", "kline": "k"}):
+    event_time: int
+    symbol: str
+    kline: KlineInfo
+
+
+class Ticker(Struct, tag="24hrTicker", tag_field="e", gc=False,
+             rename={"event_time": "E", "symbol": "s", "open_price": "o", "close_price": "c", "high_price": "h",
+                     "low_price": "l"}):
+    event_time: int
+    symbol: str
+    open_price: float
+    close_price: float
+    high_price: float
+    low_price: float
+
+
+BinanceEvent = Union[DepthUpdate, AggTrade, BookTicker, Kline, Ticker, List[Ticker]]
+
+if msgspec is not None:
+    # strict=False 允许把 "27300.10" 这样的字符串数字直接解析成 float
+    binance_event_decoder = msgspec.json.Decoder(BinanceEvent, strict=False)
+    decode_error = (msgspec.ValidationError, msgspec.DecodeError)
+else:
+    binance_event_decoder = PlainDecoder([DepthUpdate, AggTrade, BookTicker, Kline, Ticker])
+    decode_error = (ValueError, TypeError, KeyError, IndexError)
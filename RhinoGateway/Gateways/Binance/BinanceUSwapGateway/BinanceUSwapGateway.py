@@ -4,7 +4,8 @@ import json
 import time
 import traceback
 import urllib.parse
-from typing import NoReturn, Union, Dict, List, Callable, Any
+from operator import attrgetter
+from typing import NoReturn, Union, Dict, List, Callable, Any, Optional, Tuple
 
 from RhinoLogger.RhinoLogger.RhinoLogger import RhinoLogger
 from RhinoObject.Base.BaseEnum import Exchange, ExchangeSub, DataGetType, PositionDirection, SymbolType, KLineType, \
@@ -14,17 +15,88 @@ from RhinoObject.Rhino.RhinoObject import MixInfo, SymbolInfo, RhinoDepth, Rhino
     WebsocketListen, RhinoOrder, RhinoLeverage, CallableMethods, RhinoAccount, RhinoBalance, RhinoPosition, \
     RhinoFundingRate, RhinoKline, RhinoTicker, RhinoTickers, RhinoTrades
 from RhinoObject.RhinoRequest.RhinoRequest import RhinoRequest
-from RhinoObject.RhinoRequest.RhinoWebsocket import RhinoWebsocket
 from RhinoObject.RhinoRequest.RhunoRequestEnum import Method
 
 from RhinoGateway.Base.BaseGateway.BaseGateway import BaseGateway
+from RhinoGateway.Base.OrderBook.OrderBook import OrderBook, OrderBookManager, order_book_snapshot_limit
+from RhinoGateway.Base.RateLimit.RateLimiter import RateLimiter, RateLimit, RateRule
 from RhinoGateway.Base.RestFul.RestClient import RestClient
+from RhinoGateway.Base.RestFul.RestLane import Priority
 from RhinoGateway.Base.WebSocket.WebsocketClient import WebsocketClient
+from RhinoGateway.Base.WebSocket.WebsocketDispatch import DispatchPolicy
+from RhinoGateway.Base.WebSocket.WebsocketFeed import WebsocketFeedManager
+from RhinoGateway.Base.WebSocket.WebsocketShard import WebsocketShardManager
+from RhinoGateway.Gateways.Binance.BinanceStruct.BinanceStruct import DepthUpdate, AggTrade, BookTicker, Kline, \
+    Ticker, binance_event_decoder, decode_error
+from RhinoGateway.Util.ArrayDepth import RhinoArrayDepth
 from RhinoGateway.Util.Util import get_RhinoDepth_from_MixInfo
 
 rest_api = "https://fapi.binance.com"
 websocket_url = "wss://fstream.binance.com/ws"
 websocket_pong = 700  # 多少秒发一次 pong 进行 websocket 保活
+websocket_max_streams = 200  # 单条连接最多订阅的 stream 数量
+websocket_frame_rate = 10  # 每条连接每秒最多发送的订阅消息数
+websocket_stale_timeout = 10  # 深度快照、k 线、ticker 超过多少秒没有数据时重新订阅，秒
+websocket_partial_depths = (5, 10, 20)  # 部分深度推送支持的档位数，其他档位由增量深度维护本地订单簿
+websocket_diff_interval = 100  # 增量深度的推送间隔，毫秒
+
+
+def depth_weight(params: Dict) -> int:
+    limit = int(params.get("limit", 500))
+    if limit <= 50:
+        return 2
+    elif limit <= 100:
+        return 5
+    elif limit <= 500:
+        return 10
+    return 20
+
+
+def kline_weight(params: Dict) -> int:
+    limit = int(params.get("limit", 500))
+    if limit < 100:
+        return 1
+    elif limit < 500:
+        return 2
+    elif limit <= 1000:
+        return 5
+    return 10
+
+
+def rate_limits() -> List[RateLimit]:
+    return [
+        RateLimit("weight", 2400, 60, header="X-MBX-USED-WEIGHT-1M"),
+        RateLimit("orders_10s", 300, 10, header="X-MBX-ORDER-COUNT-10S", reserve=0),
+        RateLimit("orders_1m", 1200, 60, header="X-MBX-ORDER-COUNT-1M", reserve=0),
+    ]
+
+
+rate_rules = {
+    ("GET", "/fapi/v1/time"): RateRule({"weight": 1}),
+    ("GET", "/fapi/v1/exchangeInfo"): RateRule({"weight": 1}),
+    ("GET", "/fapi/v1/aggTrades"): RateRule({"weight": 20}),
+    ("GET", "/fapi/v1/depth"): RateRule({"weight": depth_weight}),
+    ("GET", "/fapi/v1/klines"): RateRule({"weight": kline_weight}),
+    ("GET", "/fapi/v1/premiumIndex"): RateRule({"weight": lambda params: 1 if params.get("symbol") else 10}),
+    ("GET", "/fapi/v2/balance"): RateRule({"weight": 5}),
+    ("GET", "/fapi/v2/positionRisk"): RateRule({"weight": 5}),
+    ("GET", "/fapi/v1/order"): RateRule({"weight": 1}),
+    ("GET", "/fapi/v1/allOrders"): RateRule({"weight": 5}),
+    ("GET", "/fapi/v1/openOrders"): RateRule({"weight": lambda params: 1 if params.get("symbol") else 40}),
+    ("POST", "/fapi/v1/order"): RateRule({"orders_10s": 1, "orders_1m": 1}, is_order=True),
+    ("POST", "/fapi/v1/batchOrders"): RateRule({"weight": 5, "orders_10s": 5, "orders_1m": 1}, is_order=True),
+    ("POST", "/fapi/v1/leverage"): RateRule({"weight": 1}),
+    ("DELETE", "/fapi/v1/order"): RateRule({"weight": 1}, is_order=True),
+    ("DELETE", "/fapi/v1/allOpenOrders"): RateRule({"weight": 1}, is_order=True),
+}
+
+lane_rules = {
+    ("GET", "/fapi/v1/exchangeInfo"): Priority.BULK,
+    ("GET", "/fapi/v1/aggTrades"): Priority.BULK,
+    ("GET", "/fapi/v1/klines"): Priority.BULK,
+    ("GET", "/fapi/v1/allOrders"): Priority.BULK,
+    ("POST", "/fapi/v1/leverage"): Priority.NORMAL,
+}
 
 
 class BinanceUSwapGateway(BaseGateway):
@@ -37,7 +109,7 @@ class BinanceUSwapGateway(BaseGateway):
         self.websocket = BinanceUSwapWebsocketGateway(self)
 
     async def get_time(self, symbol_info: SymbolInfo, callable_methods: CallableMethods = None) -> NoReturn:
-        pass
+        await self.rest.get_time(symbol_info, callable_methods)
 
     async def get_exchange_infos(self, symbol_info: SymbolInfo, callable_methods: CallableMethods = None) -> NoReturn:
         await self.rest.get_exchange_infos(symbol_info, callable_methods)
@@ -136,9 +208,13 @@ class BinanceUSwapGateway(BaseGateway):
 
 
 class BinanceUSwapRestGateway(RestClient):
+    warm_up_url = rest_api + "/fapi/v1/time"
 
     def __init__(self, gateway: BinanceUSwapGateway):
         super().__init__(gateway)
+        self.limiter = RateLimiter(gateway, rate_limits(), rate_rules)
+        self.lane_rules = lane_rules
+        self.hedge_paths = {"/fapi/v1/depth", "/fapi/v1/time"}
 
     async def sign(self, request: RhinoRequest) -> NoReturn:
         try:
@@ -171,6 +247,32 @@ class BinanceUSwapRestGateway(RestClient):
             self.gateway.logger.error(f"{self.gateway.exchange_sub} sign is error")
             self.gateway.logger.error(traceback.format_exc())
 
+    async def get_time(self, symbol_info: SymbolInfo, callable_methods: CallableMethods = None) -> NoReturn:
+
+        rhino_request = RhinoRequest(
+            method=Method.GET.value,
+            url=rest_api + "/fapi/v1/time",
+            params=None,
+            data=None,
+            headers=None,
+            callback=self.on_get_time,
+            on_failed=self.on_fail if callable_methods.on_failed is None else callable_methods.on_failed,
+            on_error=self.on_error if callable_methods.on_error is None else callable_methods.on_error,
+            on_transfer=self.gateway.set_data if callable_methods.on_transfer is None else callable_methods.on_transfer,
+            timeout=symbol_info.time_out,
+            extra=symbol_info,
+            on_transfer_extra_data=callable_methods.extra_data,
+            proxy=symbol_info.proxy,
+            is_sign=False
+        )
+        await self.fetch(rhino_request)
+
+    async def on_get_time(self, request: RhinoRequest, data, code: int, extra: MixInfo,
+                          on_transfer: Callable = None, on_transfer_extra_data: Any = None) -> NoReturn:
+        await on_transfer(
+            int(data.get("serverTime")), on_transfer_extra_data
+        )
+
     async def get_exchange_infos(self, symbol_info: SymbolInfo, callable_methods: CallableMethods = None) -> NoReturn:
 
         rhino_request = RhinoRequest(
@@ -296,19 +398,7 @@ class BinanceUSwapRestGateway(RestClient):
         rhino_depth.gateway_send_time = data.get("E")
         rhino_depth.rhino_get_time = int(time.time() * 1000)
 
-        bids = data.get("bids")
-        bids_len = len(bids)
-        asks = data.get("asks")
-        asks_len = len(asks)
-        for i in range(1, depth_limit + 1):
-            if i <= asks_len:
-                bid = bids[i - 1]
-                setattr(rhino_depth, f"buy_price{i}", float(bid[0]))
-                setattr(rhino_depth, f"buy_amount{i}", float(bid[1]))
-            if i <= bids_len:
-                ask = asks[i - 1]
-                setattr(rhino_depth, f"sell_price{i}", float(ask[0]))
-                setattr(rhino_depth, f"sell_amount{i}", float(ask[1]))
+        rhino_depth.set_levels(data.get("bids"), data.get("asks"), depth_limit)
         self.gateway.logger.debug(
             f"{self.gateway.exchange_sub} depth {extra.__str__()} 获取数据消耗时间 {int(time.time() * 1000) - extra.start_time}")
         await on_transfer(rhino_depth, on_transfer_extra_data)
@@ -1161,124 +1251,238 @@ class BinanceUSwapRestGateway(RestClient):
     async def on_fail(self, request: RhinoRequest, data: Union[Dict], code: int, extra: MixInfo) -> NoReturn:
         pass
 
+    async def get_depth_snapshot(self, symbol_info: SymbolInfo, callable_methods: CallableMethods = None) -> NoReturn:
+        """
+        本地订单簿同步用的深度快照，返回原始的 lastUpdateId / bids / asks
+        """
+        params = {
+            "symbol": symbol_info.real_pair,
+            "limit": order_book_snapshot_limit,
+        }
+
+        rhino_request = RhinoRequest(
+            method=Method.GET.value,
+            url=rest_api + "/fapi/v1/depth",
+            params=params,
+            data=None,
+            headers=None,
+            callback=self.on_get_depth_snapshot,
+            on_failed=self.on_fail if callable_methods.on_failed is None else callable_methods.on_failed,
+            on_error=self.on_error if callable_methods.on_error is None else callable_methods.on_error,
+            on_transfer=self.gateway.set_data if callable_methods.on_transfer is None else callable_methods.on_transfer,
+            timeout=symbol_info.time_out,
+            extra=symbol_info,
+            on_transfer_extra_data=callable_methods.extra_data,
+            is_sign=False,
+            proxy=symbol_info.proxy
+        )
+        await self.fetch(rhino_request)
+
+    async def on_get_depth_snapshot(self, request: RhinoRequest, data, code: int, extra: MixInfo,
+                                    on_transfer: Callable = None, on_transfer_extra_data: Any = None) -> NoReturn:
+        await on_transfer(data, on_transfer_extra_data)
+
 
 class BinanceUSwapWebsocketGateway(WebsocketClient):
 
     def __init__(self, gateway: BinanceUSwapGateway):
         super().__init__(gateway)
         self.depth_type = None  # 因为没办法从数据流中知道到底是单币种最佳订单还是全币种最佳订单
+        self.event_handlers = {
+            DepthUpdate: self.on_depths,
+            AggTrade: self.on_trades,
+            Kline: self.on_kline,
+            Ticker: self.on_tickers,
+            BookTicker: self.on_best_depths,
+        }
+        # depth{limit} 是部分深度快照，可以只保留最新的；成交和 k 线不能丢
+        self.stream_policies = {
+            DepthUpdate: ("@depth", DispatchPolicy.CONFLATE),
+            BookTicker: ("@bookTicker", DispatchPolicy.CONFLATE),
+            Ticker: ("@ticker", DispatchPolicy.CONFLATE),
+            AggTrade: ("@aggTrade", DispatchPolicy.LOSSLESS),
+            Kline: ("@kline", DispatchPolicy.LOSSLESS),
+        }
+        # 冗余行情去重用的序号字段，kline 和 ticker 没有序号按事件时间
+        self.event_seqs = {
+            DepthUpdate: attrgetter("last_update_id"),
+            BookTicker: attrgetter("update_id"),
+            AggTrade: attrgetter("agg_id"),
+            Kline: attrgetter("event_time"),
+            Ticker: attrgetter("event_time"),
+        }
+        # on_transfers 中的回调在订阅时取好，推送数据时不用再拼接 key 查找
+        self.depth_transfer = None
+        self.trade_transfer = None
+        self.kline_transfer = None
+        self.ticker_transfer = None
+        self.keepalive_interval = websocket_pong
+        self.stream_names: Dict[tuple, str] = {}  # (数据类型, 币对) -> stream，全市场 stream 的币对是 None
+        self.feeds = WebsocketFeedManager(self, max_streams=websocket_max_streams, frame_rate=websocket_frame_rate)
+        self.order_book = False  # 为 True 时 5/10/20 档也用增量深度维护本地订单簿
+        self.books = OrderBookManager(gateway, self.fetch_book, self.on_book, prev_id=True)
 
     async def subscribe(self, symbol_infos: SymbolInfos, callable_methods: CallableMethods = None):
         super().subscribe(symbol_infos, callable_methods)
+        self.depth_transfer = self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINODEPTH.value)
+        self.trade_transfer = self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINOTRADE.value)
+        self.kline_transfer = self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINOKLINE.value)
+        self.ticker_transfer = self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINOTICKER.value)
         symbol_infos: List[SymbolInfo] = symbol_infos.symbols.get(self.gateway.exchange_sub)
+        subscribe_list = self.get_streams(symbol_infos)
+        self.streams = dict.fromkeys(subscribe_list)
+
+        # 按 stream 数量和推送频率分到多条连接，SUBSCRIBE 分批限速发送
+        self.shards = WebsocketShardManager(
+            self,
+            url=websocket_url,
+            proxy=symbol_infos[-1].proxy,
+            max_streams=websocket_max_streams,
+            frame_rate=websocket_frame_rate,
+        )
+        await self.shards.subscribe(subscribe_list)
+
+    def get_streams(self, symbol_infos: List[SymbolInfo]) -> List[str]:
+        # 数据按 BinanceStruct 的类型分发，不需要注册路由，只记录数据类型和币对对应的 stream
         subscribe_list = []
         all_ticker = False
         all_best_depth = False
         for symbol_info in symbol_infos:
             symbol_methods: List[Union[MethodEnum]] = symbol_info.symbol_methods
+            symbol = symbol_info.real_pair.upper()
             for symbol_method in symbol_methods:
                 if symbol_method == MethodEnum.GETDEPTHS.value:
-                    depth_limit = symbol_info.rhino_depth.depth_limit
+                    depth_limit = int(symbol_info.rhino_depth.depth_limit)
                     interval = symbol_info.rhino_depth.interval
                     depth_type = symbol_info.rhino_depth.depth_type
-                    if depth_type == DepthType.SYMBOL.value:
-                        subscribe_list.append(f"{symbol_info.real_pair}@depth{depth_limit}@{interval}ms")
+                    if depth_type == DepthType.SYMBOL.value and (self.order_book or
+                                                                 depth_limit not in websocket_partial_depths):
+                        # 增量深度不能丢，按 interval 输出前 depth_limit 档
+                        stream, key = f"{symbol_info.real_pair}@depth@{websocket_diff_interval}ms", (DepthUpdate, symbol)
+                        self.books.add(symbol, stream, depth_limit, int(interval) / 1000)
+                    elif depth_type == DepthType.SYMBOL.value:
+                        stream, key = f"{symbol_info.real_pair}@depth{depth_limit}@{interval}ms", (DepthUpdate, symbol)
                     elif depth_type == DepthType.SYMBOLBEST.value:
-                        subscribe_list.append(f"{symbol_info.real_pair}@bookTicker")
+                        stream, key = f"{symbol_info.real_pair}@bookTicker", (BookTicker, symbol)
                     elif depth_type == DepthType.BESTALL.value and not all_best_depth:
-                        subscribe_list.append(f"!bookTicker")
+                        stream, key = f"!bookTicker", (BookTicker, None)
                         all_best_depth = True
+                    else:
+                        continue
                 elif symbol_method == MethodEnum.GETTRADES.value:
-                    subscribe_list.append(f"{symbol_info.real_pair}@aggTrade")
+                    stream, key = f"{symbol_info.real_pair}@aggTrade", (AggTrade, symbol)
                 elif symbol_method == MethodEnum.GETKLINE.value:
                     k_line_type = self.gateway.get_kline_type(symbol_info.rhino_kline.k_line_type)
-                    subscribe_list.append(f"{symbol_info.real_pair}@kline_{k_line_type}")
+                    stream, key = f"{symbol_info.real_pair}@kline_{k_line_type}", (Kline, symbol)
                 elif symbol_method == MethodEnum.GETTICKER.value:
                     rhino_ticker_type = symbol_info.rhino_ticker.ticker_type
                     if rhino_ticker_type == TickerType.ALL.value:
-                        if not all_ticker:
-                            subscribe_list.append(f"!ticker@arr")
-                            self.depth_type = "ALL"
-                            all_ticker = True
+                        if all_ticker:
+                            continue
+                        stream, key = f"!ticker@arr", (list, None)
+                        self.depth_type = "ALL"
+                        all_ticker = True
                     else:
-                        subscribe_list.append(f"{symbol_info.real_pair}@ticker")
-
-        self.subscribe_data = ('{"method": "SUBSCRIBE","params":' + str(subscribe_list) + ',"id": 1}').replace('\'',
-                                                                                                               '"')
-        self.unsubscribe_data = ('{"method": "UNSUBSCRIBE","params":' + str(subscribe_list) + ',"id": 1}').replace('\'',
-                                                                                                                   '"')
-        rhino_websocket = RhinoWebsocket(
-            url=websocket_url,
-            on_connected=self.on_connected,
-            on_receive=self.on_received,
-            proxy=symbol_info.proxy
-        )
-        self.rhino_websocket = rhino_websocket
-        await self.connect(rhino_websocket)
+                        stream, key = f"{symbol_info.real_pair}@ticker", (Ticker, symbol)
+                else:
+                    continue
+                subscribe_list.append(stream)
+                self.stream_names[key] = stream
+                self.stream_infos[stream] = symbol_info
+        return subscribe_list
+
+    def stream_timeout(self, stream: str) -> Optional[float]:
+        # 成交和 bookTicker 没有成交/变化时不推送，不检查
+        if "@depth" in stream or "@kline" in stream or "@ticker" in stream or stream == "!ticker@arr":
+            return websocket_stale_timeout
+        return None
+
+    def poll_method(self, stream: str) -> Optional[Tuple[Callable, RhinoDataType]]:
+        if "@depth" in stream:
+            return self.gateway.get_depths, RhinoDataType.RHINODEPTH
+        return None
+
+    def decode(self, data: Union[str, bytes]) -> Any:
+        # 行情推送直接解析成 BinanceStruct 中的结构，订阅回报等其他消息按普通 json 解析
+        try:
+            return binance_event_decoder.decode(data)
+        except decode_error:
+            return super().decode(data)
+
+    def event_time(self, data: Any) -> Optional[int]:
+        if isinstance(data, list):
+            return data[0].event_time if len(data) > 0 else None
+        return getattr(data, "event_time", None)
+
+    def event_seq(self, data: Any) -> Optional[int]:
+        if isinstance(data, list):
+            return data[0].event_time if len(data) > 0 else None
+        seq = self.event_seqs.get(type(data), None)
+        if seq is None:
+            return None
+        return seq(data)
+
+    def stream_key(self, data: Any) -> Optional[Tuple[str, DispatchPolicy]]:
+        if isinstance(data, list):
+            return "!ticker@arr", DispatchPolicy.CONFLATE
+        policy = self.stream_policies.get(type(data), None)
+        if policy is None:
+            return None
+        # 返回订阅时的 stream 名字，静默检查按它记录最后收到数据的时间
+        stream = self.stream_names.get((type(data), data.symbol)) or self.stream_names.get((type(data), None))
+        if stream is None:
+            stream = data.symbol + policy[0]
+        # 部分深度和增量深度都是 DepthUpdate，维护本地订单簿的币对不能覆盖
+        if policy[0] == "@depth" and data.symbol in self.books.books:
+            return stream, DispatchPolicy.LOSSLESS
+        return stream, policy[1]
 
     async def on_received(self, data):
         try:
             if isinstance(data, list):
-                channel = data[0].get("e", None)
+                handler = self.on_tickers
             else:
-                channel = data.get("e", None)
-
-            if channel is None:
-                self.gateway.logger.error(f"{self.gateway.exchange_sub} websocket channel 为 None {data}")
+                handler = self.event_handlers.get(type(data), None)
+            if handler is None:
+                if isinstance(data, dict) and "result" in data:
+                    self.gateway.logger.info(f"{self.gateway.exchange_sub} websocket 回报 {data}")
+                else:
+                    self.gateway.logger.error(f"{self.gateway.exchange_sub} websocket channel 为 None {data}")
                 return
-            if "depth" in channel:
-                await self.on_depths(data)
-            elif "aggTrade" in channel:
-                await self.on_trades(data)
-            elif "kline" in channel:
-                await self.on_kline(data)
-            elif "24hrTicker" in channel:
-                await self.on_tickers(data)
-            elif "bookTicker" in channel:
-                await self.on_best_depths(data)
-
-            # 进行 ping/pong 保活
-            if time.time() - self.websocket_time > websocket_pong:
-                await self.pong(b"pong")
-                self.websocket_time = time.time()
+            await handler(data)
 
         except Exception as e:
             self.gateway.logger.error(f"解析 websocket receive 有错误")
             self.gateway.logger.error(traceback.format_exc())
 
-    async def on_best_depths(self, data):
+    async def on_best_depths(self, data: BookTicker):
         try:
-            symbol = data.get("s").upper()
+            symbol = data.symbol
             rhino_depth = RhinoDepth(
                 real_pair=symbol,
                 cex_exchange_sub=self.gateway.exchange_sub,
                 data_get_type=DataGetType.WEBSOCKET.value,
                 cex_type=SymbolType.USWAP.value,
-                gateway_send_time=int(data.get("E")),
+                gateway_send_time=data.event_time,
                 rhino_get_time=int(time.time() * 1000),
             )
-            rhino_depth.buy_price1 = float(data.get("b"))
-            rhino_depth.buy_amount1 = float(data.get("B"))
-            rhino_depth.sell_price1 = float(data.get("a"))
-            rhino_depth.sell_amount1 = float(data.get("A"))
+            rhino_depth.buy_price1 = data.buy_price
+            rhino_depth.buy_amount1 = data.buy_amount
+            rhino_depth.sell_price1 = data.sell_price
+            rhino_depth.sell_amount1 = data.sell_amount
             self.gateway.logger.debug(
                 f"websocket 推送数据成功 {self.gateway.exchange_sub} {symbol} best depth")
             # await self.on_transfer(rhino_depth)
-            await self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINODEPTH.value)(rhino_depth)
-            websocket_listen = WebsocketListen(
-                time=int(1000 * time.time()),
-                gateway=self.gateway.exchange_sub,
-            )
+            await self.depth_transfer(rhino_depth)
             if self.depth_type is None:
-                websocket_listen.key = "BEST" + symbol + MethodEnum.GETDEPTHS.value
+                self.heart.beat("BEST" + symbol + MethodEnum.GETDEPTHS.value)
             else:
-                websocket_listen.key = "ALL" + MethodEnum.GETDEPTHS.value
-            await self.on_heart(websocket_listen)
+                self.heart.beat("ALL" + MethodEnum.GETDEPTHS.value)
         except Exception as e:
             self.gateway.logger.error(f"{self.gateway.exchange_sub} 解析 websocket best depth 数据错误")
             self.gateway.logger.error(traceback.format_exc())
 
-    async def on_tickers(self, data):
+    async def on_tickers(self, data: Union[Ticker, List[Ticker]]):
         try:
             symbol = None
             rhino_ticker_object = None
@@ -1292,139 +1496,126 @@ class BinanceUSwapWebsocketGateway(WebsocketClient):
                     rhino_ticker_object.ticker_list.append(self.on_ticker(d))
             else:
                 rhino_ticker_object = self.on_ticker(data)
-                symbol = data.get("s").upper()
+                symbol = data.symbol
 
             self.gateway.logger.debug(
                 f"websocket 推送数据成功 {self.gateway.exchange_sub} ticker")
             # await self.on_transfer(rhino_ticker_object)
-            await self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINOTICKER.value)(
-                rhino_ticker_object)
-            websocket_listen = WebsocketListen(
-                time=int(1000 * time.time()),
-                gateway=self.gateway.exchange_sub,
-                key=symbol + MethodEnum.GETKLINE.value
-            )
-            await self.on_heart(websocket_listen)
+            await self.ticker_transfer(rhino_ticker_object)
+            self.heart.beat(symbol + MethodEnum.GETKLINE.value)
         except Exception as e:
             self.gateway.logger.error(f"{self.gateway.exchange_sub} 解析 websocket ticker 数据错误")
             self.gateway.logger.error(traceback.format_exc())
 
-    def on_ticker(self, data) -> RhinoTicker:
-        symbol = data.get("s").upper()
+    def on_ticker(self, data: Ticker) -> RhinoTicker:
         rhino_ticker = RhinoTicker(
-            real_pair=symbol,
+            real_pair=data.symbol,
             cex_exchange_sub=self.gateway.exchange_sub,
             data_get_type=DataGetType.WEBSOCKET.value,
             data_type=RhinoDataType.RHINOKLINE.value,
             cex_type=SymbolType.USWAP.value,
-            gateway_send_time=int(data.get("E")),
+            gateway_send_time=data.event_time,
             rhino_get_time=int(time.time() * 1000)
         )
-        rhino_ticker.open_price = float(data.get("o"))
-        rhino_ticker.close_price = float(data.get("c"))
-        rhino_ticker.trade_price = float(data.get("c"))
-        rhino_ticker.high_price = float(data.get("h"))
-        rhino_ticker.low_price = float(data.get("l"))
+        rhino_ticker.open_price = data.open_price
+        rhino_ticker.close_price = data.close_price
+        rhino_ticker.trade_price = data.close_price
+        rhino_ticker.high_price = data.high_price
+        rhino_ticker.low_price = data.low_price
         return rhino_ticker
 
-    async def on_kline(self, data):
+    async def on_kline(self, data: Kline):
         try:
-            symbol = data.get("s").upper()
-            kline_info = data.get("k")
+            symbol = data.symbol
+            kline_info = data.kline
             rhino_kline = RhinoKline(
                 real_pair=symbol,
                 cex_exchange_sub=self.gateway.exchange_sub,
                 data_get_type=DataGetType.WEBSOCKET.value,
                 data_type=RhinoDataType.RHINOKLINE.value,
                 cex_type=SymbolType.USWAP.value,
-                gateway_send_time=int(data.get("E")),
+                gateway_send_time=data.event_time,
                 rhino_get_time=int(time.time() * 1000),
             )
-            rhino_kline.open_price = float(kline_info.get("o"))
-            rhino_kline.close_price = float(kline_info.get("c"))
-            rhino_kline.high_price = float(kline_info.get("h"))
-            rhino_kline.low_price = float(kline_info.get("l"))
-            rhino_kline.is_end = kline_info.get("x")
+            rhino_kline.open_price = kline_info.open_price
+            rhino_kline.close_price = kline_info.close_price
+            rhino_kline.high_price = kline_info.high_price
+            rhino_kline.low_price = kline_info.low_price
+            rhino_kline.is_end = kline_info.is_end
             self.gateway.logger.debug(
                 f"websocket 推送数据成功 {self.gateway.exchange_sub} kline {rhino_kline.real_pair} {rhino_kline.k_line_type} {rhino_kline.is_end} {rhino_kline.high_price}  {rhino_kline.low_price}")
             # await self.on_transfer(rhino_kline)
-            await self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINOKLINE.value)(rhino_kline)
-            websocket_listen = WebsocketListen(
-                time=int(1000 * time.time()),
-                gateway=self.gateway.exchange_sub,
-                key=symbol + MethodEnum.GETKLINE.value
-            )
-            await self.on_heart(websocket_listen)
+            await self.kline_transfer(rhino_kline)
+            self.heart.beat(symbol + MethodEnum.GETKLINE.value)
         except Exception as e:
             self.gateway.logger.error(f"{self.gateway.exchange_sub} 解析 websocket kline 数据错误")
             self.gateway.logger.error(traceback.format_exc())
 
-    async def on_trades(self, data):
+    async def on_trades(self, data: AggTrade):
         try:
-            symbol = data.get("s").upper()
+            symbol = data.symbol
             rhino_trade = RhinoTrade(
                 real_pair=symbol,
                 cex_exchange_sub=self.gateway.exchange_sub,
                 data_get_type=DataGetType.WEBSOCKET.value,
                 data_type=RhinoDataType.RHINOTRADE.value,
                 cex_type=SymbolType.USWAP.value,
-                # gateway_send_time=int(data.get("E")),
+                # gateway_send_time=data.event_time,
                 rhino_get_time=int(time.time() * 1000),
-                gateway_send_time=int(data.get("T"))
+                gateway_send_time=data.trade_time
             )
-            rhino_trade.amount = float(data.get("q"))
-            rhino_trade.price = float(data.get("p"))
-            rhino_trade.direction = PositionDirection.SHORT.value if data.get(
-                "m") is True else PositionDirection.LONG.value
+            rhino_trade.amount = data.amount
+            rhino_trade.price = data.price
+            rhino_trade.direction = PositionDirection.SHORT.value if data.is_maker else PositionDirection.LONG.value
             self.gateway.logger.debug(
                 f"websocket 推送数据成功 {self.gateway.exchange_sub} trade {rhino_trade.real_pair} {rhino_trade.amount} {rhino_trade.price}  {rhino_trade.direction}")
             # await self.on_transfer(rhino_trade)
-            await self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINOTRADE.value)(rhino_trade)
-            websocket_listen = WebsocketListen(
-                time=int(1000 * time.time()),
-                gateway=self.gateway.exchange_sub,
-                key=symbol + MethodEnum.GETTRADES.value
-            )
-            await self.on_heart(websocket_listen)
+            await self.trade_transfer(rhino_trade)
+            self.heart.beat(symbol + MethodEnum.GETTRADES.value)
         except Exception as e:
             self.gateway.logger.error(f"{self.gateway.exchange_sub} 解析 websocket trade 数据错误")
             self.gateway.logger.error(traceback.format_exc())
 
-    async def on_depths(self, data):
+    async def on_depths(self, data: DepthUpdate):
         try:
-            symbol = data.get("s").upper()
-            depth_limit = len(data.get("b"))
-            rhino_depth = RhinoDepth(
+            symbol = data.symbol
+            if symbol in self.books.books:
+                await self.books.on_diff(symbol, data.first_update_id, data.last_update_id, data.prev_update_id,
+                                         data.bids, data.asks, data.event_time, data.transaction_time)
+                self.heart.beat(symbol + MethodEnum.GETDEPTHS.value)
+                return
+            rhino_depth = RhinoArrayDepth(
                 real_pair=symbol,
                 cex_exchange_sub=self.gateway.exchange_sub,
                 data_get_type=DataGetType.WEBSOCKET.value,
                 cex_type=SymbolType.USWAP.value,
-                gateway_send_time=int(data.get("E")),
+                gateway_send_time=data.event_time,
                 rhino_get_time=int(time.time() * 1000),
             )
-            bids = data.get("b", {})
-            bids_len = len(bids)
-            asks = data.get("a", {})
-            asks_len = len(asks)
-            for i in range(1, depth_limit + 1):
-                if i <= asks_len:
-                    bid = bids[i - 1]
-                    setattr(rhino_depth, f"buy_price{i}", float(bid[0]))
-                    setattr(rhino_depth, f"buy_amount{i}", float(bid[1]))
-                if i <= bids_len:
-                    ask = asks[i - 1]
-                    setattr(rhino_depth, f"sell_price{i}", float(ask[0]))
-                    setattr(rhino_depth, f"sell_amount{i}", float(ask[1]))
+            rhino_depth.set_levels(data.bids, data.asks)
             self.gateway.logger.debug(
                 f"websocket 推送数据成功 {self.gateway.exchange_sub} depth {rhino_depth.real_pair}")
             # await self.on_transfer(rhino_depth)
-            await self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINODEPTH.value)(rhino_depth)
-            websocket_listen = WebsocketListen(
-                time=int(1000 * time.time()),
-                gateway=self.gateway.exchange_sub,
-                key=symbol + MethodEnum.GETDEPTHS.value
-            )
-            await self.on_heart(websocket_listen)
+            await self.depth_transfer(rhino_depth)
+            self.heart.beat(symbol + MethodEnum.GETDEPTHS.value)
         except Exception as e:
             self.gateway.logger.error(f"{self.gateway.exchange_sub} 解析 websocket depth 数据错误")
             self.gateway.logger.error(traceback.format_exc())
+
+    async def fetch_book(self, book: OrderBook) -> Dict:
+        return await self.gateway.call(self.gateway.rest.get_depth_snapshot, self.stream_infos[book.stream])
+
+    async def on_book(self, book: OrderBook):
+        rhino_depth = RhinoArrayDepth(
+            real_pair=book.symbol,
+            cex_exchange_sub=self.gateway.exchange_sub,
+            data_get_type=DataGetType.WEBSOCKET.value,
+            cex_type=SymbolType.USWAP.value,
+            gateway_send_time=book.event_time,
+            rhino_get_time=int(time.time() * 1000),
+        )
+        rhino_depth.data_calcu_time = book.transaction_time
+        book.fill(rhino_depth)
+        self.gateway.logger.debug(
+            f"websocket 推送数据成功 {self.gateway.exchange_sub} order book {book.symbol} {book.last_update_id}")
+        await self.depth_transfer(rhino_depth)
@@ -117,6 +117,7 @@ class GateSpotGateway(BaseGateway):
 
 
 class GateSpotRestGateway(RestClient):
+    warm_up_url = rest_api + "/spot/time"
 
     def __init__(self, gateway: GateSpotGateway):
         super().__init__(gateway)
@@ -196,19 +197,7 @@ class GateSpotRestGateway(RestClient):
         rhino_depth.gateway_send_time = data.get("current")
         rhino_depth.rhino_get_time = int(time.time() * 1000)
 
-        bids = data.get("bids")
-        bids_len = len(bids)
-        asks = data.get("asks")
-        asks_len = len(asks)
-        for i in range(1, depth_limit + 1):
-            if i <= asks_len:
-                bid = bids[i - 1]
-                setattr(rhino_depth, f"buy_price{i}", float(bid[0]))
-                setattr(rhino_depth, f"buy_amount{i}", float(bid[1]))
-            if i <= bids_len:
-                ask = asks[i - 1]
-                setattr(rhino_depth, f"sell_price{i}", float(ask[0]))
-                setattr(rhino_depth, f"sell_amount{i}", float(ask[1]))
+        rhino_depth.set_levels(data.get("bids"), data.get("asks"), depth_limit)
         # self.gateway.logger.debug(
         #     f"{self.gateway.exchange_sub} depth {extra.__str__()} 获取数据消耗时间 {int(time.time() * 1000) - extra.start_time}")
         # await self.gateway.set_data(rhino_depth)
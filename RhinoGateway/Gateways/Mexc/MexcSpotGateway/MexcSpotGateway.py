@@ -1,11 +1,14 @@
+import copy
 import hashlib
 import hmac
 import time
 import traceback
-from typing import NoReturn, Union, Dict, List, Any, Callable
+from operator import itemgetter
+from typing import NoReturn, Union, Dict, List, Any, Callable, Optional, Tuple
 
 from RhinoLogger.RhinoLogger.RhinoLogger import RhinoLogger
-from RhinoObject.Base.BaseEnum import Exchange, ExchangeSub, CexOrderForceType, Chain, WithdrawStatus, OrderDirection
+from RhinoObject.Base.BaseEnum import Exchange, ExchangeSub, CexOrderForceType, Chain, WithdrawStatus, OrderDirection, \
+    DataGetType
 from RhinoObject.Rhino.RhinoEnum import MethodEnum, RhinoDataType
 from RhinoObject.Rhino.RhinoObject import MixInfo, SymbolInfo, RhinoConfig, SymbolInfos, RhinoOrder, \
     RhinoLeverage, CallableMethods, RhinoAccount, RhinoFundingRate, RhinoKline, RhinoTrade, RhinoBalance, \
@@ -15,13 +18,62 @@ from RhinoObject.RhinoRequest.RhinoWebsocket import RhinoWebsocket
 from RhinoObject.RhinoRequest.RhunoRequestEnum import Method
 
 from RhinoGateway.Base.BaseGateway.BaseGateway import BaseGateway
+from RhinoGateway.Base.OrderBook.OrderBook import OrderBook, OrderBookManager, order_book_snapshot_limit
+from RhinoGateway.Base.RateLimit.RateLimiter import RateLimiter, RateLimit, RateRule
 from RhinoGateway.Base.RestFul.RestClient import RestClient
+from RhinoGateway.Base.RestFul.RestLane import Priority
 from RhinoGateway.Base.WebSocket.WebsocketClient import WebsocketClient
+from RhinoGateway.Base.WebSocket.WebsocketDispatch import DispatchPolicy
+from RhinoGateway.Base.WebSocket.WebsocketFeed import WebsocketFeedManager
+from RhinoGateway.Base.WebSocket.WebsocketRouter import StreamRoute
+from RhinoGateway.Gateways.Mexc.MexcStruct.MexcProto import decode_push, protobuf_available
+from RhinoGateway.Util.ArrayDepth import RhinoArrayDepth
 from RhinoGateway.Util.Util import get_RhinoDepth_from_MixInfo
 
 rest_api = "https://api.mexc.com"
 websocket_url = "wss://wbs.mexc.com/ws"
-websocket_pong = 700  # 多少秒发一次 pong 进行 websocket 保活
+websocket_pong = 20  # 多少秒发一次 PING 进行 websocket 保活，mexc 1 分钟没有数据会断开连接
+websocket_stale_timeout = 60  # bookTicker、增量深度超过多少秒没有数据时重新订阅，秒
+websocket_max_streams = 30  # 冗余行情单条连接最多订阅的 stream 数量，mexc 限制 30 个
+websocket_protobuf = False  # 订阅 protobuf 推送，数据是 BINARY 消息，解析后和 json 推送走同样的处理函数
+# protobuf 推送比 json 小 35% 到 45%，但 CPython 下逐档读取 protobuf 字段比 orjson / msgspec 解析 json 慢，
+# 单条消息 CPU 耗时更高，只在带宽受限或者需要 100ms 聚合推送时打开，见 benchmark/bench_mexc_proto.py
+json_channels = {
+    MethodEnum.GETTICKER.value: "spot@public.bookTicker.v3.api@",
+    MethodEnum.GETTRADES.value: "spot@public.deals.v3.api@",
+    MethodEnum.GETSUBDEPTHS.value: "spot@public.increase.depth.v3.api@",
+}
+level_values = itemgetter("p", "v")  # 增量深度的档位 {"p": 价格, "v": 数量} 转成 (价格, 数量)
+protobuf_channels = {
+    MethodEnum.GETTICKER.value: "spot@public.aggre.bookTicker.v3.api.pb@100ms@",
+    MethodEnum.GETTRADES.value: "spot@public.aggre.deals.v3.api.pb@100ms@",
+    MethodEnum.GETSUBDEPTHS.value: "spot@public.aggre.depth.v3.api.pb@100ms@",
+}
+
+
+def rate_limits() -> List[RateLimit]:
+    # mexc 没有返回已用权重的响应头，只按文档的 10 秒 500 权重限频
+    return [RateLimit("weight", 500, 10)]
+
+
+rate_rules = {
+    ("GET", "/api/v3/time"): RateRule({"weight": 1}),
+    ("GET", "/api/v3/depth"): RateRule({"weight": 1}),
+    ("GET", "/api/v3/ticker/bookTicker"): RateRule({"weight": 1}),
+    ("GET", "/api/v3/capital/config/getall"): RateRule({"weight": 10}),
+    ("GET", "/api/v3/account"): RateRule({"weight": 10}),
+    ("GET", "/api/v3/allOrders"): RateRule({"weight": 10}),
+    ("GET", "/api/v3/capital/withdraw/history"): RateRule({"weight": 1}),
+    ("POST", "/api/v3/order"): RateRule({"weight": 1}, is_order=True),
+    ("POST", "/api/v3/capital/withdraw/apply"): RateRule({"weight": 1}),
+}
+
+lane_rules = {
+    ("GET", "/api/v3/capital/config/getall"): Priority.BULK,
+    ("GET", "/api/v3/allOrders"): Priority.BULK,
+    ("GET", "/api/v3/capital/withdraw/history"): Priority.BULK,
+    ("POST", "/api/v3/capital/withdraw/apply"): Priority.NORMAL,
+}
 
 
 class MexcSpotGateway(BaseGateway):
@@ -34,7 +86,7 @@ class MexcSpotGateway(BaseGateway):
         self.websocket = MexcSpotWebsocketGateway(self)
 
     async def get_time(self, symbol_info: SymbolInfo, callable_methods: CallableMethods = None) -> NoReturn:
-        pass
+        await self.rest.get_time(symbol_info, callable_methods)
 
     async def get_exchange_infos(self, symbol_info: SymbolInfo, callable_methods: CallableMethods = None) -> NoReturn:
         await self.rest.get_exchange_infos(symbol_info, callable_methods)
@@ -123,9 +175,12 @@ class MexcSpotGateway(BaseGateway):
 
 
 class MexcSpotRestGateway(RestClient):
+    warm_up_url = rest_api + "/api/v3/time"
 
     def __init__(self, gateway: MexcSpotGateway):
         super().__init__(gateway)
+        self.limiter = RateLimiter(gateway, rate_limits(), rate_rules)
+        self.lane_rules = lane_rules
 
     async def sign(self, request: RhinoRequest):
         try:
@@ -163,6 +218,32 @@ class MexcSpotRestGateway(RestClient):
             self.gateway.logger.error(f"{self.gateway.exchange_sub} sign is error")
             self.gateway.logger.error(traceback.format_exc())
 
+    async def get_time(self, symbol_info: SymbolInfo, callable_methods: CallableMethods = None) -> NoReturn:
+
+        rhino_request = RhinoRequest(
+            method=Method.GET.value,
+            url=rest_api + "/api/v3/time",
+            params=None,
+            data=None,
+            headers=None,
+            callback=self.on_get_time,
+            on_failed=self.on_fail if callable_methods.on_failed is None else callable_methods.on_failed,
+            on_error=self.on_error if callable_methods.on_error is None else callable_methods.on_error,
+            on_transfer=self.gateway.set_data if callable_methods.on_transfer is None else callable_methods.on_transfer,
+            timeout=symbol_info.time_out,
+            extra=symbol_info,
+            on_transfer_extra_data=callable_methods.extra_data,
+            is_sign=False,
+            proxy=symbol_info.proxy
+        )
+        await self.fetch(rhino_request)
+
+    async def on_get_time(self, request: RhinoRequest, data, code: int, extra: MixInfo,
+                          on_transfer: Callable = None, on_transfer_extra_data: Any = None) -> NoReturn:
+        await on_transfer(
+            int(data.get("serverTime")), on_transfer_extra_data
+        )
+
     async def get_depths(self, symbol_info: SymbolInfo, callable_methods: CallableMethods = None) -> NoReturn:
         depth_limit = symbol_info.depth_limit
         real_pair = symbol_info.real_pair
@@ -211,19 +292,7 @@ class MexcSpotRestGateway(RestClient):
         rhino_depth.gateway_send_time = 0
         rhino_depth.rhino_get_time = int(time.time() * 1000)
 
-        bids = data.get("bids")
-        bids_len = len(bids)
-        asks = data.get("asks")
-        asks_len = len(asks)
-        for i in range(1, depth_limit + 1):
-            if i <= asks_len:
-                bid = bids[i - 1]
-                setattr(rhino_depth, f"buy_price{i}", float(bid[0]))
-                setattr(rhino_depth, f"buy_amount{i}", float(bid[1]))
-            if i <= bids_len:
-                ask = asks[i - 1]
-                setattr(rhino_depth, f"sell_price{i}", float(ask[0]))
-                setattr(rhino_depth, f"sell_amount{i}", float(ask[1]))
+        rhino_depth.set_levels(data.get("bids"), data.get("asks"), depth_limit)
         # self.gateway.logger.debug(
         #     f"{self.gateway.exchange_sub} depth {extra.__str__()} 获取数据消耗时间 {int(time.time() * 1000) - extra.start_time}")
         # await self.gateway.set_data(rhino_depth)
@@ -675,49 +744,202 @@ class MexcSpotRestGateway(RestClient):
     async def on_fail(self, request: RhinoRequest, data: Union[Dict], code: int, extra: MixInfo) -> NoReturn:
         pass
 
+    async def get_depth_snapshot(self, symbol_info: SymbolInfo, callable_methods: CallableMethods = None) -> NoReturn:
+        """
+        本地订单簿同步用的深度快照，返回原始的 lastUpdateId / bids / asks
+        """
+        params = {
+            "symbol": symbol_info.real_pair,
+            "limit": order_book_snapshot_limit,
+        }
+        rhino_request = RhinoRequest(
+            method=Method.GET.value,
+            url=rest_api + "/api/v3/depth",
+            params=params,
+            data=None,
+            headers=None,
+            callback=self.on_get_depth_snapshot,
+            on_failed=self.on_fail if callable_methods.on_failed is None else callable_methods.on_failed,
+            on_error=self.on_error if callable_methods.on_error is None else callable_methods.on_error,
+            on_transfer=self.gateway.set_data if callable_methods.on_transfer is None else callable_methods.on_transfer,
+            timeout=symbol_info.time_out,
+            extra=symbol_info,
+            on_transfer_extra_data=callable_methods.extra_data,
+            is_sign=False,
+            proxy=symbol_info.proxy
+        )
+        await self.fetch(rhino_request)
+
+    async def on_get_depth_snapshot(self, request: RhinoRequest, data, code: int, extra: MixInfo,
+                                    on_transfer: Callable = None, on_transfer_extra_data: Any = None) -> NoReturn:
+        await on_transfer(data, on_transfer_extra_data)
+
 
 class MexcSpotWebsocketGateway(WebsocketClient):
+    subscribe_method = "SUBSCRIPTION"
+    unsubscribe_method = "UNSUBSCRIPTION"
+    # mexc 需要文本消息 {"method":"PING"}，websocket 的 pong 帧不算
+    keepalive_message = '{"method":"PING"}'
 
-    def __init__(self, gateway: MexcSpotGateway):
+    def __init__(self, gateway: MexcSpotGateway, protobuf: bool = websocket_protobuf):
         super().__init__(gateway)
+        self.keepalive_interval = websocket_pong
+        if protobuf and not protobuf_available:
+            raise ImportError("订阅 mexc protobuf 推送需要安装 protobuf")
+        self.channels = protobuf_channels if protobuf else json_channels
+        self.feeds = WebsocketFeedManager(self, max_streams=websocket_max_streams)
+        # 增量深度按版本号 r 维护本地订单簿，GETDEPTHS 按 interval 输出前 depth_limit 档，
+        # GETSUBDEPTHS 输出校验过版本连续的增量，每次同步完成后先输出一次完整的订单簿
+        self.books = OrderBookManager(gateway, self.fetch_book, self.on_book, prev_id=False, on_sync=self.on_book_sync)
+        self.diff_symbols = set()  # 订阅了 GETSUBDEPTHS 的币对
+        # GETDEPTHS 和 GETSUBDEPTHS 共用增量深度 channel，只注册一个路由，币对 -> {方法: 心跳 key}
+        self.depth_hearts: Dict[str, Dict[str, str]] = {}
+        self.depth_transfer = None
+        self.sub_depth_transfer = None
 
     async def subscribe(self, symbol_infos: SymbolInfos, callable_methods: CallableMethods = None):
         super().subscribe(symbol_infos, callable_methods)
+        self.depth_transfer = self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINODEPTH.value)
+        self.sub_depth_transfer = self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINOSUBDEPTH.value)
         symbol_infos: List[SymbolInfo] = symbol_infos.symbols.get(self.gateway.exchange_sub)
-        subscribe_list = []
-        for symbol_info in symbol_infos:
-            if isinstance(symbol_info.symbol_method, str):
-                symbol_method = symbol_info.symbol_method
-                if symbol_method == MethodEnum.GETTICKER.value:
-                    subscribe_list.append("spot@public.bookTicker.v3.api@" + symbol_info.real_pair)
-                if symbol_method == MethodEnum.GETTRADES.value:
-                    subscribe_list.append("spot@public.deals.v3.api@" + symbol_info.real_pair)
-                if symbol_method == MethodEnum.GETSUBDEPTHS.value:
-                    subscribe_list.append("spot@public.increase.depth.v3.api@" + symbol_info.real_pair)
-            else:
-                for symbol_method in symbol_info.symbol_method:
-                    if symbol_method == MethodEnum.GETTICKER.value:
-                        subscribe_list.append("spot@public.bookTicker.v3.api@" + symbol_info.real_pair)
-                    if symbol_method == MethodEnum.GETTRADES.value:
-                        subscribe_list.append("spot@public.deals.v3.api@" + symbol_info.real_pair)
-                    if symbol_method == MethodEnum.GETSUBDEPTHS.value:
-                        subscribe_list.append("spot@public.increase.depth.v3.api@" + symbol_info.real_pair)
-
-        self.subscribe_data = ('{"method": "SUBSCRIPTION","params":' + str(subscribe_list) + '}').replace('\'',
-                                                                                                          '"')
-        self.unsubscribe_data = ('{"method": "UNSUBSCRIPTION","params":' + str(subscribe_list) + '}').replace('\'',
-                                                                                                              '"')
-        self.send_data = subscribe_list
+        # 订阅消息在 on_connected 中按 streams 发送，重连后也会带上 add_streams 新增的 stream
+        self.streams = dict.fromkeys(self.get_streams(symbol_infos))
 
         rhino_websocket = RhinoWebsocket(
             url=websocket_url,
             on_connected=self.on_connected,
             on_receive=self.on_received,
-            proxy=symbol_info.proxy
+            proxy=symbol_infos[-1].proxy
         )
         self.rhino_websocket = rhino_websocket
         await self.connect()
 
+    def get_streams(self, symbol_infos: List[SymbolInfo]) -> List[str]:
+        subscribe_list = []
+        for symbol_info in symbol_infos:
+            symbol = symbol_info.real_pair
+            symbol_methods = symbol_info.symbol_method
+            if isinstance(symbol_methods, str):
+                symbol_methods = [symbol_methods]
+            for symbol_method in symbol_methods:
+                if symbol_method == MethodEnum.GETTICKER.value:
+                    channel = self.channels[symbol_method] + symbol
+                    self.add_route(channel, self.on_ticket, symbol, RhinoDataType.RHINOTICKER,
+                                   symbol + MethodEnum.GETTICKER.value, DispatchPolicy.CONFLATE)
+                elif symbol_method == MethodEnum.GETTRADES.value:
+                    channel = self.channels[symbol_method] + symbol
+                    self.add_route(channel, self.on_trade, symbol, RhinoDataType.RHINOTRADE,
+                                   symbol + MethodEnum.GETTRADES.value, DispatchPolicy.LOSSLESS)
+                elif symbol_method == MethodEnum.GETDEPTHS.value:
+                    channel = self.add_depth_route(symbol, symbol_method)
+                    self.books.add(symbol, channel, int(symbol_info.rhino_depth.depth_limit),
+                                   int(symbol_info.rhino_depth.interval) / 1000)
+                elif symbol_method == MethodEnum.GETSUBDEPTHS.value:
+                    channel = self.add_depth_route(symbol, symbol_method)
+                    self.books.add(symbol, channel, 0, 0)
+                    self.diff_symbols.add(symbol)
+                else:
+                    continue
+                subscribe_list.append(channel)
+                self.stream_infos[channel] = symbol_info
+        return subscribe_list
+
+    def add_depth_route(self, symbol: str, method: str) -> str:
+        """
+        增量深度 channel 只注册一个路由，后订阅的方法不会覆盖先订阅的，心跳按方法分别记录
+        """
+        channel = self.channels[MethodEnum.GETSUBDEPTHS.value] + symbol
+        if channel not in self.router:
+            self.add_route(channel, self.on_increase_depth, symbol, RhinoDataType.RHINODEPTH,
+                           symbol + method, DispatchPolicy.LOSSLESS)
+        self.depth_hearts.setdefault(symbol, {})[method] = symbol + method
+        return channel
+
+    def remove_depth_method(self, symbol: str, method: str) -> NoReturn:
+        """
+        另一个方法还在使用增量深度 channel 时只停掉这个方法的输出
+        """
+        self.depth_hearts.get(symbol, {}).pop(method, None)
+        if method == MethodEnum.GETSUBDEPTHS.value:
+            self.diff_symbols.discard(symbol)
+            return
+        book = self.books.books.get(symbol)
+        if book is not None:
+            # limit 为 0 的订单簿只校验连续性不输出
+            book.limit = 0
+            book.interval = 0
+
+    async def remove_streams(self, symbol_infos: SymbolInfos) -> bool:
+        """
+        只取消 GETDEPTHS / GETSUBDEPTHS 其中一个时保留共用的 channel、路由和订单簿，其他按原来的方式取消订阅
+        """
+        depth_methods = (MethodEnum.GETDEPTHS.value, MethodEnum.GETSUBDEPTHS.value)
+        removing = []
+        for symbol_info in symbol_infos.symbols.get(self.gateway.exchange_sub, []):
+            symbol = symbol_info.real_pair
+            symbol_methods = symbol_info.symbol_method
+            if isinstance(symbol_methods, str):
+                symbol_methods = [symbol_methods]
+            methods = [method for method in symbol_methods if method in depth_methods]
+            if len(methods) > 0 and len(self.depth_hearts.get(symbol, {}).keys() - set(methods)) > 0:
+                for method in methods:
+                    self.remove_depth_method(symbol, method)
+                symbol_methods = [method for method in symbol_methods if method not in depth_methods]
+                if len(symbol_methods) == 0:
+                    continue
+                symbol_info = copy.copy(symbol_info)
+                symbol_info.symbol_method = symbol_methods
+            removing.append(symbol_info)
+        symbol_infos = copy.copy(symbol_infos)
+        symbol_infos.symbols = {**symbol_infos.symbols, self.gateway.exchange_sub: removing}
+        success = await super().remove_streams(symbol_infos)
+        for symbol in list(self.depth_hearts):
+            if self.channels[MethodEnum.GETSUBDEPTHS.value] + symbol not in self.router:
+                self.depth_hearts.pop(symbol)
+                self.diff_symbols.discard(symbol)
+        return success
+
+    def decode_binary(self, data: bytes) -> Any:
+        # protobuf 推送解析成和 json 推送相同的 dict
+        return decode_push(data)
+
+    def event_time(self, data: Any) -> Optional[int]:
+        # 推送时间 t
+        return data.get("t")
+
+    def event_seq(self, data: Any) -> Optional[Union[int, tuple]]:
+        # 增量深度按版本号 r；成交和 bookTicker 没有序号，同一毫秒可能有多条推送，按推送时间 t 加内容去重
+        d = data.get("d")
+        if not isinstance(d, dict):
+            return None
+        if "r" in d:
+            return int(d.get("r"))
+        deals = d.get("deals")
+        if deals:
+            return data.get("t"), tuple((deal.get("t"), deal.get("p"), deal.get("v"), deal.get("S")) for deal in deals)
+        return data.get("t"), repr(d)
+
+    def stream_timeout(self, stream: str) -> Optional[float]:
+        # 成交没有成交时不推送，不检查
+        if "bookTicker" in stream or "depth" in stream:
+            return websocket_stale_timeout
+        return None
+
+    def ack_id(self, data: Any) -> Optional[Tuple[int, bool]]:
+        # {"id": 1, "code": 0, "msg": "spot@public.deals.v3.api@BTCUSDT"}
+        if isinstance(data, dict) and "id" in data and "code" in data and "c" not in data:
+            return data.get("id"), data.get("code") == 0
+        return None
+
+    def stream_key(self, data: Any) -> Optional[Tuple[str, DispatchPolicy]]:
+        if not isinstance(data, dict):
+            return None
+        # 成交和增量深度是 LOSSLESS，不能丢
+        route = self.router.get(data.get("c", None))
+        if route is None:
+            return None
+        return route.stream, route.policy
+
     async def on_received(self, data) -> NoReturn:
         try:
             if not isinstance(data, dict):
@@ -727,27 +949,17 @@ class MexcSpotWebsocketGateway(WebsocketClient):
             if channel is None:
                 self.gateway.logger.error(f"{self.gateway.exchange_sub} websocket channel 为 None")
                 return
-            if "Ticker" in channel:
-                await self.on_ticket(data)
-
-            if "deals" in channel:
-                await self.on_trade(data)
-
-            if "increase" in channel:
-                await self.on_increase_depth(data)
-
-            # 进行 ping/pong 保活
-            if time.time() - self.websocket_time > websocket_pong:
-                await self.pong('{"method":"PING"}')
-                self.websocket_time = time.time()
+            if not await self.router.route(channel, data):
+                self.gateway.logger.error(f"{self.gateway.exchange_sub} websocket 没有订阅的 channel {channel}")
+                return
 
         except Exception as e:
             self.gateway.logger.error(f"解析 websocket receive 有错误")
             self.gateway.logger.error(traceback.format_exc())
 
-    async def on_ticket(self, data) -> NoReturn:
+    async def on_ticket(self, data, route: StreamRoute) -> NoReturn:
         try:
-            symbol = data.get("s")
+            symbol = route.symbol
             rhino_ticker_object = RhinoDepth(
                 real_pair=symbol,
                 gateway_send_time=data.get("t"),
@@ -758,22 +970,16 @@ class MexcSpotWebsocketGateway(WebsocketClient):
                 sell_amount1=float(data.get("d").get("A")),
             )
             # await self.on_transfer(rhino_ticker_object)
-            await self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINOTICKER.value)(
-                rhino_ticker_object)
-            websocket_listen = WebsocketListen(
-                time=int(1000 * time.time()),
-                gateway=self.gateway.exchange_sub,
-                key=symbol + MethodEnum.GETTICKER.value
-            )
-            await self.on_heart(websocket_listen)
+            await route.transfer(rhino_ticker_object)
+            self.heart.beat(route.heart_key)
         except Exception as e:
             self.gateway.logger.error(f"{self.gateway.exchange_sub} 解析 websocket depth 数据错误")
             self.gateway.logger.error(traceback.format_exc())
 
-    async def on_trade(self, data) -> NoReturn:
+    async def on_trade(self, data, route: StreamRoute) -> NoReturn:
         try:
             trades = data.get("d").get("deals")
-            symbol = data.get("s")
+            symbol = route.symbol
             rhino_trades = []
             for trade in trades:
                 rhino_trade = RhinoTrade(
@@ -786,60 +992,86 @@ class MexcSpotWebsocketGateway(WebsocketClient):
                 )
                 rhino_trades.append(rhino_trade)
             # await self.on_transfer(rhino_ticker_object)
-            await self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINOTRADE.value)(
-                rhino_trades)
-            websocket_listen = WebsocketListen(
-                time=int(1000 * time.time()),
-                gateway=self.gateway.exchange_sub,
-                key=symbol + MethodEnum.GETTRADES.value
-            )
-            await self.on_heart(websocket_listen)
+            await route.transfer(rhino_trades)
+            self.heart.beat(route.heart_key)
         except Exception as e:
             self.gateway.logger.error(f"{self.gateway.exchange_sub} 解析 websocket depth 数据错误")
             self.gateway.logger.error(traceback.format_exc())
 
-    async def on_increase_depth(self, data) -> NoReturn:
+    async def on_increase_depth(self, data, route: StreamRoute) -> NoReturn:
         """
-        注意该方法并不是完整版本
+        增量深度先应用到本地订单簿，json 推送每条一个版本 r，protobuf 聚合推送是 fr 到 r
+        版本不连续时订单簿自动重新同步，同步期间不输出增量，重复的和同步期间缓存的增量都不输出，
+        同步完成后由 on_book_sync 输出完整的订单簿
         """
         try:
-            symbol = data.get("s")
-            asks = data.get("d").get("asks", [])
-            # bids = data.get("d").get("bids", [])
+            symbol = route.symbol
+            d = data.get("d")
+            version = int(d.get("r"))
             t = data.get("t")
+            bids = list(map(level_values, d.get("bids", ())))
+            asks = list(map(level_values, d.get("asks", ())))
+            applied = await self.books.on_diff(symbol, int(d.get("fr", version)), version, None, bids, asks, t)
+            for heart_key in self.depth_hearts.get(symbol, {}).values():
+                self.heart.beat(heart_key)
+            if symbol not in self.diff_symbols or applied is not True:
+                return
+            # 数量为 0 的档位表示删除
             rhino_increase_depths = []
-            for ask in asks:
-                if float(ask.get("v")) != 0:
-                    rhino_increase_depth = RhinoIncreaseDepth(
-                        amount=float(ask.get("v")),
-                        price=float(ask.get("p")),
-                        real_pair=symbol,
-                        gateway_send_time=t,
-                        rhino_get_time=int(time.time() * 1000),
-                        direction=OrderDirection.SELL.value
-                    )
-                    rhino_increase_depths.append(rhino_increase_depth)
-                # await self.on_transfer(rhino_ticker_object)
-            # for bid in bids:
-            #     # if float(ask.get("v")) != 0:
-            #     rhino_increase_depth = RhinoIncreaseDepth(
-            #         amount=float(bid.get("v")),
-            #         price=float(bid.get("p")),
-            #         real_pair=symbol,
-            #         gateway_send_time=t,
-            #         rhino_get_time=int(time.time() * 1000),
-            #         direction=OrderDirection.BUY.value
-            #     )
-            #     rhino_increase_depths.append(rhino_increase_depth)
+            rhino_get_time = int(time.time() * 1000)
+            for price, amount in bids:
+                rhino_increase_depths.append(RhinoIncreaseDepth(
+                    amount=float(amount),
+                    price=float(price),
+                    real_pair=symbol,
+                    gateway_send_time=t,
+                    rhino_get_time=rhino_get_time,
+                    direction=OrderDirection.BUY.value
+                ))
+            for price, amount in asks:
+                rhino_increase_depths.append(RhinoIncreaseDepth(
+                    amount=float(amount),
+                    price=float(price),
+                    real_pair=symbol,
+                    gateway_send_time=t,
+                    rhino_get_time=rhino_get_time,
+                    direction=OrderDirection.SELL.value
+                ))
             if len(rhino_increase_depths) > 0:
-                await self.on_transfers.get(self.gateway.exchange_sub + RhinoDataType.RHINOSUBDEPTH.value)(
-                    rhino_increase_depths)
-                websocket_listen = WebsocketListen(
-                    time=int(1000 * time.time()),
-                    gateway=self.gateway.exchange_sub,
-                    key=symbol + MethodEnum.GETSUBDEPTHS.value
-                )
-                await self.on_heart(websocket_listen)
+                await self.sub_depth_transfer(rhino_increase_depths)
         except Exception as e:
             self.gateway.logger.error(f"{self.gateway.exchange_sub} 解析 websocket depth 数据错误")
             self.gateway.logger.error(traceback.format_exc())
+
+    async def fetch_book(self, book: OrderBook) -> Dict:
+        return await self.gateway.call(self.gateway.rest.get_depth_snapshot, self.stream_infos[book.stream])
+
+    def book_depth(self, book: OrderBook, limit: int) -> RhinoArrayDepth:
+        rhino_depth = RhinoArrayDepth(
+            real_pair=book.symbol,
+            cex_exchange_sub=self.gateway.exchange_sub,
+            data_get_type=DataGetType.WEBSOCKET.value,
+            gateway_send_time=book.event_time,
+            rhino_get_time=int(time.time() * 1000),
+        )
+        return book.fill(rhino_depth, limit)
+
+    async def on_book_sync(self, book: OrderBook) -> NoReturn:
+        """
+        同步期间的增量没有输出，GETSUBDEPTHS 先收到一个完整订单簿的 RhinoArrayDepth，
+        调用方按它替换本地订单簿（ConsolidatedBookManager.on_transfer 就是这样处理的），之后继续按增量更新
+        """
+        if book.symbol not in self.diff_symbols:
+            return
+        rhino_depth = self.book_depth(book, max(len(book.bids), len(book.asks)))
+        self.gateway.logger.info(f"{self.gateway.exchange_sub} {book.symbol} 订单簿同步完成，"
+                                 f"增量订阅输出完整订单簿 {book.last_update_id}")
+        await self.sub_depth_transfer(rhino_depth)
+
+    async def on_book(self, book: OrderBook) -> NoReturn:
+        if book.limit == 0:
+            return
+        rhino_depth = self.book_depth(book, book.limit)
+        self.gateway.logger.debug(
+            f"websocket 推送数据成功 {self.gateway.exchange_sub} order book {book.symbol} {book.last_update_id}")
+        await self.depth_transfer(rhino_depth)
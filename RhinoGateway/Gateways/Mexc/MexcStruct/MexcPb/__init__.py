@@ -0,0 +1,7 @@
+"""
+mexc websocket-proto 的 .proto 文件和 protoc 生成的 Python 类
+
+重新生成（在这个目录下执行，生成代码的 import 改成包路径）：
+protoc --python_out=. *.proto
+sed -i 's/^import \(.*_pb2\) as/from RhinoGateway.Gateways.Mexc.MexcStruct.MexcPb import \1 as/' *_pb2.py
+"""
@@ -0,0 +1,78 @@
+"""
+MEXC websocket protobuf 推送解析
+
+用 MexcPb 中按 mexc websocket-proto 生成的 PushDataV3ApiWrapper 解析，protobuf 4.21 以上默认是 C 实现 (upb)，
+解析结果转换成和 json v3 推送相同的结构（c / s / t / d），handler 不需要区分 json 和 protobuf
+没有安装 protobuf 时 protobuf_available 为 False，只能订阅 json 推送
+"""
+from typing import Dict, List, Any, Optional, Callable
+
+try:
+    from google.protobuf.message import DecodeError
+    from RhinoGateway.Gateways.Mexc.MexcStruct.MexcPb.PushDataV3ApiWrapper_pb2 import PushDataV3ApiWrapper
+except ImportError:
+    DecodeError = None
+    PushDataV3ApiWrapper = None
+
+protobuf_available = PushDataV3ApiWrapper is not None
+
+
+def depth_items(items) -> List[Dict[str, str]]:
+    return [{"p": item.price, "v": item.quantity} for item in items]
+
+
+def deals_body(body) -> Dict[str, Any]:
+    return {
+        "deals": [{"p": deal.price, "v": deal.quantity, "S": deal.tradeType, "t": deal.time} for deal in body.deals],
+        "e": body.eventType,
+    }
+
+
+def increase_depths_body(body) -> Dict[str, Any]:
+    return {"asks": depth_items(body.asks), "bids": depth_items(body.bids), "e": body.eventType, "r": body.version}
+
+
+def aggre_depths_body(body) -> Dict[str, Any]:
+    return {"asks": depth_items(body.asks), "bids": depth_items(body.bids), "e": body.eventType,
+            "fr": body.fromVersion, "r": body.toVersion}
+
+
+def book_ticker_body(body) -> Dict[str, Any]:
+    return {"b": body.bidPrice, "B": body.bidQuantity, "a": body.askPrice, "A": body.askQuantity}
+
+
+# oneof body 的字段名 -> 转换成 json 推送中 d 的函数
+body_converters: Dict[str, Callable[[Any], Dict[str, Any]]] = {
+    "publicDeals": deals_body,
+    "publicIncreaseDepths": increase_depths_body,
+    "publicBookTicker": book_ticker_body,
+    "publicAggreDepths": aggre_depths_body,
+    "publicAggreDeals": deals_body,
+    "publicAggreBookTicker": book_ticker_body,
+}
+
+
+def decode_push(data: bytes) -> Optional[Dict[str, Any]]:
+    """
+    解析一条 protobuf 推送，不是 PushDataV3ApiWrapper 或者解析失败时返回 None
+    """
+    wrapper = PushDataV3ApiWrapper()
+    try:
+        wrapper.ParseFromString(data)
+    except DecodeError:
+        return None
+    if not wrapper.channel:
+        return None
+    result = {"c": wrapper.channel}
+    if wrapper.HasField("symbol"):
+        result["s"] = wrapper.symbol
+    if wrapper.HasField("symbolId"):
+        result["si"] = wrapper.symbolId
+    if wrapper.HasField("createTime"):
+        result["ct"] = wrapper.createTime
+    if wrapper.HasField("sendTime"):
+        result["t"] = wrapper.sendTime
+    body = wrapper.WhichOneof("body")
+    if body is not None:
+        result["d"] = body_converters[body](getattr(wrapper, body))
+    return result
@@ -0,0 +1,107 @@
+"""
+档位存在连续 float 数组中的 RhinoDepth
+
+bid_levels / ask_levels 是 array('d')，按 [价格1, 数量1, 价格2, 数量2 ...] 排列，set_levels 一次转换整组档位，
+不再每档拼接 f"buy_price{i}" 并 setattr 四次
+buy_price1 / buy_amount1 / sell_price1 / sell_amount1 ... 是读写数组的属性，按属性读取深度的调用方不需要修改，
+没有的档位返回 None，写入 None 时去掉这一档和更深的档位；超过 array_depth_levels 的档位仍然是普通属性
+档位不在 __dict__ 中，日志和按字段序列化用 field_dict()，__repr__ / __str__ 已经包含所有档位
+"""
+from array import array
+from itertools import chain, repeat
+from typing import NoReturn, List, Dict, Sequence, Optional, Any
+
+from RhinoObject.Rhino.RhinoObject import RhinoDepth
+
+array_depth_levels = 1000  # 生成属性的档位数，和订单簿快照的档位数一致
+
+
+def level_property(side: str, index: int) -> property:
+    """
+    side 是 bid_levels / ask_levels，index 是数组下标，价格是偶数位，数量是奇数位
+    """
+
+    def getter(self) -> Optional[float]:
+        levels = getattr(self, side)
+        if index < len(levels):
+            return levels[index]
+        return None
+
+    def setter(self, value: Optional[float]) -> NoReturn:
+        levels = getattr(self, side)
+        if value is None:
+            # 数组里不能留空档，读取方按第一个没有的档位结束，所以更深的档位一起去掉
+            del levels[index & ~1:]
+            return
+        if index >= len(levels):
+            # 按整档补齐，价格和数量成对
+            levels.extend(repeat(0.0, (index | 1) + 1 - len(levels)))
+        levels[index] = value
+
+    return property(getter, setter)
+
+
+class RhinoArrayDepth(RhinoDepth):
+
+    def __init__(self, **kwargs):
+        self.bid_levels = array("d")
+        self.ask_levels = array("d")
+        super().__init__(**kwargs)
+
+    def set_levels(self, bids: Sequence[Sequence], asks: Sequence[Sequence], limit: int = None) -> NoReturn:
+        """
+        bids / asks 是 [[价格, 数量], ...]，价格和数量可以是字符串或者数字，limit 为 None 时全部保留
+        """
+        if limit is not None:
+            bids = bids[:limit]
+            asks = asks[:limit]
+        # array 从 list 构造比从迭代器逐个 append 快
+        self.bid_levels = array("d", list(map(float, chain.from_iterable(bids))))
+        self.ask_levels = array("d", list(map(float, chain.from_iterable(asks))))
+
+    @property
+    def bid_count(self) -> int:
+        return len(self.bid_levels) // 2
+
+    @property
+    def ask_count(self) -> int:
+        return len(self.ask_levels) // 2
+
+    def bids(self) -> List[List[float]]:
+        levels = self.bid_levels
+        return [[levels[i], levels[i + 1]] for i in range(0, len(levels) - 1, 2)]
+
+    def asks(self) -> List[List[float]]:
+        levels = self.ask_levels
+        return [[levels[i], levels[i + 1]] for i in range(0, len(levels) - 1, 2)]
+
+    def level_dict(self) -> Dict[str, float]:
+        """
+        展开成 buy_price1 ... 的字典，用于需要按字段序列化的地方
+        """
+        result = {}
+        for prefix, levels in (("buy", self.bid_levels), ("sell", self.ask_levels)):
+            for i in range(0, len(levels) - 1, 2):
+                result[f"{prefix}_price{i // 2 + 1}"] = levels[i]
+                result[f"{prefix}_amount{i // 2 + 1}"] = levels[i + 1]
+        return result
+
+    def field_dict(self) -> Dict[str, Any]:
+        """
+        和普通 RhinoDepth 的 __dict__ 一样按字段展开，数组换成 buy_price1 ... 字段
+        """
+        result = {key: value for key, value in vars(self).items() if key not in ("bid_levels", "ask_levels")}
+        result.update(self.level_dict())
+        return result
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.field_dict()})"
+
+    __str__ = __repr__
+
+
+for level in range(1, array_depth_levels + 1):
+    setattr(RhinoArrayDepth, f"buy_price{level}", level_property("bid_levels", 2 * level - 2))
+    setattr(RhinoArrayDepth, f"buy_amount{level}", level_property("bid_levels", 2 * level - 1))
+    setattr(RhinoArrayDepth, f"sell_price{level}", level_property("ask_levels", 2 * level - 2))
+    setattr(RhinoArrayDepth, f"sell_amount{level}", level_property("ask_levels", 2 * level - 1))
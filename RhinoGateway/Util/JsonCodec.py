@@ -0,0 +1,69 @@
+import json
+from typing import Any, Union, Dict, Type
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class JsonCodec(object):
+    """
+    标准库 json，没有安装 orjson / msgspec 时使用
+    """
+    name = "json"
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+    def dumps(self, data: Any) -> str:
+        return json.dumps(data)
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+    def dumps(self, data: Any) -> str:
+        return orjson.dumps(data).decode()
+
+
+class MsgspecCodec(JsonCodec):
+    name = "msgspec"
+
+    def __init__(self):
+        self.decoder = msgspec.json.Decoder()
+        self.encoder = msgspec.json.Encoder()
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self.decoder.decode(data)
+
+    def dumps(self, data: Any) -> str:
+        return self.encoder.encode(data).decode()
+
+
+json_codecs: Dict[str, Type[JsonCodec]] = {}
+if orjson is not None:
+    json_codecs[OrjsonCodec.name] = OrjsonCodec
+if msgspec is not None:
+    json_codecs[MsgspecCodec.name] = MsgspecCodec
+json_codecs[JsonCodec.name] = JsonCodec
+
+
+def get_json_codec(name: str = None) -> JsonCodec:
+    """
+    name 为空时按 orjson > msgspec > json 的顺序选择已安装的解析库
+    """
+    if name is None:
+        return next(iter(json_codecs.values()))()
+    codec = json_codecs.get(name, None)
+    if codec is None:
+        raise ValueError(f"json codec {name} 没有安装，可选 {list(json_codecs.keys())}")
+    return codec()
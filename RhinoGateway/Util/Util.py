@@ -1,5 +1,7 @@
 from RhinoObject.Rhino.RhinoObject import RhinoDepth, MixInfo, SymbolInfo
 
+from RhinoGateway.Util.ArrayDepth import RhinoArrayDepth
+
 
 def get_MixInfo_from_SymbolInfo(symbol_info: SymbolInfo) -> MixInfo:
     return MixInfo(
@@ -20,8 +22,8 @@ def get_MixInfo_from_SymbolInfo(symbol_info: SymbolInfo) -> MixInfo:
     )
 
 
-def get_RhinoDepth_from_MixInfo(mix_info: MixInfo) -> RhinoDepth:
-    return RhinoDepth(
+def get_RhinoDepth_from_MixInfo(mix_info: MixInfo) -> RhinoArrayDepth:
+    return RhinoArrayDepth(
         symbol=mix_info.symbol,
         chain=mix_info.chain,
         key=mix_info.key,
@@ -0,0 +1,57 @@
+"""
+对比深度解析逐档拼接 f"buy_price{i}" 并 setattr 的方式和 RhinoArrayDepth.set_levels 一次转换到 array('d') 的耗时，
+str 是 REST / 现货推送的字符串档位，float 是 USwap msgspec 解析后的数字档位
+
+python benchmark/bench_array_depth.py
+"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import payloads
+from RhinoObject.Rhino.RhinoObject import RhinoDepth
+from RhinoGateway.Util.ArrayDepth import RhinoArrayDepth
+
+
+def per_level(bids, asks, depth_limit: int):
+    rhino_depth = RhinoDepth()
+    for i in range(1, depth_limit + 1):
+        bid = bids[i - 1]
+        setattr(rhino_depth, f"buy_price{i}", float(bid[0]))
+        setattr(rhino_depth, f"buy_amount{i}", float(bid[1]))
+        ask = asks[i - 1]
+        setattr(rhino_depth, f"sell_price{i}", float(ask[0]))
+        setattr(rhino_depth, f"sell_amount{i}", float(ask[1]))
+    return rhino_depth
+
+
+def array_levels(bids, asks, depth_limit: int):
+    rhino_depth = RhinoArrayDepth()
+    rhino_depth.set_levels(bids, asks, depth_limit)
+    return rhino_depth
+
+
+def main(number: int = 20000):
+    print(f"{'levels':>7}{'type':>7}{'setattr us':>12}{'array us':>10}{'speedup':>9}{'read1 us':>10}")
+    for depth_limit in (5, 20, 100):
+        data = json.loads(payloads.binance_rest_depth(limit=depth_limit))
+        for title, bids, asks in (
+                ("str", data["bids"], data["asks"]),
+                ("float", [[float(p), float(q)] for p, q in data["bids"]],
+                 [[float(p), float(q)] for p, q in data["asks"]]),
+        ):
+            assert per_level(bids, asks, depth_limit).buy_price1 == array_levels(bids, asks, depth_limit).buy_price1
+            old = timeit.timeit(lambda: per_level(bids, asks, depth_limit), number=number) / number * 1e6
+            new = timeit.timeit(lambda: array_levels(bids, asks, depth_limit), number=number) / number * 1e6
+            # 兼容属性读取一档的耗时
+            depth = array_levels(bids, asks, depth_limit)
+            read = timeit.timeit(lambda: depth.sell_price1, number=number) / number * 1e6
+            print(f"{depth_limit:>7}{title:>7}{old:>12.2f}{new:>10.2f}{old / new:>8.1f}x{read:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
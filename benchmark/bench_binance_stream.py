@@ -0,0 +1,97 @@
+"""
+对比 BinanceUSwapWebsocketGateway 原来的 json.loads + data.get/float 解析方式
+和 BinanceStruct 中 msgspec 结构直接解析的单条消息耗时
+
+python benchmark/bench_binance_stream.py
+"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import payloads
+from RhinoGateway.Gateways.Binance.BinanceStruct.BinanceStruct import binance_event_decoder
+
+
+def dict_depth(frame):
+    data = json.loads(frame)
+    symbol = data.get("s").upper()
+    event_time = int(data.get("E"))
+    bids = [(float(b[0]), float(b[1])) for b in data.get("b")]
+    asks = [(float(a[0]), float(a[1])) for a in data.get("a")]
+    return symbol, event_time, bids, asks
+
+
+def dict_trade(frame):
+    data = json.loads(frame)
+    return data.get("s").upper(), int(data.get("T")), float(data.get("q")), float(data.get("p")), data.get("m")
+
+
+def dict_book_ticker(frame):
+    data = json.loads(frame)
+    return (data.get("s").upper(), int(data.get("E")), float(data.get("b")), float(data.get("B")),
+            float(data.get("a")), float(data.get("A")))
+
+
+def dict_kline(frame):
+    data = json.loads(frame)
+    k = data.get("k")
+    return (data.get("s").upper(), int(data.get("E")), float(k.get("o")), float(k.get("c")), float(k.get("h")),
+            float(k.get("l")), k.get("x"))
+
+
+def dict_tickers(frame):
+    data = json.loads(frame)
+    return [(d.get("s").upper(), int(d.get("E")), float(d.get("o")), float(d.get("c")), float(d.get("h")),
+             float(d.get("l"))) for d in data]
+
+
+def struct_depth(frame):
+    data = binance_event_decoder.decode(frame)
+    return data.symbol, data.event_time, data.bids, data.asks
+
+
+def struct_trade(frame):
+    data = binance_event_decoder.decode(frame)
+    return data.symbol, data.trade_time, data.amount, data.price, data.is_maker
+
+
+def struct_book_ticker(frame):
+    data = binance_event_decoder.decode(frame)
+    return data.symbol, data.event_time, data.buy_price, data.buy_amount, data.sell_price, data.sell_amount
+
+
+def struct_kline(frame):
+    data = binance_event_decoder.decode(frame)
+    k = data.kline
+    return data.symbol, data.event_time, k.open_price, k.close_price, k.high_price, k.low_price, k.is_end
+
+
+def struct_tickers(frame):
+    data = binance_event_decoder.decode(frame)
+    return [(d.symbol, d.event_time, d.open_price, d.close_price, d.high_price, d.low_price) for d in data]
+
+
+cases = [
+    ("depthUpdate 20", payloads.binance_uswap_depth().decode(), dict_depth, struct_depth),
+    ("aggTrade", payloads.binance_agg_trade().decode(), dict_trade, struct_trade),
+    ("bookTicker", payloads.binance_book_ticker().decode(), dict_book_ticker, struct_book_ticker),
+    ("kline", payloads.binance_kline().decode(), dict_kline, struct_kline),
+    ("!ticker@arr 300", payloads.binance_ticker_arr().decode(), dict_tickers, struct_tickers),
+]
+
+
+def main(number: int = 5000):
+    print(f"{'event':<18}{'dict us':>10}{'struct us':>12}{'speedup':>10}")
+    for title, frame, dict_parse, struct_parse in cases:
+        n = number if len(frame) < 10000 else number // 50
+        dict_cost = timeit.timeit(lambda: dict_parse(frame), number=n) / n * 1e6
+        struct_cost = timeit.timeit(lambda: struct_parse(frame), number=n) / n * 1e6
+        print(f"{title:<18}{dict_cost:>10.2f}{struct_cost:>12.2f}{dict_cost / struct_cost:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
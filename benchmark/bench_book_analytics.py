@@ -0,0 +1,127 @@
+"""
+对比逐个币对在 Python 里逐档累加计算成交均价、X bps 内深度、microprice 的方式，
+和 BookAnalytics 把多个币对补齐成矩阵一次计算的耗时，以及同一 tick 内重复查询命中缓存的耗时
+
+python benchmark/bench_book_analytics.py
+"""
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from RhinoGateway.Base.OrderBook.BookAnalytics import BookAnalytics, BUY
+from RhinoGateway.Base.OrderBook.OrderBook import OrderBook
+
+
+class Manager(object):
+
+    def __init__(self, books):
+        self.books = books
+
+
+def new_books(count: int, levels: int):
+    books = {}
+    for i in range(count):
+        symbol = f"SYM{i}USDT"
+        mid = random.uniform(1, 1000)
+        tick = mid * 1e-4
+        book = OrderBook(symbol, symbol, 20, 0, False)
+        book.load(1, [[mid - tick * (j + 1), random.uniform(0.1, 5)] for j in range(levels)],
+                  [[mid + tick * (j + 1), random.uniform(0.1, 5)] for j in range(levels)])
+        books[symbol] = book
+    return books
+
+
+def python_vwap(book: OrderBook, notional: float, depth: int) -> float:
+    quote = base = 0.0
+    for price, amount in book.asks.top(depth):
+        if quote + price * amount >= notional:
+            base += (notional - quote) / price
+            return notional / base
+        quote += price * amount
+        base += amount
+    return math.nan
+
+
+def python_depth(book: OrderBook, bps: float, depth: int):
+    mid = (book.best_bid()[0] + book.best_ask()[0]) / 2
+    bid = sum(amount for price, amount in book.bids.top(depth) if price >= mid * (1 - bps / 1e4))
+    ask = sum(amount for price, amount in book.asks.top(depth) if price <= mid * (1 + bps / 1e4))
+    return bid, ask
+
+
+def python_microprice(book: OrderBook) -> float:
+    bid_price, bid_amount = book.best_bid()
+    ask_price, ask_amount = book.best_ask()
+    return (bid_price * ask_amount + ask_price * bid_amount) / (bid_amount + ask_amount)
+
+
+def python_all(books, symbols, notional: float, bps: float, depth: int):
+    return ([python_vwap(books[symbol], notional, depth) for symbol in symbols],
+            [python_depth(books[symbol], bps, depth) for symbol in symbols],
+            [python_microprice(books[symbol]) for symbol in symbols])
+
+
+def vector_all(analytics: BookAnalytics, symbols, notional: float, bps: float):
+    return (analytics.vwap(symbols, notional, BUY),
+            analytics.depth_within(symbols, bps),
+            analytics.microprice(symbols))
+
+
+def timed(function, rounds: int) -> float:
+    best = math.inf
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+def main(rounds: int = 20, depth: int = 200, notional: float = 20000, bps: float = 10):
+    random.seed(7)
+    # numpy us 是所有订单簿都变化后的耗时，10% us 是只有十分之一的订单簿变化，cached us 是都没有变化
+    print(f"{'symbols':>8}{'python us':>11}{'numpy us':>10}{'speedup':>9}{'10% us':>9}{'cached us':>11}")
+    for count in (10, 100, 500):
+        books = new_books(count, depth)
+        symbols = list(books)
+        manager = Manager(books)
+        expected = python_all(books, symbols, notional, bps, depth)
+        result = vector_all(BookAnalytics(manager, depth), symbols, notional, bps)
+        for a, b in zip(expected[0], result[0]):
+            assert (math.isnan(a) and math.isnan(b)) or abs(a - b) < 1e-9 * a
+        assert all(abs(a[0] - b) < 1e-9 for a, b in zip(expected[1], result[1][0]))
+
+        python_cost = timed(lambda: python_all(books, symbols, notional, bps, depth), rounds)
+
+        def fresh(changed):
+            for book in changed:
+                book.version += 1
+            vector_all(analytics, symbols, notional, bps)
+
+        analytics = BookAnalytics(manager, depth)
+        vector_cost = timed(lambda: fresh(list(books.values())), rounds)
+        tenth_cost = timed(lambda: fresh(list(books.values())[::10]), rounds)
+        cached_cost = timed(lambda: vector_all(analytics, symbols, notional, bps), rounds)
+        print(f"{count:>8}{python_cost:>11.0f}{vector_cost:>10.0f}{python_cost / vector_cost:>8.1f}x"
+              f"{tenth_cost:>9.0f}{cached_cost:>11.1f}")
+
+    # 单个币对的冲击成本曲线
+    books = new_books(1, depth)
+    symbol = next(iter(books))
+    analytics = BookAnalytics(Manager(books), depth)
+    notionals = [1000 * (i + 1) for i in range(50)]
+    python_cost = timed(lambda: [python_vwap(books[symbol], n, depth) for n in notionals], rounds)
+
+    def curve():
+        books[symbol].version += 1
+        analytics.impact_curve(symbol, notionals, BUY)
+
+    vector_cost = timed(curve, rounds)
+    print(f"{'curve':>8}{python_cost:>11.0f}{vector_cost:>10.0f}{python_cost / vector_cost:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+对比每次有交易所深度更新时把所有交易所的档位重新合并排序、再取最优价的方式，
+和合并订单簿只改动和上一次相比变化的档位、最优价 O(1) 读取的单次更新耗时，以及 AMM 池子储备量换算成档位的耗时
+
+python benchmark/bench_consolidated_book.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from RhinoGateway.Base.OrderBook.ConsolidatedBook import ConsolidatedBookManager
+
+venues = ["BINANCESPOT", "MEXCSPOT", "GATEUSPOT"]
+
+
+def snapshots(count: int, levels: int, changes: int):
+    """
+    每次随机一个交易所推送完整的 levels 档，和它上一次相比只有 changes 档的数量变化
+    """
+    books = {venue: ([[27300 - 0.1 * (i + 1), 1.0] for i in range(levels)],
+                     [[27300 + 0.1 * (i + 1), 1.0] for i in range(levels)]) for venue in venues}
+    frames = []
+    for _ in range(count):
+        venue = random.choice(venues)
+        bids, asks = books[venue]
+        bids = [list(level) for level in bids]
+        asks = [list(level) for level in asks]
+        for _ in range(changes):
+            side = random.choice((bids, asks))
+            side[random.randrange(levels)][1] = round(random.uniform(0.1, 5), 3)
+        books[venue] = (bids, asks)
+        frames.append((venue, bids, asks))
+    return frames
+
+
+def rebuild(frames) -> float:
+    latest = {}
+    start = time.perf_counter()
+    for venue, bids, asks in frames:
+        latest[venue] = (bids, asks)
+        merged_bids = {}
+        merged_asks = {}
+        for name, (venue_bids, venue_asks) in latest.items():
+            for price, amount in venue_bids:
+                merged_bids.setdefault(price, {})[name] = amount
+            for price, amount in venue_asks:
+                merged_asks.setdefault(price, {})[name] = amount
+        bid_prices = sorted(merged_bids, reverse=True)
+        ask_prices = sorted(merged_asks)
+        best_bid = bid_prices[0], sum(merged_bids[bid_prices[0]].values())
+        best_ask = ask_prices[0], sum(merged_asks[ask_prices[0]].values())
+    return time.perf_counter() - start
+
+
+def incremental(frames) -> float:
+    manager = ConsolidatedBookManager()
+    start = time.perf_counter()
+    for venue, bids, asks in frames:
+        manager.update_levels(venue, "BTCUSDT", bids, asks)
+        manager.best_bid("BTCUSDT")
+        manager.best_ask("BTCUSDT")
+    return time.perf_counter() - start
+
+
+def diffs(frames) -> float:
+    """
+    增量推送只带变化的档位，按上一条快照和这一条的差异生成
+    """
+    manager = ConsolidatedBookManager()
+    latest = {}
+    events = []
+    for venue, bids, asks in frames:
+        old_bids, old_asks = latest.get(venue, (set(), set()))
+        events.append((venue, [level for level in bids if tuple(level) not in old_bids],
+                       [level for level in asks if tuple(level) not in old_asks]))
+        latest[venue] = ({tuple(level) for level in bids}, {tuple(level) for level in asks})
+    start = time.perf_counter()
+    for venue, bids, asks in events:
+        manager.apply_levels(venue, "BTCUSDT", bids, asks)
+        manager.best_bid("BTCUSDT")
+        manager.best_ask("BTCUSDT")
+    return time.perf_counter() - start
+
+
+def pools(count: int) -> float:
+    manager = ConsolidatedBookManager()
+    manager.add_pool("BTCUSDT", "PANCAKE")
+    pool = manager.pools["BTCUSDT"][0]
+    start = time.perf_counter()
+    for i in range(count):
+        manager.update_pool("BTCUSDT", pool, (100 + i % 7) * 10 ** 18, 2730000 * 10 ** 18)
+    return time.perf_counter() - start
+
+
+def main(count: int = 20000, rounds: int = 5):
+    random.seed(7)
+    # incr us 是交易所推送完整档位时和上一次比较的耗时，diff us 是推送只带变化档位时的耗时
+    print(f"{'levels':>7}{'changes':>9}{'rebuild us':>12}{'incr us':>9}{'speedup':>9}{'diff us':>9}{'speedup':>9}")
+    for levels in (20, 100, 500):
+        frame_count = count * 20 // levels
+        for changes in (2, 10):
+            frames = snapshots(frame_count, levels, changes)
+            rebuild_cost = min(rebuild(frames) for _ in range(rounds)) / frame_count * 1e6
+            incremental_cost = min(incremental(frames) for _ in range(rounds)) / frame_count * 1e6
+            diff_cost = min(diffs(frames) for _ in range(rounds)) / frame_count * 1e6
+            print(f"{levels:>7}{changes:>9}{rebuild_cost:>12.2f}{incremental_cost:>9.2f}"
+                  f"{rebuild_cost / incremental_cost:>8.1f}x{diff_cost:>9.2f}{rebuild_cost / diff_cost:>8.1f}x")
+
+    manager = ConsolidatedBookManager()
+    manager.update_levels("BINANCESPOT", "BTCUSDT", *snapshots(1, 500, 0)[0][1:])
+    start = time.perf_counter()
+    for _ in range(count):
+        manager.best_bid("BTCUSDT")
+    print(f"{'best us':>8}{(time.perf_counter() - start) / count * 1e6:>9.3f}")
+    print(f"{'pool us':>8}{min(pools(count // 10) for _ in range(rounds)) / (count // 10) * 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
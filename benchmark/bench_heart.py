@@ -0,0 +1,78 @@
+"""
+对比每条消息创建 WebsocketListen 并 await on_heart 的心跳上报方式
+和 HeartTable 每条消息只更新时间、按间隔批量上报的单条消息耗时，模拟全市场 stream 300 个币对
+
+python benchmark/bench_heart.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from RhinoObject.Rhino.RhinoObject import WebsocketListen
+from RhinoGateway.Base.WebSocket.WebsocketHeart import HeartTable
+
+exchange_sub = "BINANCEUSWAP"
+
+
+class Gateway(object):
+    exchange_sub = exchange_sub
+    logger = logging.getLogger(__name__)
+
+
+class Client(object):
+
+    def __init__(self):
+        self.gateway = Gateway()
+        self.hearts = 0
+        self.on_heart = self.count_heart
+
+    async def count_heart(self, websocket_listen):
+        self.hearts += 1
+
+
+async def per_message(client: Client, keys) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        websocket_listen = WebsocketListen(
+            time=int(1000 * time.time()),
+            gateway=exchange_sub,
+            key=key
+        )
+        await client.on_heart(websocket_listen)
+    return time.perf_counter() - start
+
+
+async def coalesced(client: Client, keys, flush_every: int) -> float:
+    heart = HeartTable(client)
+    start = time.perf_counter()
+    for i, key in enumerate(keys):
+        heart.beat(key)
+        # 按消息数模拟定时上报，每 flush_every 条相当于一个上报间隔
+        if i % flush_every == flush_every - 1:
+            await heart.flush()
+    await heart.flush()
+    return time.perf_counter() - start
+
+
+def main(symbols: int = 300, count: int = 100000, rounds: int = 5):
+    keys = [f"COIN{i % symbols}USDTGETTICKER" for i in range(count)]
+    loop = asyncio.new_event_loop()
+    print(f"{'flush every':>12}{'per msg us':>12}{'table us':>10}{'speedup':>9}{'on_heart old':>14}{'new':>8}")
+    # 每秒 1 万条消息时，1 秒上报一次相当于每 10000 条 flush 一次
+    for flush_every in (1000, 10000, 100000):
+        old_client, new_client = Client(), Client()
+        old_cost = min(loop.run_until_complete(per_message(old_client, keys)) for _ in range(rounds))
+        new_cost = min(loop.run_until_complete(coalesced(new_client, keys, flush_every)) for _ in range(rounds))
+        old_us = old_cost / count * 1e6
+        new_us = new_cost / count * 1e6
+        print(f"{flush_every:>12}{old_us:>12.3f}{new_us:>10.3f}{old_us / new_us:>8.1f}x"
+              f"{old_client.hearts // rounds:>14}{new_client.hearts // rounds:>8}")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+对比 json / orjson / msgspec 解析 Binance、Mexc 推送数据的耗时
+
+python benchmark/bench_json_codec.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import payloads
+from RhinoGateway.Util.JsonCodec import json_codecs
+
+frames = {
+    "binance !ticker@arr": payloads.binance_ticker_arr(),
+    "binance bookTicker": payloads.binance_book_ticker(),
+    "binance depth20": payloads.binance_spot_depth(),
+    "binance rest depth100": payloads.binance_rest_depth(),
+    "mexc deals": payloads.mexc_deals(),
+    "mexc bookTicker": payloads.mexc_book_ticker(),
+}
+
+
+def main(number: int = 2000):
+    names = list(json_codecs.keys())
+    print(f"{'payload':<24}{'bytes':>8}" + "".join(f"{name + ' us':>14}" for name in names))
+    for title, frame in frames.items():
+        row = f"{title:<24}{len(frame):>8}"
+        for name in names:
+            codec = json_codecs[name]()
+            # REST 直接解析 bytes，websocket 收到的是 str，这里取 bytes 的情况
+            cost = timeit.timeit(lambda: codec.loads(frame), number=number) / number * 1e6
+            row += f"{cost:>14.2f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+MEXC 增量深度维护本地订单簿的吞吐量：json / protobuf 推送分别统计只解析、
+解析后按版本号校验并应用到订单簿、再读取最优价的单条消息耗时和每秒能处理的消息数
+
+python benchmark/bench_mexc_book.py [frames.jsonl]
+
+frames.jsonl 是从 spot@public.increase.depth.v3.api@<币对> 录制的 json 推送，每行一条原始消息，
+按文件里的顺序回放，protobuf 按同样的内容编码；不传文件时按录制的格式生成版本号连续的推送
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import payloads
+from RhinoGateway.Base.OrderBook.OrderBook import OrderBook
+from RhinoGateway.Gateways.Mexc.MexcSpotGateway.MexcSpotGateway import level_values
+from RhinoGateway.Gateways.Mexc.MexcStruct.MexcProto import decode_push
+from RhinoGateway.Util.JsonCodec import get_json_codec
+
+codec = get_json_codec()
+version = 3407459756
+
+
+def generated(levels: int, count: int):
+    """
+    价格按 0.01 的最小变动单位取整，和实际推送一样集中在盘口附近，订单簿大小稳定在几千档
+    """
+    frames = []
+    for i in range(count):
+        data = json.loads(payloads.mexc_increase_depth(version=version + 1 + i, count=levels, deletes=0.2))
+        for level in data["d"]["asks"] + data["d"]["bids"]:
+            level["p"] = f"{float(level['p']):.2f}"
+        frames.append(json.dumps(data).encode())
+    return frames
+
+
+def recorded(path: str):
+    """
+    只保留增量深度推送，订阅回报和 PONG 跳过
+    """
+    frames = []
+    with open(path, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if len(line) == 0:
+                continue
+            data = json.loads(line)
+            if isinstance(data.get("d"), dict) and "r" in data["d"]:
+                frames.append(line)
+    return frames
+
+
+def decode_only(frames, decode) -> float:
+    start = time.perf_counter()
+    for frame in frames:
+        decode(frame)
+    return time.perf_counter() - start
+
+
+def apply(frames, decode, book: OrderBook) -> float:
+    start = time.perf_counter()
+    for frame in frames:
+        d = decode(frame).get("d")
+        r = int(d.get("r"))
+        book.apply(r, r, None, list(map(level_values, d.get("bids", ()))), list(map(level_values, d.get("asks", ()))))
+        book.best_bid()
+        book.best_ask()
+    return time.perf_counter() - start
+
+
+def new_book(first: int) -> OrderBook:
+    book = OrderBook("BTCUSDT", "spot@public.increase.depth.v3.api@BTCUSDT", 20, 0, False)
+    book.load(first - 1, [], [])
+    return book
+
+
+def run(title: str, frames, rounds: int):
+    count = len(frames)
+    first = int(json.loads(frames[0])["d"]["r"])
+    texts = [frame.decode() for frame in frames]
+    protos = [payloads.mexc_proto(frame, 302) for frame in frames]
+    for name, data, decode in (("json", texts, codec.loads), ("pb", protos, decode_push)):
+        decode_cost = min(decode_only(data, decode) for _ in range(rounds)) / count * 1e6
+        total_cost = min(apply(data, decode, new_book(first)) for _ in range(rounds)) / count * 1e6
+        print(f"{title:>9}{name:>8}{decode_cost:>11.2f}{total_cost - decode_cost:>10.2f}{total_cost:>10.2f}"
+              f"{1e6 / total_cost:>10.0f}")
+
+
+def main(path: str = None, count: int = 20000, rounds: int = 5):
+    print(f"{'levels':>9}{'format':>8}{'decode us':>11}{'apply us':>10}{'total us':>10}{'msg/s':>10}")
+    if path is not None:
+        run("recorded", recorded(path), rounds)
+        return
+    for levels in (3, 10, 20):
+        run(str(levels), generated(levels, count), rounds)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
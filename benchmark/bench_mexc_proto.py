@@ -0,0 +1,44 @@
+"""
+对比 MEXC json v3 推送和 protobuf 推送的消息大小，以及 json 解析和 MexcProto 解析的单条消息耗时
+两种格式的内容完全相同，解析结果都是 handler 使用的 dict
+protobuf 按独立手写的编码生成，用来检查 MexcPb 的 .proto 字段号和 json 字段一一对应
+
+python benchmark/bench_mexc_proto.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import payloads
+from RhinoGateway.Gateways.Mexc.MexcStruct.MexcProto import decode_push
+from RhinoGateway.Util.JsonCodec import get_json_codec
+
+codec = get_json_codec()
+
+cases = [
+    ("deals 5", payloads.mexc_deals(count=5), 301),
+    ("deals 50", payloads.mexc_deals(count=50), 301),
+    ("bookTicker", payloads.mexc_book_ticker(), 305),
+    ("increase depth 3", payloads.mexc_increase_depth(count=3), 302),
+    ("increase depth 20", payloads.mexc_increase_depth(count=20), 302),
+]
+
+
+def main(number: int = 20000):
+    print(f"{'channel':<20}{'json B':>8}{'pb B':>7}{'ratio':>7}{'json us':>10}{'pb us':>8}{'pb/json':>9}")
+    for title, frame, body_field in cases:
+        proto = payloads.mexc_proto(frame, body_field)
+        text = frame.decode()
+        # protobuf 解析出来的 dict 和 json 的字段和值一致，handler 不需要区分
+        assert decode_push(proto)["d"] == codec.loads(text)["d"]
+        json_cost = timeit.timeit(lambda: codec.loads(text), number=number) / number * 1e6
+        proto_cost = timeit.timeit(lambda: decode_push(proto), number=number) / number * 1e6
+        print(f"{title:<20}{len(frame):>8}{len(proto):>7}{len(proto) / len(frame):>7.2f}"
+              f"{json_cost:>10.2f}{proto_cost:>8.2f}{proto_cost / json_cost:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+对比部分深度推送每条都解析 20 档快照、逐档 setattr 输出的方式，
+和本地订单簿每条增量只更新变化的档位、读取最优价的单条消息耗时，以及按间隔输出 20 档的耗时
+
+python benchmark/bench_order_book.py
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import payloads
+from RhinoGateway.Base.OrderBook.OrderBook import OrderBook, BookSide
+
+
+class Depth(object):
+    pass
+
+
+def partial(frames, depth_limit: int) -> float:
+    start = time.perf_counter()
+    for frame in frames:
+        data = json.loads(frame).get("data")
+        depth = Depth()
+        bids = data.get("bids")
+        asks = data.get("asks")
+        for i in range(1, depth_limit + 1):
+            bid = bids[i - 1]
+            setattr(depth, f"buy_price{i}", float(bid[0]))
+            setattr(depth, f"buy_amount{i}", float(bid[1]))
+            ask = asks[i - 1]
+            setattr(depth, f"sell_price{i}", float(ask[0]))
+            setattr(depth, f"sell_amount{i}", float(ask[1]))
+    return time.perf_counter() - start
+
+
+def diff(frames, book: OrderBook) -> float:
+    start = time.perf_counter()
+    for frame in frames:
+        data = json.loads(frame).get("data")
+        book.apply(data.get("U"), data.get("u"), None, data.get("b"), data.get("a"), data.get("E"))
+        book.best_bid()
+        book.best_ask()
+    return time.perf_counter() - start
+
+
+def new_book(snapshot: dict) -> OrderBook:
+    book = OrderBook("BTCUSDT", "btcusdt@depth@100ms", 20, 0.1, False)
+    book.load(snapshot.get("lastUpdateId"), snapshot.get("bids"), snapshot.get("asks"))
+    return book
+
+
+def side_update(levels: int, count: int) -> float:
+    side = BookSide(False)
+    for i in range(levels):
+        side.update(27300 - i * 0.01, 1.0)
+    prices = [27300 - (i * 7919 % (levels * 2)) * 0.01 for i in range(count)]
+    start = time.perf_counter()
+    for i, price in enumerate(prices):
+        side.update(price, 0.0 if i % 2 else 2.0)
+    return time.perf_counter() - start
+
+
+def main(count: int = 20000, rounds: int = 5):
+    print(f"{'changes':>8}{'partial us':>12}{'diff us':>10}{'speedup':>9}{'fill us':>10}")
+    for changes in (5, 10, 20):
+        partial_frames = [payloads.binance_spot_depth(limit=20) for _ in range(200)] * (count // 200)
+        diff_frames = [payloads.binance_spot_diff_depth(first_id=1028 + 3 * i, last_id=1030 + 3 * i, count=changes)
+                       for i in range(count)]
+        snapshot = json.loads(payloads.binance_rest_depth(limit=1000))
+        snapshot["lastUpdateId"] = 1027
+        partial_cost = min(partial(partial_frames, 20) for _ in range(rounds))
+        diff_cost = min(diff(diff_frames, new_book(snapshot)) for _ in range(rounds))
+        book = new_book(snapshot)
+        diff(diff_frames, book)
+        start = time.perf_counter()
+        for _ in range(1000):
+            book.fill(Depth())
+        fill_us = (time.perf_counter() - start) / 1000 * 1e6
+        partial_us = partial_cost / len(partial_frames) * 1e6
+        diff_us = diff_cost / count * 1e6
+        print(f"{changes:>8}{partial_us:>12.2f}{diff_us:>10.2f}{partial_us / diff_us:>8.1f}x{fill_us:>10.2f}")
+
+    # 单边档位数对插入和删除耗时的影响
+    print(f"{'book size':>10}{'update us':>11}")
+    for levels in (100, 1000, 5000, 20000):
+        cost = min(side_update(levels, count) for _ in range(rounds))
+        print(f"{levels:>10}{cost / count * 1e6:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+对比 websocket on_received 原来按子串判断 channel、每条消息 split stream 名字并拼接 on_transfers key 的路由方式
+和 StreamRouter 订阅时生成路由表、每条消息查一次字典的路由耗时，只统计路由部分，处理函数为空
+
+python benchmark/bench_stream_router.py
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from RhinoGateway.Base.WebSocket.WebsocketDispatch import DispatchPolicy
+from RhinoGateway.Base.WebSocket.WebsocketRouter import StreamRouter, StreamRoute
+
+exchange_sub = "BINANCESPOT"
+
+
+class Gateway(object):
+    exchange_sub = exchange_sub
+
+
+async def transfer(data):
+    pass
+
+
+on_transfers = {exchange_sub + data_type: transfer for data_type in ("RHINODEPTH", "RHINOTRADE", "RHINOKLINE",
+                                                                     "RHINOTICKER")}
+
+
+def streams(symbols: int):
+    result = []
+    for i in range(symbols):
+        pair = f"coin{i}usdt"
+        result.append((f"{pair}@depth20@100ms", "RHINODEPTH", DispatchPolicy.CONFLATE, 20))
+        result.append((f"{pair}@aggTrade", "RHINOTRADE", DispatchPolicy.LOSSLESS, None))
+        result.append((f"{pair}@kline_1m", "RHINOKLINE", DispatchPolicy.LOSSLESS, None))
+        result.append((f"{pair}@ticker", "RHINOTICKER", DispatchPolicy.CONFLATE, None))
+    return result
+
+
+class SubstringClient(object):
+    """
+    原来的路由方式
+    """
+
+    async def on_received(self, data):
+        channel = data.get("stream", None)
+        if channel is None:
+            return
+        if "depth" in channel:
+            await self.on_depths(data)
+        elif "aggTrade" in channel:
+            await self.on_trades(data)
+        elif "kline" in channel:
+            await self.on_kline(data)
+        elif "ticker" in channel:
+            await self.on_tickers(data)
+
+    async def on_depths(self, data):
+        symbol = data.get("stream").split("@")[0].upper()
+        depth_limit = int(data.get("stream").split("@")[1].split("depth")[1])
+        await on_transfers.get(exchange_sub + "RHINODEPTH")(data)
+        return symbol + "GETDEPTHS", depth_limit
+
+    async def on_trades(self, data):
+        symbol = data.get("stream").split("@")[0].upper()
+        await on_transfers.get(exchange_sub + "RHINOTRADE")(data)
+        return symbol + "GETTRADES"
+
+    async def on_kline(self, data):
+        symbol = data.get("data").get("s").upper()
+        await on_transfers.get(exchange_sub + "RHINOKLINE")(data)
+        return symbol + "GETKLINE"
+
+    async def on_tickers(self, data):
+        symbol = data.get("data").get("s").upper()
+        await on_transfers.get(exchange_sub + "RHINOTICKER")(data)
+        return symbol + "GETKLINE"
+
+
+class RouterClient(object):
+    """
+    StreamRouter 路由方式
+    """
+
+    def __init__(self, subscribe):
+        self.router = StreamRouter(Gateway())
+        for stream, data_type, policy, depth_limit in subscribe:
+            symbol = stream.split("@")[0].upper()
+            self.router.add(stream, self.on_data, symbol, on_transfers.get(exchange_sub + data_type),
+                            symbol + data_type, policy, depth_limit)
+
+    async def on_received(self, data):
+        channel = data.get("stream", None)
+        if channel is None:
+            return
+        await self.router.route(channel, data)
+
+    async def on_data(self, data, route: StreamRoute):
+        await route.transfer(data)
+        return route.heart_key, route.depth_limit
+
+
+def messages(subscribe, count: int):
+    random.seed(1)
+    result = []
+    for _ in range(count):
+        stream = random.choice(subscribe)[0]
+        result.append({"stream": stream, "data": {"s": stream.split("@")[0].upper()}})
+    return result
+
+
+async def run(client, frames) -> float:
+    start = time.perf_counter()
+    for frame in frames:
+        await client.on_received(frame)
+    return time.perf_counter() - start
+
+
+def main(count: int = 10000, rounds: int = 20):
+    print(f"{'symbols':>8}{'substring us':>14}{'router us':>11}{'speedup':>9}{'cpu@10k/s old':>15}{'new':>7}")
+    for symbols in (10, 100, 500):
+        subscribe = streams(symbols)
+        frames = messages(subscribe, count)
+        substring_client = SubstringClient()
+        router_client = RouterClient(subscribe)
+        loop = asyncio.new_event_loop()
+        substring_cost = min(loop.run_until_complete(run(substring_client, frames)) for _ in range(rounds))
+        router_cost = min(loop.run_until_complete(run(router_client, frames)) for _ in range(rounds))
+        loop.close()
+        substring_us = substring_cost / count * 1e6
+        router_us = router_cost / count * 1e6
+        # 每秒 1 万条消息时路由占用单核的比例
+        print(f"{symbols:>8}{substring_us:>14.2f}{router_us:>11.2f}{substring_us / router_us:>8.1f}x"
+              f"{substring_us * 1e4 / 1e6 * 100:>14.1f}%{router_us * 1e4 / 1e6 * 100:>6.1f}%")
+
+
+if __name__ == "__main__":
+    main()
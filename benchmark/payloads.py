@@ -0,0 +1,170 @@
+"""
+按 Binance / Mexc 实际推送格式构造的样本数据，字段、精度和数组长度与线上抓包一致，供 benchmark 使用
+"""
+import json
+import random
+
+random.seed(7)
+
+symbols = [f"{chr(65 + i % 26)}{chr(65 + i // 26 % 26)}{i}USDT" for i in range(300)]
+
+
+def price(base: float) -> str:
+    return f"{base * (1 + random.uniform(-0.001, 0.001)):.8f}"
+
+
+def amount() -> str:
+    return f"{random.uniform(0.001, 500):.3f}"
+
+
+def levels(base: float, count: int, step: float):
+    return [[f"{base + i * step:.8f}", amount()] for i in range(count)]
+
+
+def binance_ticker(symbol: str, event_time: int = 1697000000000) -> dict:
+    return {
+        "e": "24hrTicker", "E": event_time, "s": symbol, "p": "-12.30000000", "P": "-0.045",
+        "w": "27312.44281034", "c": price(27300), "Q": "0.052", "o": price(27310), "h": price(27500),
+        "l": price(27100), "v": "193214.231", "q": "5277068383.55", "O": 1696913600000, "C": 1697000000000,
+        "F": 3931121, "L": 4012312, "n": 81192,
+    }
+
+
+def binance_ticker_arr(count: int = 300) -> bytes:
+    return json.dumps([binance_ticker(s) for s in symbols[:count]]).encode()
+
+
+def binance_book_ticker(symbol: str = "BTCUSDT", update_id: int = 400900217) -> bytes:
+    return json.dumps({
+        "e": "bookTicker", "u": update_id, "E": 1697000000012, "T": 1697000000010, "s": symbol,
+        "b": price(27300), "B": amount(), "a": price(27301), "A": amount(),
+    }).encode()
+
+
+def binance_agg_trade(symbol: str = "BTCUSDT", agg_id: int = 26129) -> bytes:
+    return json.dumps({
+        "e": "aggTrade", "E": 1697000000012, "a": agg_id, "s": symbol, "p": price(27300), "q": amount(),
+        "f": 100, "l": 105, "T": 1697000000010, "m": True,
+    }).encode()
+
+
+def binance_kline(symbol: str = "BTCUSDT") -> bytes:
+    return json.dumps({
+        "e": "kline", "E": 1697000000012, "s": symbol,
+        "k": {
+            "t": 1697000000000, "T": 1697000059999, "s": symbol, "i": "1m", "f": 100, "L": 200,
+            "o": price(27300), "c": price(27300), "h": price(27350), "l": price(27250), "v": "1000",
+            "n": 100, "x": False, "q": "1.0000", "V": "500", "Q": "0.500", "B": "123456",
+        },
+    }).encode()
+
+
+def binance_uswap_depth(symbol: str = "BTCUSDT", limit: int = 20, first_id: int = 157, last_id: int = 160,
+                        prev_id: int = 149) -> bytes:
+    return json.dumps({
+        "e": "depthUpdate", "E": 1697000000012, "T": 1697000000010, "s": symbol, "U": first_id, "u": last_id,
+        "pu": prev_id, "b": levels(27300, limit, -0.1), "a": levels(27300.1, limit, 0.1),
+    }).encode()
+
+
+def binance_spot_depth(symbol: str = "btcusdt", limit: int = 20) -> bytes:
+    return json.dumps({
+        "stream": f"{symbol}@depth{limit}@100ms",
+        "data": {"lastUpdateId": 160, "bids": levels(27300, limit, -0.01), "asks": levels(27300.01, limit, 0.01)},
+    }).encode()
+
+
+def binance_spot_diff_depth(symbol: str = "btcusdt", first_id: int = 161, last_id: int = 163,
+                            count: int = 10, base: float = 27300) -> bytes:
+    # 增量深度大部分变化在盘口附近，约五分之一是删除档位
+    def diff(start: float, step: float):
+        return [[f"{start + step * random.randint(0, 200):.8f}",
+                 "0.00000000" if random.random() < 0.2 else amount()] for _ in range(count)]
+
+    return json.dumps({
+        "stream": f"{symbol}@depth@100ms",
+        "data": {"e": "depthUpdate", "E": 1697000000012, "s": symbol.upper(), "U": first_id, "u": last_id,
+                 "b": diff(base, -0.01), "a": diff(base + 0.01, 0.01)},
+    }).encode()
+
+
+def binance_rest_depth(limit: int = 100) -> bytes:
+    return json.dumps({
+        "lastUpdateId": 1027024, "E": 1697000000012, "T": 1697000000010,
+        "bids": levels(27300, limit, -0.1), "asks": levels(27300.1, limit, 0.1),
+    }).encode()
+
+
+def mexc_deals(symbol: str = "BTCUSDT", count: int = 5) -> bytes:
+    return json.dumps({
+        "c": f"spot@public.deals.v3.api@{symbol}", "s": symbol, "t": 1697000000012,
+        "d": {
+            "deals": [{"S": random.choice([1, 2]), "p": price(27300), "t": 1697000000010, "v": amount()}
+                      for _ in range(count)],
+            "e": "spot@public.deals.v3.api",
+        },
+    }).encode()
+
+
+def mexc_book_ticker(symbol: str = "BTCUSDT") -> bytes:
+    return json.dumps({
+        "c": f"spot@public.bookTicker.v3.api@{symbol}", "s": symbol, "t": 1697000000012,
+        "d": {"A": amount(), "B": amount(), "a": price(27301), "b": price(27300)},
+    }).encode()
+
+
+def mexc_increase_depth(symbol: str = "BTCUSDT", version: int = 3407459756, count: int = 3,
+                        deletes: float = 0) -> bytes:
+    # deletes 是数量为 0（删除档位）的比例
+    def volume():
+        return "0" if deletes and random.random() < deletes else amount()
+
+    return json.dumps({
+        "c": f"spot@public.increase.depth.v3.api@{symbol}", "s": symbol, "t": 1697000000012,
+        "d": {
+            "asks": [{"p": price(27301), "v": volume()} for _ in range(count)],
+            "bids": [{"p": price(27300), "v": volume()} for _ in range(count)],
+            "e": "spot@public.increase.depth.v3.api", "r": str(version),
+        },
+    }).encode()
+
+
+def proto_varint(value: int) -> bytes:
+    result = bytearray()
+    while True:
+        b = value & 0x7f
+        value >>= 7
+        if value:
+            result.append(b | 0x80)
+        else:
+            result.append(b)
+            return bytes(result)
+
+
+def proto_field(field: int, value) -> bytes:
+    if isinstance(value, int):
+        return proto_varint(field << 3) + proto_varint(value)
+    if isinstance(value, str):
+        value = value.encode()
+    return proto_varint(field << 3 | 2) + proto_varint(len(value)) + value
+
+
+def mexc_proto(frame: bytes, body_field: int) -> bytes:
+    """
+    把 json v3 推送按 PushDataV3ApiWrapper 编码成 protobuf，内容和 json 完全一样，用于对比
+    body_field: 301 deals / 302 increase depth / 305 bookTicker
+    """
+    data = json.loads(frame)
+    d = data["d"]
+    if body_field == 301:
+        body = b"".join(proto_field(1, proto_field(1, deal["p"]) + proto_field(2, deal["v"]) +
+                                    proto_field(3, deal["S"]) + proto_field(4, deal["t"]))
+                        for deal in d["deals"]) + proto_field(2, d["e"])
+    elif body_field == 302:
+        body = (b"".join(proto_field(1, proto_field(1, ask["p"]) + proto_field(2, ask["v"])) for ask in d["asks"]) +
+                b"".join(proto_field(2, proto_field(1, bid["p"]) + proto_field(2, bid["v"])) for bid in d["bids"]) +
+                proto_field(3, d["e"]) + proto_field(4, d["r"]))
+    else:
+        body = proto_field(1, d["b"]) + proto_field(2, d["B"]) + proto_field(3, d["a"]) + proto_field(4, d["A"])
+    return (proto_field(1, data["c"]) + proto_field(3, data["s"]) + proto_field(6, data["t"]) +
+            proto_field(body_field, body))
@@ -14,16 +14,25 @@ setup(
         "RhinoGateway",
         "RhinoGateway.Base",
         "RhinoGateway.Base.RestFul",
+        "RhinoGateway.Base.RateLimit",
+        "RhinoGateway.Base.Metrics",
         "RhinoGateway.Base.WebSocket",
         "RhinoGateway.Base.BaseGateway",
+        "RhinoGateway.Base.OrderBook",
         "RhinoGateway.Gateways",
         "RhinoGateway.Gateways.Binance",
         "RhinoGateway.Gateways.Binance.BinanceSpotGateway",
         "RhinoGateway.Gateways.Binance.BinanceUSwapGateway",
+        "RhinoGateway.Gateways.Binance.BinanceStruct",
         "RhinoGateway.Gateways.BSCGateway",
         "RhinoGateway.Gateways.BSCGateway.BSCSpotGateway",
         "RhinoGateway.Gateways.Mexc",
         "RhinoGateway.Gateways.Mexc.MexcSpotGateway",
+        "RhinoGateway.Gateways.Mexc.MexcStruct",
+        "RhinoGateway.Gateways.Mexc.MexcStruct.MexcPb",
         "RhinoGateway.Util",
-    ]
+    ],
+    package_data={
+        "RhinoGateway.Gateways.Mexc.MexcStruct.MexcPb": ["*.proto"],
+    }
 )